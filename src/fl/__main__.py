@@ -0,0 +1,11 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+import sys
+
+from fl.main import main
+
+sys.exit(main())
@@ -0,0 +1,176 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from collections import OrderedDict
+
+class Backend(object):
+    '''Base class of the strategies to evaluate an engine.
+
+    A backend maps rows of crisp inputs, in the order of engine.input, to rows
+    of defuzzified outputs, in the order of engine.output. Backends share the
+    variables of the engine, so they must not be used concurrently.
+
+    Attributes:
+        name: the name under which the backend is registered.
+        engine: the engine to evaluate.
+    '''
+    name = None
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __str__(self):
+        return self.name
+
+    def fire_rules(self):
+        '''Fires the rules of the engine from the current inputs.'''
+        raise NotImplementedError('fire_rules')
+
+    def process(self, row):
+        '''Returns the list of outputs for a row of inputs.'''
+        engine = self.engine
+        for variable, x in zip(engine.input.values(), row):
+            variable.input = x
+        for variable in engine.output.values():
+            variable.output.clear()
+        self.fire_rules()
+        return [variable.defuzzify() for variable in engine.output.values()]
+
+    def process_batch(self, rows):
+        '''Returns the list of outputs for each row of inputs.'''
+        return [self.process(row) for row in rows]
+
+
+class Reference(Backend):
+    '''Evaluates each antecedent tree of each rule, as Engine.process() without a Plan.'''
+    name = 'reference'
+
+    def fire_rules(self):
+        for ruleblock in self.engine.ruleblock.values():
+            ruleblock.fire_rules()
+
+
+class Compiled(Backend):
+    '''Evaluates a Plan that shares common sub-expressions among rules.'''
+    name = 'plan'
+    fam = False
+
+    def __init__(self, engine):
+        Backend.__init__(self, engine)
+        from fl.plan import Plan
+        self.plan = Plan(engine, self.fam)
+
+    def fire_rules(self):
+        self.plan.fire_rules()
+
+    def process_batch(self, rows):
+        return self.plan.process_batch(rows)
+
+
+class Tabular(Compiled):
+    '''Evaluates grid-shaped rules as FAM tables, and the rest as a Plan.'''
+    name = 'fam'
+    fam = True
+
+
+class Lookup(Backend):
+    '''Interpolates the outputs from a table precomputed on a grid of the inputs.
+
+    The table is computed once by another backend on resolution points per input
+    variable, evenly spaced over its range, and each row is then answered by
+    multilinear interpolation between the surrounding points, with inputs clipped
+    to the range. Lookups are approximate and their cost does not depend on the
+    rules, so they are not registered among the exact backends, but serve as
+    cheap fallbacks, e.g. in a Loop.
+
+    Attributes:
+        resolution: the number of points of the grid per input variable.
+        axes: a list with the points of the grid of each input variable.
+        table: a flat list of rows of outputs, in row-major order of the grid.
+    '''
+    name = 'lookup'
+
+    #largest number of points of the grid
+    limit = 1000000
+
+    def __init__(self, engine, resolution=33, backend='plan'):
+        Backend.__init__(self, engine)
+        if resolution < 2:
+            raise ValueError('expected a resolution of at least 2, but found %i' % resolution)
+        if resolution ** len(engine.input) > self.limit:
+            raise ValueError('a grid of %i^%i points exceeds the limit of %i'
+                             % (resolution, len(engine.input), self.limit))
+        self.resolution = resolution
+        self.axes = []
+        for variable in engine.input.values():
+            minimum, maximum = variable.minimum(), variable.maximum()
+            step = (maximum - minimum) / (resolution - 1)
+            self.axes.append([minimum + i * step for i in range(resolution)])
+        grid = [[]]
+        for axis in self.axes:
+            grid = [point + [x] for point in grid for x in axis]
+        self.table = create(backend, engine).process_batch(grid)
+
+    def process(self, row):
+        last = self.resolution - 1
+        #index of the lower point of the cell and the fraction towards the upper
+        cell = []
+        nearest = 0
+        for axis, x in zip(self.axes, row):
+            span = axis[-1] - axis[0]
+            position = min(max((x - axis[0]) / span * last if span > 0 else 0.0, 0.0), last)
+            index = min(int(position), last - 1)
+            cell.append((index, position - index))
+            nearest = nearest * self.resolution + index + (position - index >= 0.5)
+        result = [0.0] * len(self.engine.output)
+        for corner in range(1 << len(cell)):
+            offset = 0
+            weight = 1.0
+            for bit, (index, fraction) in enumerate(cell):
+                upper = (corner >> (len(cell) - 1 - bit)) & 1
+                offset = offset * self.resolution + index + upper
+                weight *= fraction if upper else 1.0 - fraction
+            if weight == 0.0: continue
+            for i, y in enumerate(self.table[offset]):
+                result[i] += weight * y
+        #nan (no rules fired) at a corner spreads over the cell, so take the nearest point
+        return [y if y == y else self.table[nearest][i] for i, y in enumerate(result)]
+
+backends = OrderedDict()
+
+def register(backend):
+    '''Registers a Backend class under its name.'''
+    backends[backend.name] = backend
+    return backend
+
+for backend in (Reference, Compiled, Tabular):
+    register(backend)
+
+def create(name, engine):
+    '''Returns an instance of the backend registered under name for the engine.'''
+    if name not in backends:
+        raise ValueError('unknown backend <%s>, only %s are available'
+                         % (name, list(backends)))
+    return backends[name](engine)
+
+
+if __name__ == '__main__':
+    import os, sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    fe = simple_ai_boat()
+    rows = [(relative, location) for location in range(0, 2001, 50)
+            for relative in range(-100, 101, 10)]
+    expected = create('reference', fe).process_batch(rows)
+    for name in backends:
+        backend = create(name, fe)
+        for results in (backend.process_batch(rows), [backend.process(row) for row in rows]):
+            for row, a, b in zip(rows, results, expected):
+                if not all(abs(x - y) < 1e-9 or (x != x and y != y) for x, y in zip(a, b)):
+                    raise AssertionError('DIFFERENT results from %s at %s: %s != %s'
+                                         % (name, row, a, b))
+        print('Backend %s is just FINE :)' % name)
+    print(create('fam', fe).plan)
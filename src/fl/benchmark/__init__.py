@@ -0,0 +1,8 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Benchmarks of the components of the library. Each module can be run on its own,
+e.g. python -m fl.benchmark.fcl_import
+'''
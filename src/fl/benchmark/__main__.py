@@ -0,0 +1,102 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Command line interface of the benchmarks:
+
+    python -m fl.benchmark run [--output results.json] [--baseline baseline.json]
+                               [--threshold 0.1] [--threshold name=0.25] [--filter text]
+    python -m fl.benchmark backends engine.fcl [--rows 1000] [--backend name ...]
+'''
+
+import argparse
+import random
+import sys
+import time
+
+from fl import backend
+from fl.benchmark import suite
+from fl.benchmark.components import suite as components
+from fl.fcl import FCLImporter
+
+def run(args):
+    def log(name, timings):
+        sys.stderr.write('%-40s %12s\n' % (name, suite.format_time(timings['min'])))
+    results = components(args.repeat, args.min_time).run(args.filter, log)
+    if args.output is not None:
+        with open(args.output, 'w') as stream:
+            suite.save(results, stream)
+    if args.baseline is None:
+        return 0
+    threshold = 0.1
+    thresholds = {}
+    for value in args.threshold:
+        if '=' in value:
+            name, value = value.split('=', 1)
+            thresholds[name] = float(value)
+        else: threshold = float(value)
+    with open(args.baseline) as stream:
+        baseline = suite.load(stream)
+    regressions = 0
+    for name, before, after, ratio, regressed in suite.compare(results, baseline,
+                                                               threshold, thresholds):
+        print('%-40s %12s %12s %8.3f %s' % (name, suite.format_time(before),
+              suite.format_time(after), ratio, 'REGRESSION' if regressed else ''))
+        regressions += regressed
+    print('%i regressions' % regressions)
+    return 1 if regressions else 0
+
+def random_rows(fe, count, seed=0):
+    '''Returns count rows of random inputs within the range of each input variable.'''
+    generator = random.Random(seed)
+    ranges = [(variable.minimum(), variable.maximum()) for variable in fe.input.values()]
+    return [[generator.uniform(a, b) for a, b in ranges] for _ in range(count)]
+
+def backends(args):
+    with open(args.fcl) as stream:
+        fe = FCLImporter().engine(stream)
+    rows = random_rows(fe, args.rows, args.seed)
+    names = args.backend or list(backend.backends)
+    expected = backend.create('reference', fe).process_batch(rows)
+    print('%-12s %12s %12s %14s' % ('backend', 'time', 'rows/s', 'max error'))
+    for name in names:
+        instance = backend.create(name, fe)
+        start = time.perf_counter()
+        results = instance.process_batch(rows)
+        elapsed = time.perf_counter() - start
+        error = 0.0
+        for a, b in zip(results, expected):
+            for x, y in zip(a, b):
+                if x != y and not (x != x and y != y):
+                    error = max(error, abs(x - y))
+        print('%-12s %12s %12.0f %14.3g' % (name, suite.format_time(elapsed),
+              len(rows) / elapsed, error))
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fl.benchmark')
+    commands = parser.add_subparsers(dest='command')
+    command = commands.add_parser('run', help='runs the component benchmarks')
+    command.add_argument('--output', help='file to write the results as JSON')
+    command.add_argument('--baseline', help='JSON results to compare against')
+    command.add_argument('--threshold', action='append', default=[],
+                         help='relative slowdown allowed, as 0.1 or name=0.1')
+    command.add_argument('--filter', help='runs only benchmarks containing this text')
+    command.add_argument('--repeat', type=int, default=5)
+    command.add_argument('--min-time', type=float, default=0.05)
+    command = commands.add_parser('backends', help='compares the backends on an FCL file')
+    command.add_argument('fcl', help='the FCL file of the engine')
+    command.add_argument('--rows', type=int, default=1000)
+    command.add_argument('--seed', type=int, default=0)
+    command.add_argument('--backend', action='append', choices=list(backend.backends))
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        return run(args)
+    elif args.command == 'backends':
+        return backends(args)
+    parser.print_help()
+    return 2
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Measures the memory allocated by each call to process an engine once warmed up:
+
+    python -m fl.benchmark.allocations [--calls 1000]
+
+For each way of firing the rules, it reports the blocks and bytes allocated by
+firing that outlive it (the outputs accumulated until the next call), the peak of
+bytes allocated while firing and defuzzifying, and the number of garbage 
+collections of the youngest generation per thousand calls.
+'''
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+from fl import backend
+from fl.term import Output
+
+def clear(fe):
+    '''Clears the accumulated outputs, as every process does first.'''
+    def function():
+        for variable in fe.output.values():
+            variable.output.clear()
+    return function
+
+def defuzzify(fe):
+    return lambda: [variable.defuzzify() for variable in fe.output.values()]
+
+def process(fe):
+    '''Fires the rules with Engine.process().'''
+    return lambda: fe.process()
+
+def fire(fe, name):
+    '''Fires the rules with the backend of the given name.'''
+    return backend.create(name, fe).fire_rules
+
+def allocating(fe):
+    '''Emulates the process before outputs were reused: every process cleared the
+    accumulated outputs with a new list, and every fired proposition appended a
+    new Output.'''
+    def function():
+        for variable in fe.output.values():
+            variable.output.terms = []
+        for ruleblock in fe.ruleblock.values():
+            for rule in ruleblock:
+                strength = rule.firing_strength(ruleblock.tnorm, ruleblock.snorm)
+                if strength > 0.0:
+                    for proposition in rule.consequent.propositions:
+                        proposition.variable.output.append(Output(proposition.term,
+                            strength * proposition.weight, ruleblock.activation))
+    return function
+
+def measure(fe, fire, rows, calls, warmup=100):
+    '''Returns the mean blocks and bytes per call allocated by firing the rules that
+    outlive it (until the next call clears them), the peak bytes while firing and
+    defuzzifying, and the collections of the youngest generation per thousand calls,
+    all after warming up.'''
+    reset = clear(fe)
+    outputs = defuzzify(fe)
+    def call(i):
+        for variable, x in zip(fe.input.values(), rows[i % len(rows)]):
+            variable.input = x
+        reset()
+    for i in range(warmup):
+        call(i)
+        fire()
+        outputs()
+    blocks = 0
+    collections = gc.get_stats()[0]['collections']
+    for i in range(calls):
+        call(i)
+        before = sys.getallocatedblocks()
+        fire()
+        blocks += sys.getallocatedblocks() - before
+        outputs()
+    collections = gc.get_stats()[0]['collections'] - collections
+    held = peak = 0
+    tracemalloc.start()
+    try:
+        for i in range(calls):
+            call(i)
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fire()
+            held += tracemalloc.get_traced_memory()[0] - before
+            outputs()
+            peak += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return blocks / calls, held / calls, peak / calls, 1000.0 * collections / calls
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fl.benchmark.allocations')
+    parser.add_argument('--calls', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    from fl.benchmark.__main__ import random_rows
+    from fl.generator import Generator
+    print('%-40s %10s %10s %10s %10s' % ('', 'blocks', 'bytes', 'peak', 'gc/1k'))
+    for fe in (simple_ai_boat(), Generator(inputs=2, terms=5, rules=200).engine()):
+        rows = random_rows(fe, 100)
+        functions = [('engine.process.allocating', allocating(fe)),
+                     ('engine.process', process(fe))]
+        functions.extend(('backend.%s' % name, fire(fe, name)) for name in backend.backends)
+        for name, function in functions:
+            print('%-40s %10.1f %10.1f %10.1f %10.2f' % (('%s %s' % (fe.name, name),)
+                  + measure(fe, function, rows, args.calls)))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Measures the throughput of scoring with workers on localhost, versus the number
+of worker processes:
+
+    python -m fl.benchmark.cluster [--workers 1 2 4] [--rows 20000] [--chunk-size 500]
+
+Each worker is a separate process listening on TCP, as if on another host, and
+the coordinator shards the rows among them (see fl.cluster).
+'''
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+from fl import backend
+from fl.cluster import Coordinator, Worker
+from fl.fcl import FCLExporter
+from fl.generator import Generator
+
+def serve(ports, name):
+    worker = Worker(backend=name)
+    ports.put(worker.server_address[1])
+    worker.serve_forever()
+
+def start(count, name):
+    '''Returns the worker processes started and their addresses.'''
+    ports = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=serve, args=(ports, name), daemon=True)
+                 for _ in range(count)]
+    for process in processes:
+        process.start()
+    return processes, [('127.0.0.1', ports.get(timeout=30)) for _ in processes]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fl.benchmark.cluster')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--rules', type=int, default=200)
+    parser.add_argument('--backend', default='plan', choices=list(backend.backends))
+    args = parser.parse_args(argv)
+
+    generator = Generator(inputs=3, terms=5, rules=args.rules, depth=3)
+    fe = generator.engine()
+    fcl = FCLExporter().engine(fe)
+    rows = generator.rows(args.rows)
+    start_time = time.perf_counter()
+    expected = backend.create(args.backend, fe).process_batch(rows)
+    elapsed = time.perf_counter() - start_time
+    print('%-12s %12s %10s' % ('workers', 'rows/s', 'speedup'))
+    print('%-12s %12.0f %10.2f' % ('local', args.rows / elapsed, 1.0))
+    baseline = elapsed
+    for count in args.workers:
+        processes, addresses = start(count, args.backend)
+        try:
+            coordinator = Coordinator(addresses, fcl)
+            coordinator.process_batch(rows[:count * args.chunk_size], args.chunk_size)
+            start_time = time.perf_counter()
+            results = coordinator.process_batch(rows, args.chunk_size)
+            elapsed = time.perf_counter() - start_time
+        finally:
+            for process in processes:
+                process.terminate()
+        if len(results) != len(expected) or any(
+                a != b and not (a != a and b != b)
+                for x, y in zip(results, expected) for a, b in zip(x, y)):
+            raise AssertionError('DIFFERENT results with %i workers' % count)
+        print('%-12i %12.0f %10.2f' % (count, args.rows / elapsed, baseline / elapsed))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+import os
+import sys
+
+from fl import backend
+from fl.benchmark.suite import Suite
+from fl.defuzzifier import (CenterOfGravity, SmallestOfMaximum, LargestOfMaximum,
+                            MiddleOfMaximum)
+from fl.example import Example
+from fl.fcl import FCLExporter, FCLImporter
+from fl.mamdani import MamdaniRule
+from fl.term import (Triangle, Trapezoid, Rectangle, LeftShoulder, RightShoulder,
+                     Gaussian, Bell, Sigmoid)
+
+def rowing():
+    '''Returns the rowing engine of demo/fuzzy_logic_dynrow.py, or None if the
+    demo is not available.'''
+    demo = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'demo'))
+    if not os.path.exists(os.path.join(demo, 'fuzzy_logic_dynrow.py')):
+        return None
+    if demo not in sys.path:
+        sys.path.append(demo)
+    from fuzzy_logic_dynrow import simple_ai_boat
+    return simple_ai_boat()
+
+def engines():
+    '''Returns a list of (name, engine, list of input rows) to benchmark.'''
+    result = [('simple_mamdani', Example.simple_mamdani(),
+               [[0.05 * i] for i in range(41)])]
+    fe = rowing()
+    if fe is not None:
+        result.append(('rowing', fe, [[relative, location]
+                                      for location in range(0, 2001, 250)
+                                      for relative in range(-100, 101, 50)]))
+    return result
+
+#101 points in [0, 1] to evaluate memberships
+POINTS = [0.01 * i for i in range(101)]
+
+TERMS = [Triangle('term', 0.0, 0.5, 1.0), Trapezoid('term', 0.0, 0.25, 0.75, 1.0),
+         Rectangle('term', 0.25, 0.75), LeftShoulder('term', 0.25, 0.75),
+         RightShoulder('term', 0.25, 0.75), Gaussian('term', 0.0, 1.0, 0.2, 0.5),
+         Bell('term', 0.0, 1.0, 0.2, 2.0, 0.5), Sigmoid('term', 0.0, 1.0, 10.0, 0.5)]
+
+DEFUZZIFIERS = [CenterOfGravity, SmallestOfMaximum, LargestOfMaximum, MiddleOfMaximum]
+
+DIVISIONS = [10, 100, 1000]
+
+def membership(term):
+    def setup():
+        function = term.membership
+        return lambda: [function(x) for x in POINTS]
+    return setup
+
+def fuzzify():
+    variable = Example.simple_mamdani().input['Energy']
+    return lambda: variable.fuzzify(0.7)
+
+def parse():
+    fe = Example.simple_mamdani()
+    return lambda: MamdaniRule.parse('if Energy is LOW or Energy is very MEDIUM '
+                                     'then Health is BAD', fe)
+
+def fire_rules():
+    fe = Example.simple_mamdani()
+    fe.input['Energy'].input = 0.7
+    outputs = list(fe.output.values())
+    ruleblocks = list(fe.ruleblock.values())
+    def function():
+        for variable in outputs:
+            variable.output.clear()
+        for ruleblock in ruleblocks:
+            ruleblock.fire_rules()
+    return function
+
+def defuzzify(defuzzifier, divisions):
+    def setup():
+        fe = Example.simple_mamdani()
+        fe.input['Energy'].input = 0.7
+        fe.process()
+        term = fe.output['Health'].output
+        instance = defuzzifier(divisions)
+        return lambda: instance.defuzzify(term)
+    return setup
+
+def process(name, fe, rows):
+    def setup():
+        inputs = list(fe.input.values())
+        outputs = list(fe.output.values())
+        def function():
+            for row in rows:
+                for variable, x in zip(inputs, row):
+                    variable.input = x
+                fe.process()
+                for variable in outputs:
+                    variable.defuzzify()
+        return function
+    return setup
+
+def process_batch(backend_name, fe, rows):
+    def setup():
+        instance = backend.create(backend_name, fe)
+        return lambda: instance.process_batch(rows)
+    return setup
+
+def export(fe):
+    def setup():
+        exporter = FCLExporter()
+        return lambda: exporter.engine(fe)
+    return setup
+
+def import_(fe):
+    def setup():
+        fcl = FCLExporter().engine(fe)
+        return lambda: FCLImporter().engine(fcl)
+    return setup
+
+def suite(repeat=5, min_time=0.05):
+    '''Returns the Suite of benchmarks of the components of the library.'''
+    result = Suite(repeat, min_time)
+    for term in TERMS:
+        result.add('term.membership.%s' % type(term).__name__, membership(term))
+    result.add('variable.fuzzify', fuzzify)
+    result.add('rule.parse', parse)
+    result.add('ruleblock.fire_rules', fire_rules)
+    for defuzzifier in DEFUZZIFIERS:
+        for divisions in DIVISIONS:
+            result.add('defuzzifier.%s.%i' % (defuzzifier(), divisions),
+                       defuzzify(defuzzifier, divisions))
+    for name, fe, rows in engines():
+        result.add('engine.process.%s' % name, process(name, fe, rows))
+        for backend_name in backend.backends:
+            result.add('backend.%s.%s' % (backend_name, name),
+                       process_batch(backend_name, fe, rows))
+        result.add('fcl.export.%s' % name, export(fe))
+        result.add('fcl.import.%s' % name, import_(fe))
+    return result
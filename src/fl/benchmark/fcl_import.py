@@ -0,0 +1,68 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+import io
+import os
+import tempfile
+import time
+
+from fl.fcl import FCLImporter
+
+def generate_fcl(terms, rules):
+    '''Returns the FCL of an engine with two inputs and one output with the given
+    number of terms each, and the given number of rules combining them.'''
+    fcl = ['FUNCTION_BLOCK benchmark', '']
+    fcl.extend(['VAR_INPUT', 'a: REAL;', 'b: REAL;', 'END_VAR', ''])
+    fcl.extend(['VAR_OUTPUT', 'c: REAL;', 'END_VAR', ''])
+    for name in ('a', 'b'):
+        fcl.append('FUZZIFY %s' % name)
+        for i in range(terms):
+            fcl.append('TERM t%i := Triangle (%f, %f, %f);' % (i, i, i + 1, i + 2))
+        fcl.extend(['END_FUZZIFY', ''])
+    fcl.append('DEFUZZIFY c')
+    for i in range(terms):
+        fcl.append('TERM t%i := Triangle (%f, %f, %f);' % (i, i, i + 1, i + 2))
+    fcl.extend(['METHOD : COG;', 'ACCU : MAX;', 'DEFAULT : nan;', 'END_DEFUZZIFY', ''])
+    fcl.extend(['RULEBLOCK', 'AND : MIN;', 'OR : MAX;', 'ACT : MIN;', ''])
+    for i in range(rules):
+        fcl.append('RULE %i : if a is t%i and b is t%i then c is t%i;'
+                   % (i + 1, i % terms, (i * 7) % terms, (i * 13) % terms))
+    fcl.extend(['END_RULEBLOCK', '', 'END_FUNCTION_BLOCK'])
+    return '\n'.join(fcl)
+
+def benchmark(terms, rules, repeat=3):
+    '''Returns a dictionary with the best time to import an engine from a string
+    and from a file.'''
+    fcl = generate_fcl(terms, rules)
+    result = {'terms': 3 * terms, 'rules': rules, 'bytes': len(fcl)}
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        FCLImporter().engine(fcl)
+        best = min(best, time.perf_counter() - start)
+    result['string'] = best
+    handle, path = tempfile.mkstemp(suffix='.fcl')
+    try:
+        with os.fdopen(handle, 'w') as output:
+            output.write(fcl)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with io.open(path) as stream:
+                FCLImporter().engine(stream)
+            best = min(best, time.perf_counter() - start)
+        result['file'] = best
+    finally:
+        os.remove(path)
+    return result
+
+if __name__ == '__main__':
+    print('%8s %8s %10s %10s %12s' % ('terms', 'rules', 'string(s)', 'file(s)', 'lines/s'))
+    for terms, rules in ((1000, 10000), (10000, 10000), (10000, 50000), (30000, 100000)):
+        result = benchmark(terms, rules, repeat=1)
+        print('%8i %8i %10.3f %10.3f %12.0f' % (result['terms'], result['rules'],
+              result['string'], result['file'],
+              (result['terms'] + result['rules']) / result['file']))
@@ -0,0 +1,79 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Measures the memory held per rule by object and compact ruleblocks, and the time
+to fire them, on generated engines of growing rule bases:
+
+    python -m fl.benchmark.rules [--rules 1000 10000 100000] [--rows 20]
+
+The memory is the size traced by tracemalloc that outlives building the
+ruleblock, divided by its number of rules.
+'''
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from fl.compact import CompactRuleBlock
+from fl.generator import Generator
+from fl.mamdani import MamdaniRule
+from fl.rule import Rule
+from fl.ruleblock import RuleBlock
+
+def build(ruleblock, texts, fe):
+    '''Returns the bytes held by the ruleblock after parsing and appending the rules.'''
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for text in texts:
+            ruleblock.append(MamdaniRule.parse(text, fe))
+        return tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+def fire(fe, ruleblock, rows):
+    '''Returns the mean seconds to fire the ruleblock and defuzzify the outputs.'''
+    start = time.perf_counter()
+    for row in rows:
+        for variable, x in zip(fe.input.values(), row):
+            variable.input = x
+        for variable in fe.output.values():
+            variable.output.clear()
+        ruleblock.fire_rules()
+        for variable in fe.output.values():
+            variable.defuzzify()
+    return (time.perf_counter() - start) / len(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fl.benchmark.rules')
+    parser.add_argument('--rules', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--inputs', type=int, default=4)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print('%10s %-10s %14s %14s %12s' % ('rules', 'storage', 'bytes/rule', 'total MB',
+                                         'ms/row'))
+    for count in args.rules:
+        generator = Generator(inputs=args.inputs, terms=7, rules=count, depth=args.depth,
+                              disjunction=0.2)
+        fe = generator.engine()
+        texts = ['%s %s %s %s' % (Rule.FR_IF, rule.antecedent.str_infix(), Rule.FR_THEN,
+                                  rule.consequent) for rule in fe.ruleblock[None]]
+        rows = generator.rows(args.rows)
+        fe.ruleblock.clear() #the generated rules would be shared by both storages
+        for name, ruleblock in (('object', RuleBlock()),
+                                ('compact', CompactRuleBlock(fe))):
+            size = build(ruleblock, texts, fe)
+            ruleblock.configure(fe.operator)
+            elapsed = fire(fe, ruleblock, rows)
+            print('%10i %-10s %14.1f %14.2f %12.3f' % (count, name, size / count,
+                  size / 1e6, 1e3 * elapsed))
+            del ruleblock
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Measures how the cost of evaluating an engine grows with its shape, e.g.:
+
+    python -m fl.benchmark.scaling --sweep rules=10,100,1000 --sweep divisions=10,100,1000
+                                   --rows 200 --format csv > scaling.csv
+
+Each row of the output is one point of a scaling curve of one backend, with the
+parameter swept, its value, throughput, latency percentiles and peak memory.
+'''
+
+import argparse
+import csv
+import json
+import sys
+import time
+import tracemalloc
+
+from fl import backend
+from fl.generator import Generator
+
+PARAMETERS = ('inputs', 'outputs', 'terms', 'rules', 'depth', 'divisions')
+
+FIELDS = ('parameter', 'value', 'backend', 'inputs', 'outputs', 'terms', 'rules',
+          'depth', 'divisions', 'rows', 'throughput', 'p50', 'p90', 'p99', 'max',
+          'peak_bytes')
+
+def percentile(timings, fraction):
+    '''Returns the percentile of the sorted timings.'''
+    return timings[min(len(timings) - 1, int(fraction * len(timings)))]
+
+def measure(generator, name, rows):
+    '''Returns a dictionary with the throughput, latency percentiles and peak memory
+    of evaluating the engine of the generator with the given backend.'''
+    inputs = generator.rows(rows)
+    #memory is traced in a separate pass because tracemalloc slows everything down
+    tracemalloc.start()
+    try:
+        backend.create(name, generator.engine()).process_batch(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    instance = backend.create(name, generator.engine())
+    start = time.perf_counter()
+    instance.process_batch(inputs)
+    elapsed = time.perf_counter() - start
+    timings = []
+    for row in inputs:
+        start = time.perf_counter()
+        instance.process(row)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {'rows': rows, 'throughput': rows / elapsed if elapsed > 0 else float('inf'),
+            'p50': percentile(timings, 0.50), 'p90': percentile(timings, 0.90),
+            'p99': percentile(timings, 0.99), 'max': timings[-1], 'peak_bytes': peak}
+
+def sweep(base, sweeps, backends, rows, log=None):
+    '''Yields a dictionary with the FIELDS for each value of each swept parameter
+    and each backend.
+
+    Args:
+        base: a dictionary of the parameters of the Generator kept fixed.
+        sweeps: a list of (parameter, list of values).
+        backends: a list of backend names.
+        rows: the number of rows of inputs to evaluate per point.'''
+    for parameter, values in sweeps:
+        for value in values:
+            shape = dict(base)
+            shape[parameter] = value
+            shape['depth'] = min(shape['depth'], shape['inputs'])
+            generator = Generator(**shape)
+            for name in backends:
+                point = {'parameter': parameter, 'value': value, 'backend': name}
+                point.update((key, getattr(generator, key)) for key in PARAMETERS)
+                point.update(measure(generator, name, rows))
+                if log is not None:
+                    log(point)
+                yield point
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fl.benchmark.scaling')
+    parser.add_argument('--sweep', action='append', default=[],
+                        help='parameter=value,value,... where parameter is one of %s'
+                        % ', '.join(PARAMETERS))
+    for parameter, default in zip(PARAMETERS, (2, 1, 5, 25, 2, 100)):
+        parser.add_argument('--%s' % parameter, type=int, default=default,
+                            help='value when not swept (default %i)' % default)
+    parser.add_argument('--backend', action='append', choices=list(backend.backends))
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--format', choices=('csv', 'json'), default='csv')
+    args = parser.parse_args(argv)
+
+    base = {parameter: getattr(args, parameter) for parameter in PARAMETERS}
+    sweeps = []
+    for value in args.sweep or ['rules=10,100,1000']:
+        parameter, values = value.split('=', 1)
+        if parameter not in PARAMETERS:
+            parser.error('unknown parameter <%s>' % parameter)
+        sweeps.append((parameter, [int(x) for x in values.split(',')]))
+
+    if args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, FIELDS)
+        writer.writeheader()
+        log = writer.writerow
+    else:
+        log = lambda point: sys.stdout.write(json.dumps(point, sort_keys=True) + '\n')
+    for point in sweep(base, sweeps, args.backend or list(backend.backends), args.rows):
+        log(point)
+        sys.stdout.flush()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
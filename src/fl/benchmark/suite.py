@@ -0,0 +1,117 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from collections import OrderedDict
+import json
+import platform
+import time
+
+class Suite(object):
+    '''A collection of microbenchmarks.
+
+    A benchmark is registered as a setup function that returns the function to time,
+    which takes no arguments. Each benchmark is timed in repeat rounds, each of which
+    calls the function as many times as needed to last at least min_time seconds.
+
+    Attributes:
+        benchmarks: an ordered dictionary of names to setup functions.
+        repeat: the number of rounds per benchmark.
+        min_time: the minimum duration of each round in seconds.
+    '''
+
+    def __init__(self, repeat=5, min_time=0.05):
+        self.benchmarks = OrderedDict()
+        self.repeat = repeat
+        self.min_time = min_time
+
+    def add(self, name, setup):
+        '''Registers the setup function of a benchmark under the given name.'''
+        if name in self.benchmarks:
+            raise ValueError('benchmark <%s> already exists' % name)
+        self.benchmarks[name] = setup
+
+    def calibrate(self, function):
+        '''Returns the number of calls to the function that last at least min_time.'''
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            if time.perf_counter() - start >= self.min_time:
+                return number
+            number *= 2
+
+    def time(self, function):
+        '''Returns a dictionary with the timings of the function per call.'''
+        number = self.calibrate(function)
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            timings.append((time.perf_counter() - start) / number)
+        timings.sort()
+        return {'min': timings[0], 'median': timings[len(timings) // 2],
+                'max': timings[-1], 'number': number, 'repeat': self.repeat}
+
+    def run(self, pattern=None, log=None):
+        '''Runs the benchmarks whose names contain pattern (or all, if None).
+
+        Args:
+            pattern: a substring to select benchmarks by name.
+            log: a function called with each (name, timings) as they are measured.
+        Returns:
+            a dictionary ready to be stored as JSON by save().'''
+        results = OrderedDict()
+        for name, setup in self.benchmarks.items():
+            if pattern is not None and pattern not in name:
+                continue
+            results[name] = self.time(setup())
+            if log is not None:
+                log(name, results[name])
+        return {'environment': {'python': platform.python_version(),
+                                'implementation': platform.python_implementation(),
+                                'machine': platform.machine()},
+                'results': results}
+
+def save(results, stream):
+    '''Writes the results as JSON with sorted keys, so they can be compared with diff.'''
+    json.dump(results, stream, sort_keys=True, indent=2)
+    stream.write('\n')
+
+def load(stream):
+    return json.load(stream)
+
+def compare(results, baseline, threshold=0.1, thresholds=None):
+    '''Compares the results against a baseline.
+
+    Args:
+        results, baseline: dictionaries returned by Suite.run() or load().
+        threshold: the relative slowdown of the minimum time per call above
+                   which a benchmark regresses (e.g. 0.1 for 10%).
+        thresholds: a dictionary of benchmark names to thresholds that override
+                    the default threshold.
+    Returns:
+        a list of (name, baseline time, current time, ratio, regressed) of the
+        benchmarks found in both results, where ratio is current / baseline.'''
+    thresholds = thresholds or {}
+    comparison = []
+    for name, timings in results['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['min']
+        after = timings['min']
+        ratio = after / before if before > 0.0 else float('inf')
+        limit = 1.0 + thresholds.get(name, threshold)
+        comparison.append((name, before, after, ratio, ratio > limit))
+    return comparison
+
+def format_time(seconds):
+    '''Returns the time in seconds as a string with units.'''
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '%.3f %s' % (seconds / scale, unit)
+    return '%.1f ns' % (seconds / 1e-9)
@@ -0,0 +1,76 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+import logging
+
+from fl.benchmark.suite import Suite, format_time
+from fl.example import Example
+from fl.term import Triangle
+from fl.trace import tracer, Collector
+
+def process(fe):
+    energy = fe.input['Energy']
+    health = fe.output['Health']
+    def function():
+        for i in range(21):
+            energy.input = 0.1 * i
+            fe.process()
+            health.defuzzify()
+    return function
+
+def eager(fe):
+    '''Emulates the debug logging done before tracing: every fired rule formatted 
+    its consequent, every appended term and every defuzzification formatted a 
+    message, and every term created its own logger.'''
+    energy = fe.input['Energy']
+    health = fe.output['Health']
+    logger = logging.getLogger('eager')
+    ruleblock = fe.ruleblock[None]
+    def function():
+        for i in range(21):
+            energy.input = 0.1 * i
+            health.output.clear()
+            logger.debug('clearing output')
+            for rule in ruleblock:
+                strength = rule.firing_strength(ruleblock.tnorm, ruleblock.snorm)
+                if strength > 0.0:
+                    logger.debug('Firing at %s Rule: %s' % (strength, rule.consequent))
+                    for proposition in rule.consequent.propositions:
+                        logging.getLogger('Output')
+                        logger.debug('appending term: %s' % proposition.term)
+                    rule.fire(strength, ruleblock.activation)
+            x = health.defuzzify()
+            logger.debug('centroid at (%f, %f)' % (x, 0.0))
+    return function
+
+def construct():
+    return lambda: Triangle('LOW', 0.0, 0.5, 1.0)
+
+def construct_eager():
+    def function():
+        term = Triangle('LOW', 0.0, 0.5, 1.0)
+        term.eager_logger = logging.getLogger(type(term).__name__)
+        return term
+    return function
+
+if __name__ == '__main__':
+    suite = Suite()
+    suite.add('process.disabled', lambda: process(Example.simple_mamdani()))
+    suite.add('process.eager_logging', lambda: eager(Example.simple_mamdani()))
+    suite.add('term.construct', construct)
+    suite.add('term.construct.eager_logger', construct_eager)
+    results = suite.run()['results']
+    collector = Collector()
+    tracer.enable(sink=collector)
+    try:
+        enabled = Suite()
+        enabled.add('process.enabled', lambda: process(Example.simple_mamdani()))
+        results.update(enabled.run()['results'])
+    finally:
+        tracer.disable()
+    for name, timings in results.items():
+        print('%-32s %12s' % (name, format_time(timings['min'])))
+    print('%i events collected while enabled' % len(collector))
@@ -0,0 +1,153 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from fl.plan import Plan
+from fl.variable import numeric
+
+def flat(buffer):
+    '''Returns a one-dimensional view of the buffer without copying it.
+
+    Args:
+        buffer: any object indexable by position, such as an array.array, a list,
+                a memoryview, or a C-contiguous NumPy array of any shape.
+    Raises:
+        ValueError: if the buffer is multidimensional but not C-contiguous, in
+                    which case a flat view would be a copy.'''
+    if isinstance(buffer, memoryview):
+        if buffer.ndim > 1:
+            if not buffer.c_contiguous:
+                raise ValueError('expected a C-contiguous buffer')
+            buffer = buffer.cast('B').cast(buffer.format)
+        return buffer
+    if getattr(buffer, 'ndim', 1) > 1: #e.g., a NumPy array, without importing NumPy
+        if not buffer.flags.c_contiguous:
+            raise ValueError('expected a C-contiguous buffer')
+        return buffer.reshape(-1)
+    return buffer
+
+class Binding(object):
+    '''Binds the variables of an engine to positions in caller-provided buffers.
+
+    The inputs are read from and the outputs are written to flat buffers of rows,
+    where each row holds one value per name of the layout. The position of the
+    variable of every proposition is resolved once, so process() evaluates the
+    Plan straight from the buffer without assigning the inputs of the variables
+    or looking them up by name.
+
+    Attributes:
+        engine: the engine evaluated.
+        inputs: the flat buffer of rows of inputs.
+        outputs: the flat buffer of rows of outputs, where an output without
+                 default is written as nan if no rule concluding it fires.
+        input_layout: the names of the input variables in each row of inputs,
+                      where None skips a position.
+        output_layout: the names of the output variables in each row of outputs,
+                       where None skips a position.
+        plan: the Plan of the engine.
+    '''
+
+    def __init__(self, engine, inputs, outputs, input_layout=None, output_layout=None):
+        self.engine = engine
+        self.inputs = flat(inputs)
+        self.outputs = flat(outputs)
+        self.input_layout = list(input_layout if input_layout is not None else engine.input)
+        self.output_layout = list(output_layout if output_layout is not None
+                                  else engine.output)
+        for names, variables in ((self.input_layout, engine.input),
+                                 (self.output_layout, engine.output)):
+            unknown = [name for name in names if name is not None and name not in variables]
+            if unknown:
+                raise ValueError('unknown variables %s' % unknown)
+        missing = [name for name in engine.input if name not in self.input_layout]
+        if missing:
+            raise ValueError('input variables %s not bound' % missing)
+        self.compile()
+
+    def compile(self):
+        '''Resolves the positions of the variables, which must be done again
+        whenever the rules of the engine change.'''
+        engine = self.engine
+        plan = engine.plan if engine.plan is not None else Plan(engine)
+        self.plan = plan
+        position = {name: i for i, name in enumerate(self.input_layout) if name is not None}
+        self.propositions = [(index, position[variable.name], term, hedges)
+                             for index, variable, term, hedges in plan.propositions]
+        self.fams = [(table, [position[variable.name] for variable in table.variables])
+                     for table in plan.fams]
+        self.targets = [(i, engine.output[name])
+                        for i, name in enumerate(self.output_layout) if name is not None]
+        self.variables = list(engine.output.values())
+
+    def rows(self):
+        '''Returns the number of complete rows in both buffers.'''
+        return min(len(self.inputs) // len(self.input_layout),
+                   len(self.outputs) // len(self.output_layout))
+
+    def process(self, row=0):
+        '''Evaluates the engine on the given row of inputs and writes its row of outputs.'''
+        inputs = self.inputs
+        offset = row * len(self.input_layout)
+        values = self.plan.values
+        for index, position, term, hedges in self.propositions:
+            mu = term.membership(inputs[offset + position]) if term is not None else 0.0
+            for hedge in hedges:
+                mu = hedge.apply(mu)
+            values[index] = mu
+        self.plan.combine()
+        strengths = [table.strengths(table.memberships(
+                     [inputs[offset + position] for position in positions]))
+                     for table, positions in self.fams]
+        self.write(row, values, strengths)
+
+    def write(self, row, values, strengths, column=None):
+        outputs = self.outputs
+        offset = row * len(self.output_layout)
+        #every rule fires, so the outputs out of the layout are cleared too
+        for variable in self.variables:
+            variable.output.clear()
+        self.plan.fire_rules(values, strengths, column)
+        for position, variable in self.targets:
+            outputs[offset + position] = numeric(variable.defuzzify())
+
+    def process_batch(self, start=0, count=None):
+        '''Evaluates the engine on count rows (or all of the rows) from start, with
+        the memberships and firing strengths computed column-wise.'''
+        if count is None:
+            count = self.rows() - start
+        stride = len(self.input_layout)
+        begin = start * stride
+        end = (start + count) * stride
+        columns = {name: self.inputs[begin + i:end:stride]
+                   for i, name in enumerate(self.input_layout) if name is not None}
+        values = self.plan.evaluate_batch(columns)
+        strengths = [table.strengths_batch(columns) for table, _ in self.fams]
+        for i in range(count):
+            self.write(start + i, values, strengths, i)
+
+if __name__ == '__main__':
+    import array, os, sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    from fl.backend import create
+    fe = simple_ai_boat()
+    rows = [(relative, location) for location in range(0, 2001, 100)
+            for relative in range(-100, 101, 20)]
+    expected = create('reference', fe).process_batch(rows)
+    #location first, and a padding column, to exercise the layout
+    inputs = array.array('d', [x for relative, location in rows
+                               for x in (location, relative, -1.0)])
+    for compile in (False, True):
+        if compile: fe.compile(fam=True)
+        outputs = memoryview(bytearray(8 * len(rows))).cast('d')
+        binding = Binding(fe, inputs, outputs, ['location', 'relative_location', None])
+        for row in range(len(rows)):
+            binding.process(row)
+        single = outputs.tolist()
+        binding.process_batch()
+        for row, a, b, c in zip(rows, single, outputs.tolist(), expected):
+            if not all(x == c[0] or (x != x and c[0] != c[0]) for x in (a, b)):
+                raise AssertionError('DIFFERENT results at %s: %s, %s != %s' % (row, a, b, c))
+    print('Binding is just FINE :)')
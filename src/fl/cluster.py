@@ -0,0 +1,365 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Scoring across hosts: workers listen on TCP and evaluate chunks of rows sent by a
+coordinator, which shards a batch among them.
+
+Every message is a frame of a kind of four bytes and the length of the payload
+(network byte order), followed by the payload:
+
+    HAVE digest            -> OKAY if the worker knows the engine, or MISS
+    LOAD fcl               -> OKAY digest
+    BACK name              -> OKAY, and the connection evaluates with that backend
+    ROWS digest id count values -> OUTS id count values
+    any invalid request    -> FAIL message, also if evaluating the engine fails
+
+where digest is the SHA-256 of the FCL of the engine, id and count are unsigned
+integers of four bytes, and values are count rows of little-endian doubles, in the
+order of the input (or output) variables of the engine.
+'''
+
+import array
+import hashlib
+import itertools
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+
+from fl import backend
+from fl.fcl import FCLImporter
+from fl.variable import numeric
+
+HEADER = struct.Struct('!4sI')
+CHUNK = struct.Struct('!II')
+
+def digest(fcl):
+    '''Returns the SHA-256 of the FCL, which identifies an engine among workers.'''
+    return hashlib.sha256(fcl.encode('utf-8')).digest()
+
+def send(connection, kind, payload=b''):
+    connection.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+def receive_exactly(connection, size):
+    data = bytearray()
+    while len(data) < size:
+        block = connection.recv(min(size - len(data), 1 << 20))
+        if not block:
+            raise ConnectionError('connection closed by the peer')
+        data += block
+    return bytes(data)
+
+def receive(connection):
+    '''Returns the (kind, payload) of the next frame.'''
+    kind, size = HEADER.unpack(receive_exactly(connection, HEADER.size))
+    return kind, receive_exactly(connection, size)
+
+def pack(rows):
+    '''Returns the rows of floats as little-endian doubles (see numeric).'''
+    values = array.array('d', [numeric(x) for row in rows for x in row])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+def unpack(data, count, columns):
+    '''Returns the count rows of columns doubles packed in the data.'''
+    if len(data) != 8 * count * columns:
+        raise ValueError('expected %i rows of %i values, but found %i bytes'
+                         % (count, columns, len(data)))
+    values = array.array('d')
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return [values[i:i + columns].tolist() for i in range(0, len(values), columns)]
+
+class Handler(socketserver.BaseRequestHandler):
+    '''Serves the requests of one connection, with its own backend per engine.
+
+    Attributes:
+        backend: the name of the backend of the connection, that of the worker
+                 unless the coordinator sends another.
+    '''
+
+    def handle(self):
+        self.backend = self.server.backend
+        backends = {}
+        while True:
+            try:
+                kind, payload = receive(self.request)
+            except ConnectionError:
+                return
+            try:
+                kind, payload = self.respond(kind, payload, backends)
+            except Exception as error:
+                #the engine or the request is wrong, which the coordinator must not
+                #mistake for a failure of the connection
+                kind, payload = b'FAIL', ('%s: %s' % (error.__class__.__name__,
+                                                      error)).encode('utf-8')
+            send(self.request, kind, payload)
+
+    def respond(self, kind, payload, backends):
+        engines = self.server.engines
+        if kind == b'HAVE':
+            return (b'OKAY' if payload in engines else b'MISS'), b''
+        if kind == b'LOAD':
+            fcl = payload.decode('utf-8')
+            FCLImporter().engine(fcl) #validates the engine before keeping it
+            key = digest(fcl)
+            engines[key] = fcl
+            return b'OKAY', key
+        if kind == b'BACK':
+            name = payload.decode('utf-8')
+            if name not in backend.backends:
+                raise ValueError('unknown backend <%s>, only %s are available'
+                                 % (name, list(backend.backends)))
+            if name != self.backend:
+                self.backend = name
+                backends.clear()
+            return b'OKAY', b''
+        if kind == b'ROWS':
+            key = payload[:32]
+            if key not in backends:
+                if key not in engines:
+                    raise ValueError('unknown engine, expected LOAD first')
+                backends[key] = backend.create(self.backend,
+                                               FCLImporter().engine(engines[key]))
+            instance = backends[key]
+            index, count = CHUNK.unpack_from(payload, 32)
+            rows = unpack(payload[32 + CHUNK.size:], count, len(instance.engine.input))
+            outputs = instance.process_batch(rows)
+            return b'OUTS', CHUNK.pack(index, count) + pack(outputs)
+        raise ValueError('unknown request <%s>' % kind.decode('ascii', 'replace'))
+
+class Worker(socketserver.ThreadingTCPServer):
+    '''A TCP server evaluating the chunks of rows sent by coordinators.
+
+    Each connection is served by its own thread and backend, so the engines are
+    never evaluated concurrently. The engines are kept by digest for the lifetime
+    of the worker, so coordinators only send each engine once.
+
+    Attributes:
+        backend: the name of the backend to evaluate the engines.
+        engines: a dictionary of digest to the FCL of each engine loaded.
+    '''
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0), backend='plan'):
+        socketserver.ThreadingTCPServer.__init__(self, address, Handler)
+        self.backend = backend
+        self.engines = {}
+
+class Coordinator(object):
+    '''Shards batches of rows among workers, and returns the outputs in order.
+
+    Chunks are taken from a shared queue by one thread per connection, so faster
+    workers take more chunks. A chunk whose connection fails or times out is put
+    back in the queue, up to retries times, and a connection that fails retries
+    times in a row is abandoned. A worker responding FAIL is an error of the
+    request, which is raised rather than retried.
+
+    Attributes:
+        addresses: the list of (host, port) of the workers.
+        fcl: the FCL of the engine, sent to the workers that do not have it.
+        digest: the SHA-256 of the FCL.
+        columns: the numbers of input and output variables of the engine.
+        connections: the number of connections per worker, such that a worker
+                     evaluates a chunk while the next one is in transit.
+        retries: the number of times a chunk (or a connection) is retried.
+        timeout: the seconds to wait for each response.
+        backend: the name of the backend the workers evaluate with, or None for
+                 that of each worker.
+        counters: a dictionary with the numbers of chunks sent and retried, and
+                  of connections abandoned.
+    '''
+
+    def __init__(self, addresses, fcl, connections=2, retries=3, timeout=60.0,
+                 backend=None):
+        self.addresses = [parse_address(address) if isinstance(address, str) else address
+                          for address in addresses]
+        if not self.addresses:
+            raise ValueError('expected at least one worker')
+        self.fcl = fcl
+        self.digest = digest(fcl)
+        fe = FCLImporter().engine(fcl)
+        self.columns = (len(fe.input), len(fe.output))
+        self.connections = connections
+        self.retries = retries
+        self.timeout = timeout
+        self.backend = backend
+        self.counters = {'sent': 0, 'retried': 0, 'abandoned': 0}
+
+    def connect(self, address):
+        '''Returns a connection to the worker, after making sure it has the engine.'''
+        connection = socket.create_connection(address, self.timeout)
+        try:
+            send(connection, b'HAVE', self.digest)
+            kind, _ = receive(connection)
+            if kind == b'MISS':
+                send(connection, b'LOAD', self.fcl.encode('utf-8'))
+                kind, payload = receive(connection)
+                if kind == b'FAIL':
+                    raise ValueError(payload.decode('utf-8'))
+            if self.backend is not None:
+                send(connection, b'BACK', self.backend.encode('utf-8'))
+                kind, payload = receive(connection)
+                if kind == b'FAIL':
+                    raise ValueError(payload.decode('utf-8'))
+            return connection
+        except:
+            connection.close()
+            raise
+
+    def request(self, connection, index, rows):
+        send(connection, b'ROWS', self.digest + CHUNK.pack(index, len(rows)) + pack(rows))
+        kind, payload = receive(connection)
+        if kind == b'FAIL':
+            raise ValueError(payload.decode('utf-8'))
+        if kind != b'OUTS' or CHUNK.unpack_from(payload)[0] != index:
+            raise ConnectionError('unexpected response <%s>' % kind.decode('ascii', 'replace'))
+        return unpack(payload[CHUNK.size:], len(rows), self.columns[1])
+
+    def work(self, address, tasks, results, condition, alive):
+        connection = None
+        failures = 0
+        try:
+            while True:
+                task = tasks.get()
+                if task is None:
+                    return
+                index, rows, attempts = task
+                try:
+                    if connection is None:
+                        connection = self.connect(address)
+                    outputs = self.request(connection, index, rows)
+                except OSError as error:
+                    if connection is not None:
+                        connection.close()
+                        connection = None
+                    failures += 1
+                    with condition:
+                        if attempts < self.retries:
+                            self.counters['retried'] += 1
+                            tasks.put((index, rows, attempts + 1))
+                        else:
+                            results[index] = ConnectionError(
+                                'chunk %i failed %i times, last on %s:%i: %s'
+                                % ((index, attempts + 1) + address + (error,)))
+                        condition.notify_all()
+                    if failures > self.retries:
+                        return
+                    continue
+                except ValueError as error:
+                    outputs = ValueError('worker %s:%i: %s' % (address + (error,)))
+                failures = 0
+                with condition:
+                    results[index] = outputs
+                    self.counters['sent'] += 1
+                    condition.notify_all()
+        finally:
+            if connection is not None:
+                connection.close()
+            with condition:
+                alive[0] -= 1
+                if failures > self.retries:
+                    self.counters['abandoned'] += 1
+                condition.notify_all()
+
+    def evaluate(self, chunks):
+        '''Yields the outputs of each chunk of rows, in order, with at most two
+        chunks per connection in flight such that memory does not grow with the
+        size of the input.
+
+        Raises:
+            ConnectionError: if a chunk failed too many times, or every connection
+                             was abandoned.
+            ValueError: if a worker rejected a request.'''
+        tasks = queue.Queue()
+        results = {}
+        condition = threading.Condition()
+        alive = [len(self.addresses) * self.connections] #threads not returned yet
+        threads = [threading.Thread(target=self.work, args=(address, tasks, results,
+                                                            condition, alive), daemon=True)
+                   for address in self.addresses for _ in range(self.connections)]
+        for thread in threads:
+            thread.start()
+        limit = 2 * len(threads)
+        submitted = 0
+        try:
+            chunks = iter(chunks)
+            exhausted = False
+            for position in itertools.count():
+                while not exhausted and submitted - position < limit:
+                    rows = next(chunks, None)
+                    if rows is None:
+                        exhausted = True
+                    else:
+                        tasks.put((submitted, rows, 0))
+                        submitted += 1
+                if position >= submitted:
+                    return
+                with condition:
+                    while position not in results:
+                        if alive[0] == 0:
+                            raise ConnectionError('every connection to the workers '
+                                                  'was abandoned')
+                        condition.wait()
+                    outputs = results.pop(position)
+                if isinstance(outputs, Exception):
+                    raise outputs
+                yield outputs
+        finally:
+            for _ in threads:
+                tasks.put(None)
+
+    def process_batch(self, rows, size=1000):
+        '''Returns the list of outputs for each row of inputs, in chunks of size rows.'''
+        result = []
+        for outputs in self.evaluate(rows[i:i + size] for i in range(0, len(rows), size)):
+            result.extend(outputs)
+        return result
+
+def parse_address(text):
+    '''Returns the (host, port) of an address <host:port>.'''
+    host, _, port = text.rpartition(':')
+    try:
+        return (host or '127.0.0.1', int(port))
+    except ValueError:
+        raise ValueError('expected an address as <host:port>, but found <%s>' % text)
+
+if __name__ == '__main__':
+    import os
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    from fl.fcl import FCLExporter
+    fcl = FCLExporter().engine(simple_ai_boat())
+    workers = [Worker() for _ in range(3)]
+    for worker in workers:
+        threading.Thread(target=worker.serve_forever, daemon=True).start()
+    addresses = [worker.server_address for worker in workers]
+    rows = [[relative, location] for location in range(0, 2001, 10)
+            for relative in range(-100, 101, 10)]
+    expected = backend.create('plan', FCLImporter().engine(fcl)).process_batch(rows)
+    coordinator = Coordinator(addresses + [('127.0.0.1', 1)], fcl, retries=2, timeout=5.0)
+    results = coordinator.process_batch(rows, 97)
+    for row, a, b in zip(rows, results, expected):
+        if not all(x == y or (x != x and y != y) for x, y in zip(a, b)):
+            raise AssertionError('DIFFERENT results at %s: %s != %s' % (row, a, b))
+    if len(results) != len(rows):
+        raise AssertionError('MISSING results: %i != %i' % (len(results), len(rows)))
+    print(coordinator.counters)
+    #without DEFAULT, the outputs where no rule fires are None, sent as nan
+    fcl = fcl.replace('DEFAULT : nan;\n', '').replace(
+        'TERM FAR_BEHIND := LeftShoulder (-85.0, -60.0);', 'TERM FAR_BEHIND := Triangle '
+        '(-110.0, -85.0, -60.0);')
+    results = Coordinator(addresses, fcl, retries=0).process_batch([[-150.0, 1000.0]] + rows)
+    if results[0][0] == results[0][0] or len(results) != len(rows) + 1:
+        raise AssertionError('DIFFERENT output where no rule fires: %s' % results[0])
+    for worker in workers:
+        worker.shutdown()
+        worker.server_close()
+    print('Cluster is just FINE :)')
@@ -0,0 +1,305 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from array import array
+
+from fl.mamdani import MamdaniRule, MamdaniAntecedent, MamdaniConsequent
+from fl.rule import Rule
+from fl.ruleblock import RuleBlock
+from fl.term import Output
+from fl.trace import tracer
+
+class CompactRuleBlock(RuleBlock):
+    '''A ruleblock that stores its rules as arrays of integers instead of objects.
+
+    The antecedent of each rule is stored as a postfix program of codes, where a
+    non-negative code is the index of a unique proposition (variable, term and
+    chain of hedges) and a negative code is an operator (AND or OR). The
+    consequents are stored as parallel arrays of output variable, term, chain of
+    hedges and weight. Variables and terms are identified by their position in
+    the engine, and chains of hedges by their position in a table of chains.
+
+    Rules are appended as objects, which are encoded and not kept, and the rules
+    are fired straight from the arrays. Rule objects are only materialized when
+    accessed by index or iteration, e.g. to display or export them, and changes
+    to them are not stored back. Hence, the ruleblock only supports appending
+    rules, and building a Plan on it materializes every rule.
+
+    Attributes:
+        engine: the engine whose variables the rules refer to.
+        codes: the postfix codes of the antecedents of all the rules.
+        starts: the offset in codes of the antecedent of each rule, plus the end.
+        propositions: the (variable, term, chain) of each unique proposition, as
+                      three arrays.
+        consequents: the offset in the consequent arrays of each rule, plus the end.
+        outputs, terms, chains, weights: the output variable, term, chain of hedges
+                                         and weight of each consequent proposition.
+        hedges: the list of unique chains of hedges, where the first is empty.
+        pool: the Outputs appended by fire_rules(), reused by the next call.
+    '''
+
+    AND = -1
+    OR = -2
+
+    def __init__(self, engine, name=None):
+        RuleBlock.__init__(self, name)
+        self.engine = engine
+        self.codes = array('i')
+        self.starts = array('q', [0])
+        self.propositions = (array('i'), array('i'), array('i'))
+        self.consequents = array('q', [0])
+        self.outputs = array('i')
+        self.terms = array('i')
+        self.chains = array('i')
+        self.weights = array('d')
+        self.hedges = [()]
+        self._propositions = {}
+        self._hedges = {(): 0}
+        self.values = []
+        self.pool = []
+        self.fired = 0
+        self.evaluated = 0
+        self.index()
+
+    def index(self):
+        '''Indexes the variables and terms of the engine, which must be done again
+        if they change (see configure).'''
+        self.inputs = list(self.engine.input.values())
+        self.input_terms = [list(variable) for variable in self.inputs]
+        self.output_variables = list(self.engine.output.values())
+        self.output_terms = [list(variable) for variable in self.output_variables]
+        #the positions by identity, to encode rules without scanning the lists
+        self._inputs = {id(variable): i for i, variable in enumerate(self.inputs)}
+        self._input_terms = [{id(term): i for i, term in enumerate(terms)}
+                             for terms in self.input_terms]
+        self._output_variables = {id(variable): i
+                                  for i, variable in enumerate(self.output_variables)}
+        self._output_terms = [{id(term): i for i, term in enumerate(terms)}
+                              for terms in self.output_terms]
+
+    def configure(self, fop):
+        RuleBlock.configure(self, fop)
+        self.index()
+
+    def chain(self, hedges):
+        key = tuple(hedges)
+        if key not in self._hedges:
+            self._hedges[key] = len(self.hedges)
+            self.hedges.append(key)
+        return self._hedges[key]
+
+    def encode(self, node, codes):
+        '''Appends to codes the postfix program of the tree rooted at node, with each
+        proposition as its key (variable, term, hedges) yet to be interned.'''
+        if isinstance(node, MamdaniAntecedent.Proposition):
+            try:
+                variable = self._inputs[id(node.variable)]
+                term = (self._input_terms[variable][id(node.term)]
+                        if node.term is not None else -1)
+            except KeyError:
+                raise ValueError('proposition <%s> refers to an unknown variable or term'
+                                 % node)
+            codes.append((variable, term, tuple(node.hedges)))
+        elif isinstance(node, MamdaniAntecedent.Operator):
+            self.encode(node.left, codes)
+            self.encode(node.right, codes)
+            if node.operator == Rule.FR_AND: codes.append(self.AND)
+            elif node.operator == Rule.FR_OR: codes.append(self.OR)
+            else: raise ValueError('unknown operator %s' % node.operator)
+        else: raise TypeError('unexpected node type %s' % type(node))
+
+    def intern(self, key):
+        '''Returns the index of the proposition of the key, adding it if new.'''
+        variable, term, hedges = key
+        key = (variable, term, self.chain(hedges))
+        if key not in self._propositions:
+            self._propositions[key] = len(self._propositions)
+            for column, value in zip(self.propositions, key):
+                column.append(value)
+        return self._propositions[key]
+
+    def append(self, rule):
+        '''Encodes the rule into the arrays, which are left unchanged if any of its
+        variables or terms is unknown.'''
+        codes = []
+        self.encode(rule.antecedent.root, codes)
+        consequents = []
+        for proposition in rule.consequent.propositions:
+            try:
+                variable = self._output_variables[id(proposition.variable)]
+                term = self._output_terms[variable][id(proposition.term)]
+            except KeyError:
+                raise ValueError('rule <%s> concludes an unknown output variable or term'
+                                 % rule)
+            consequents.append((variable, term, tuple(proposition.hedges),
+                                proposition.weight))
+        #the rule is resolved, so the parallel arrays are extended together
+        self.codes.extend(code if isinstance(code, int) else self.intern(code)
+                          for code in codes)
+        self.starts.append(len(self.codes))
+        for variable, term, hedges, weight in consequents:
+            self.outputs.append(variable)
+            self.terms.append(term)
+            self.chains.append(self.chain(hedges))
+            self.weights.append(weight)
+        self.consequents.append(len(self.outputs))
+
+    def extend(self, rules):
+        for rule in rules:
+            self.append(rule)
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def rule(self, index):
+        '''Returns a new rule object with the rule at the given index.'''
+        stack = []
+        for i in range(self.starts[index], self.starts[index + 1]):
+            code = self.codes[i]
+            if code >= 0:
+                node = MamdaniAntecedent.Proposition()
+                variable = self.propositions[0][code]
+                term = self.propositions[1][code]
+                node.variable = self.inputs[variable]
+                node.term = self.input_terms[variable][term] if term >= 0 else None
+                node.hedges = list(self.hedges[self.propositions[2][code]])
+            else:
+                node = MamdaniAntecedent.Operator(Rule.FR_AND if code == self.AND
+                                                  else Rule.FR_OR)
+                node.right = stack.pop()
+                node.left = stack.pop()
+            stack.append(node)
+        result = MamdaniRule()
+        result.antecedent = MamdaniAntecedent()
+        result.antecedent.root = stack.pop()
+        result.consequent = MamdaniConsequent()
+        for i in range(self.consequents[index], self.consequents[index + 1]):
+            proposition = MamdaniConsequent.Proposition()
+            proposition.variable = self.output_variables[self.outputs[i]]
+            proposition.term = self.output_terms[self.outputs[i]][self.terms[i]]
+            proposition.hedges = list(self.hedges[self.chains[i]])
+            proposition.weight = self.weights[i]
+            result.consequent.propositions.append(proposition)
+        return result
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.rule(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('rule index out of range')
+        return self.rule(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.rule(i)
+
+    def _unsupported(self, *args, **kwargs):
+        raise TypeError('compact ruleblocks only support appending rules')
+
+    __setitem__ = __delitem__ = __iadd__ = insert = remove = pop = sort = reverse = \
+        clear = _unsupported
+
+    def memberships(self):
+        '''Returns the membership of every unique proposition to the current inputs.'''
+        values = self.values
+        del values[:]
+        variables, terms, chains = self.propositions
+        for variable, term, chain in zip(variables, terms, chains):
+            mu = (self.input_terms[variable][term].membership(self.inputs[variable].input)
+                  if term >= 0 else 0.0)
+            for hedge in self.hedges[chain]:
+                mu = hedge.apply(mu)
+            values.append(mu)
+        self.evaluated += len(values)
+        return values
+
+    def fire_rules(self):
+        if len(self) == 0:
+            raise ValueError('no rules to fire')
+        values = self.memberships()
+        self.fired = 0
+        codes, starts = self.codes, self.starts
+        tnorm, snorm, AND = self.tnorm, self.snorm, self.AND
+        stack = []
+        start = 0
+        for index in range(len(self)):
+            end = starts[index + 1]
+            for i in range(start, end):
+                code = codes[i]
+                if code >= 0:
+                    stack.append(values[code])
+                else:
+                    b = stack.pop()
+                    a = stack.pop()
+                    stack.append(tnorm(a, b) if code == AND else snorm(a, b))
+            start = end
+            strength = stack.pop()
+            if strength > 0.0:
+                self.fire(index, strength)
+
+    def fire(self, index, strength):
+        '''Appends the outputs of the consequent of the rule at the given index,
+        reusing the Outputs appended by previous calls to fire_rules().'''
+        pool = self.pool
+        if tracer.rule:
+            tracer.emit('rule', 'fired', strength=strength, rule=index, ruleblock=self.name)
+        for i in range(self.consequents[index], self.consequents[index + 1]):
+            variable = self.output_variables[self.outputs[i]]
+            term = self.output_terms[self.outputs[i]][self.terms[i]]
+            alphacut = strength * self.weights[i]
+            for hedge in self.hedges[self.chains[i]]:
+                alphacut = hedge.apply(alphacut)
+            if self.fired < len(pool):
+                output = pool[self.fired]
+                output.name = term.name
+                output.minimum = term.minimum
+                output.maximum = term.maximum
+                output.term = term
+            else:
+                output = Output(term)
+                pool.append(output)
+            self.fired += 1
+            output.alphacut = alphacut
+            output.activation = self.activation
+            variable.output.append(output)
+            if tracer.rule:
+                tracer.emit('rule', 'appended', variable=variable.name, term=term.name,
+                            alphacut=alphacut)
+
+    def profile(self, warmup=100):
+        '''Does nothing, as the postfix codes are evaluated without short-circuits.'''
+        pass
+
+    def statistics(self):
+        return {'evaluated': self.evaluated, 'skipped': 0, 'shortcircuits': 0}
+
+    def __repr__(self):
+        return 'CompactRuleBlock(%r, %i rules)' % (self.name, len(self))
+
+if __name__ == '__main__':
+    from fl.backend import create
+    from fl.fcl import FCLExporter, FCLImporter
+    from fl.generator import Generator
+    generator = Generator(inputs=3, terms=5, rules=300, depth=3, disjunction=0.3)
+    fe = generator.engine()
+    fcl = FCLExporter().engine(fe)
+    compact = FCLImporter(compact=True).engine(fcl)
+    if FCLExporter().engine(compact) != fcl:
+        raise AssertionError('DIFFERENT FCL from compact rules')
+    rows = generator.rows(200)
+    for a, b, row in zip(create('reference', fe).process_batch(rows),
+                         create('reference', compact).process_batch(rows), rows):
+        if not all(x == y or (x != x and y != y) for x, y in zip(a, b)):
+            raise AssertionError('DIFFERENT results at %s: %s != %s' % (row, a, b))
+    ruleblock = list(compact.ruleblock.values())[0]
+    print('%r with %i unique propositions and %i codes'
+          % (ruleblock, len(ruleblock.propositions[0]), len(ruleblock.codes)))
+    print('Compact rules are just FINE :)')
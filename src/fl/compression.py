@@ -0,0 +1,225 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from collections import OrderedDict
+
+from fl.mamdani import MamdaniRule, MamdaniAntecedent
+from fl.operator import FuzzyOr, FuzzyActivation, FuzzyAccumulation
+from fl.rule import Rule
+from fl.ruleblock import RuleBlock
+
+class Analysis(object):
+    '''The redundancy found in a ruleblock.
+
+    Attributes:
+        ruleblock: the ruleblock analysed.
+        duplicates: a list of [rule, duplicate, ...] with identical antecedent and consequent.
+        contradictions: a list of [rule, rule, ...] with identical antecedent but
+                        different terms for the same output variable.
+        mergeable: a list of [rule, rule, ...] with identical consequent that can be
+                   merged into a single rule whose antecedent disjoins theirs.
+        rules_before, rules_after: the number of rules before and after compression.
+        cost_before, cost_after: the number of propositions and operators evaluated,
+                                 plus the number of outputs fired, before and after
+                                 compression.
+    '''
+
+    def __init__(self, ruleblock):
+        self.ruleblock = ruleblock
+        self.duplicates = []
+        self.contradictions = []
+        self.mergeable = []
+        self.rules_before = self.rules_after = len(ruleblock)
+        self.cost_before = self.cost_after = sum(Compressor.cost(rule) for rule in ruleblock)
+
+    def __str__(self):
+        result = ['RuleBlock %s' % self.ruleblock.name]
+        result.append('rules: %i -> %i' % (self.rules_before, self.rules_after))
+        result.append('cost: %i -> %i' % (self.cost_before, self.cost_after))
+        for group in self.duplicates:
+            result.append('duplicate: %s (x%i)' % (group[0], len(group)))
+        for group in self.contradictions:
+            result.append('contradiction: %s' % ' | '.join(str(rule) for rule in group))
+        for group in self.mergeable:
+            result.append('mergeable: %s' % ' | '.join(str(rule) for rule in group))
+        return '\n'.join(result)
+
+
+class Compressor(object):
+    '''Finds and removes redundant rules in the ruleblocks of an engine.
+
+    Rules are grouped by hashing a canonical form of their antecedents and
+    consequents, so the analysis takes linear time in the number of rules.
+    The canonical form sorts the operands of commutative operators and flattens
+    chains of the same operator, so 'A and B' and 'B and A' are the same antecedent.
+
+    The rule base is only rewritten where the operators guarantee the same outputs:
+        - duplicates are removed if the accumulation is idempotent (i.e. Max).
+        - rules with the same consequent are merged into 'if A or B then C' if,
+          in addition, the snorm is Max, the activation is monotonic, and the
+          consequent has non-negative weights and non-decreasing hedges.
+    Contradictions are reported but never rewritten.
+    '''
+
+    monotonic_hedges = ('very', 'somewhat', 'any')
+
+    @staticmethod
+    def cost(rule):
+        '''Returns the number of nodes evaluated and outputs fired by the rule.'''
+        def nodes(node):
+            if isinstance(node, MamdaniAntecedent.Operator):
+                return 1 + nodes(node.left) + nodes(node.right)
+            return 1
+        return nodes(rule.antecedent.root) + len(rule.consequent.propositions)
+
+    @staticmethod
+    def antecedent_key(node):
+        '''Returns a canonical string of the antecedent tree rooted at node.'''
+        if isinstance(node, MamdaniAntecedent.Proposition):
+            return str(node)
+        operands = []
+        pending = [node.left, node.right]
+        while pending:
+            child = pending.pop()
+            if (isinstance(child, MamdaniAntecedent.Operator)
+                and child.operator == node.operator):
+                pending.extend((child.left, child.right))
+            else:
+                operands.append(Compressor.antecedent_key(child))
+        return '(%s %s)' % (node.operator, ' '.join(sorted(operands)))
+
+    @staticmethod
+    def consequent_key(consequent):
+        '''Returns a canonical string of the consequent.'''
+        return (' %s ' % Rule.FR_AND).join(sorted('%s is %s %s with %r' % (p.variable.name,
+                                  ' '.join(hedge.name for hedge in p.hedges),
+                                  p.term.name, p.weight)
+                                  for p in consequent.propositions))
+
+    def can_remove_duplicates(self, ruleblock, rule):
+        return all(p.variable.output.accumulation is FuzzyAccumulation.Max
+                   for p in rule.consequent.propositions)
+
+    def can_merge(self, ruleblock, rule):
+        if ruleblock.snorm is not FuzzyOr.Max:
+            return False
+        if ruleblock.activation not in (FuzzyActivation.Min, FuzzyActivation.Prod):
+            return False
+        for p in rule.consequent.propositions:
+            if p.weight < 0.0:
+                return False
+            if any(hedge.name not in self.monotonic_hedges for hedge in p.hedges):
+                return False
+        return self.can_remove_duplicates(ruleblock, rule)
+
+    def analyze(self, ruleblock):
+        '''Returns the Analysis of the ruleblock without modifying it.'''
+        analysis = Analysis(ruleblock)
+        by_antecedent = OrderedDict()
+        for rule in ruleblock:
+            key = self.antecedent_key(rule.antecedent.root)
+            by_antecedent.setdefault(key, OrderedDict()).setdefault(
+                    self.consequent_key(rule.consequent), []).append(rule)
+
+        by_consequent = OrderedDict()
+        for consequents in by_antecedent.values():
+            for key, rules in consequents.items():
+                if len(rules) > 1:
+                    analysis.duplicates.append(rules)
+                by_consequent.setdefault(key, []).append(rules[0])
+            targets = {}
+            for rules in consequents.values():
+                for p in rules[0].consequent.propositions:
+                    targets.setdefault(p.variable.name, set()).add(p.term.name)
+            if any(len(terms) > 1 for terms in targets.values()):
+                analysis.contradictions.append([rules[0] for rules in consequents.values()])
+
+        analysis.mergeable = [rules for rules in by_consequent.values() if len(rules) > 1]
+        return analysis
+
+    def compress(self, ruleblock):
+        '''Returns a tuple (RuleBlock, Analysis) where the RuleBlock is a
+        compressed copy of the given one.'''
+        analysis = self.analyze(ruleblock)
+        removed = set()
+        for group in analysis.duplicates:
+            if self.can_remove_duplicates(ruleblock, group[0]):
+                removed.update(id(rule) for rule in group[1:])
+        replacement = {}
+        for group in analysis.mergeable:
+            group = [rule for rule in group if id(rule) not in removed]
+            if len(group) < 2 or not self.can_merge(ruleblock, group[0]):
+                continue
+            replacement[id(group[0])] = self.merge(group)
+            removed.update(id(rule) for rule in group[1:])
+
+        result = RuleBlock(ruleblock.name)
+        result.tnorm = ruleblock.tnorm
+        result.snorm = ruleblock.snorm
+        result.activation = ruleblock.activation
+        for rule in ruleblock:
+            if id(rule) not in removed:
+                result.append(replacement.get(id(rule), rule))
+        analysis.rules_after = len(result)
+        analysis.cost_after = sum(self.cost(rule) for rule in result)
+        return result, analysis
+
+    def merge(self, rules):
+        '''Returns a rule whose antecedent disjoins the antecedents of the rules,
+        and whose consequent is that of the first rule.'''
+        merged = MamdaniRule()
+        merged.antecedent = MamdaniAntecedent()
+        merged.antecedent.root = rules[0].antecedent.root
+        for rule in rules[1:]:
+            node = MamdaniAntecedent.Operator(Rule.FR_OR)
+            node.left = merged.antecedent.root
+            node.right = rule.antecedent.root
+            merged.antecedent.root = node
+        merged.consequent = rules[0].consequent
+        return merged
+
+    def engine(self, fe):
+        '''Compresses every ruleblock of the engine in place.
+
+        Returns:
+            a list with the Analysis of each ruleblock.'''
+        result = []
+        for name in fe.ruleblock:
+            fe.ruleblock[name], analysis = self.compress(fe.ruleblock[name])
+            result.append(analysis)
+        if fe.plan is not None:
+            fe.compile()
+        return result
+
+
+if __name__ == '__main__':
+    import os, sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    fe = simple_ai_boat()
+    reference = simple_ai_boat()
+    ruleblock = fe.ruleblock[None]
+    ruleblock.append(MamdaniRule.parse(
+            'if relative_location is AHEAD and location is END then action is SPRINT', fe))
+    contradiction = RuleBlock('contradiction')
+    contradiction.append(ruleblock[-1])
+    contradiction.append(MamdaniRule.parse(
+            'if location is END and relative_location is AHEAD then action is AS_IS', fe))
+    print(Compressor().analyze(contradiction))
+    for analysis in Compressor().engine(fe):
+        print(analysis)
+    for location in range(0, 2001, 50):
+        for relative in range(-100, 101, 10):
+            for engine in (fe, reference):
+                engine.input['location'].input = location
+                engine.input['relative_location'].input = relative
+                engine.process()
+            a = fe.output['action'].defuzzify()
+            b = reference.output['action'].defuzzify()
+            if not (abs(a - b) < 1e-9 or (a != a and b != b)):
+                raise AssertionError('DIFFERENT results at (%s, %s): %s != %s'
+                                     % (location, relative, a, b))
+    print('Compressed engine is just FINE :)')
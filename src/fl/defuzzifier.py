@@ -3,13 +3,13 @@ Created on 10/10/2012
 
 @author: jcrada
 '''
-import logging
+from fl.operator import FuzzyAccumulation
+from fl.trace import tracer
 
 class Defuzzifier(object):
     
     def __init__(self, divisions=100):
         self.divisions = divisions
-        self._logger = logging.getLogger(__name__) 
     
     def __str__(self):
         acronym = []
@@ -23,24 +23,62 @@ class Defuzzifier(object):
 class CenterOfGravity(Defuzzifier):
     '''
     Defuzzifies a term according to the Center of Gravity
+    
+    If the terms are accumulated with FuzzyAccumulation.Sum and activated with
+    FuzzyActivation.Prod, the area and first moment of the accumulation are the
+    sums of those of the terms scaled by their alphacuts, so the centroid is 
+    computed from the closed form of the moments of each term (see Term.moments)
+    without discretizing. Otherwise, or if a term has no closed form, the term
+    is discretized in the given divisions.
+    
+    Attributes:
+        closed_form: whether to use the closed form where possible.
     '''
-    def __init__(self, divisions=100):
+    def __init__(self, divisions=100, closed_form=True):
         Defuzzifier.__init__(self, divisions)
+        self.closed_form = closed_form
+
+    def moments(self, term):
+        '''Returns the area and first moment of the accumulated term in closed form,
+        or None if the operators or any of the terms do not allow it.'''
+        if getattr(term, 'accumulation', None) is not FuzzyAccumulation.Sum:
+            return None
+        area = moment = 0.0
+        for output in term.terms:
+            result = output.moments(term.minimum, term.maximum)
+            if result is None:
+                return None
+            area += result[0]
+            moment += result[1]
+        return area, moment
 
     def defuzzify(self, term):
         '''Defuzzifies the term by computing the centroid of the term'''
+        moments = self.moments(term) if self.closed_form else None
+        if moments is not None:
+            area, moment = moments
+            if area == 0.0:
+                return float('nan')
+            if tracer.defuzzifier:
+                tracer.emit('defuzzifier', 'defuzzified', defuzzifier=self,
+                            x=moment / area, area=area)
+            return moment / area
         xcentroid = ycentroid = 0.0
         area = 0.0
         for x, y in term.discretize(self.divisions):
             xcentroid += y * x
             ycentroid += y * y
             area += y
+        if area == 0.0: #e.g., every output was activated with zero weight
+            return float('nan')
         xcentroid /= area
         ycentroid /= 2 * area
         dx = (term.maximum - term.minimum) / self.divisions
         area *= dx
         
-        self._logger.debug('centroid at (%f, %f)' % (xcentroid, ycentroid))
+        if tracer.defuzzifier:
+            tracer.emit('defuzzifier', 'defuzzified', defuzzifier=self,
+                        x=xcentroid, y=ycentroid)
         return xcentroid
     
     
@@ -60,7 +98,8 @@ class SmallestOfMaximum(Defuzzifier):
                 xsmallest = x
                 ymax = y
         
-        self._logger.debug('centroid at (%f, %f)' % (xsmallest, ymax))
+        if tracer.defuzzifier:
+            tracer.emit('defuzzifier', 'defuzzified', defuzzifier=self, x=xsmallest, y=ymax)
         return xsmallest
 
 class LargestOfMaximum(Defuzzifier):
@@ -78,7 +117,8 @@ class LargestOfMaximum(Defuzzifier):
                 xlargest = x
                 ymax = y
         
-        self._logger.debug('centroid at (%f, %f)' % (xlargest,ymax))
+        if tracer.defuzzifier:
+            tracer.emit('defuzzifier', 'defuzzified', defuzzifier=self, x=xlargest, y=ymax)
         return xlargest
 
 class MiddleOfMaximum(Defuzzifier):
@@ -95,7 +135,7 @@ class MiddleOfMaximum(Defuzzifier):
         same_plateau = False  
         for x, y in term.discretize(self.divisions):
             if y > ymax:
-                xsmallest = x
+                xsmallest = xlargest = x
                 ymax = y
                 same_plateau = True
             elif y == ymax and same_plateau:
@@ -103,13 +143,38 @@ class MiddleOfMaximum(Defuzzifier):
             elif y < ymax:
                 same_plateau = False
         
-        self._logger.debug('centroid at (%f, %f)' % ((xlargest + xsmallest) / 2.0, ymax))
+        if tracer.defuzzifier:
+            tracer.emit('defuzzifier', 'defuzzified', defuzzifier=self,
+                        x=(xlargest + xsmallest) / 2.0, y=ymax)
         return (xlargest + xsmallest) / 2.0
 #        return ((xlargest + xsmallest) / 2.0, ymax)
 
 if __name__ == '__main__':
     x = MiddleOfMaximum()
     print(x)
+    import os, sys, time
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    from fl.backend import create
+    from fl.engine import Operator
+    from fl.operator import FuzzyActivation
+    fe = simple_ai_boat()
+    rows = [[relative, location] for location in range(0, 2001, 100)
+            for relative in range(-100, 101, 20)]
+    results = {}
+    for divisions, closed_form in ((100, False), (10000, False), (100, True)):
+        fe.configure(Operator(activation=FuzzyActivation.Prod,
+                              accumulation=FuzzyAccumulation.Sum,
+                              defuzzifier=CenterOfGravity(divisions, closed_form)))
+        start = time.perf_counter()
+        results[closed_form, divisions] = create('plan', fe).process_batch(rows)
+        print('%-12s divisions=%-7i %.3f s' % ('closed form' if closed_form else 'discretized',
+              divisions, time.perf_counter() - start))
+    error = max(abs(a[0] - b[0]) for a, b in zip(results[True, 100], results[False, 10000])
+                if a[0] == a[0])
+    if error > 1e-6:
+        raise AssertionError('DIFFERENT centroids by %s' % error)
+    print('Closed form is just FINE :)')
     
     
     
@@ -0,0 +1,137 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from collections import OrderedDict
+
+from fl.mamdani import MamdaniAntecedent
+
+class Demand(object):
+    '''Evaluates output variables on demand, as Engine.evaluate().
+
+    Only the rules whose consequents conclude a requested output are fired, and
+    the defuzzified value of each output is cached along with the inputs of the
+    variables in the antecedents of its rules, until any of those inputs changes.
+    Outputs concluded by the fired rules but not requested are left cleared.
+    The parameters of the terms and the weights of the rules are not part of the
+    cache, so it must be invalidated whenever they change (ParameterSpace.set()
+    does so).
+
+    The dependencies are computed once, so the Demand must be rebuilt whenever
+    the rules, terms or operators of the engine change (see Engine.configure).
+
+    Attributes:
+        engine: the engine evaluated.
+        rules: an ordered dictionary of output variable name to the list of
+               (ruleblock, rule) concluding it, in the order of the engine.
+        inputs: an ordered dictionary of output variable name to the list of
+                input variables it depends on.
+        cache: a dictionary of output variable name to (inputs, value).
+        order: a dictionary of id of rule to its position in the engine.
+        counters: a dictionary with the number of hits, misses and rules fired.
+    '''
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.rules = OrderedDict((name, []) for name in engine.output)
+        self.inputs = OrderedDict((name, []) for name in engine.output)
+        self.order = {}
+        for ruleblock in engine.ruleblock.values():
+            for rule in ruleblock:
+                self.order[id(rule)] = len(self.order)
+                variables = self.variables(rule.antecedent.root)
+                for proposition in rule.consequent.propositions:
+                    name = proposition.variable.name
+                    if not self.rules[name] or self.rules[name][-1][1] is not rule:
+                        self.rules[name].append((ruleblock, rule))
+                    for variable in variables:
+                        if variable not in self.inputs[name]:
+                            self.inputs[name].append(variable)
+        self.cache = {}
+        self.counters = {'hits': 0, 'misses': 0, 'fired': 0}
+
+    def variables(self, node):
+        '''Returns the list of input variables in the propositions below the node.'''
+        if isinstance(node, MamdaniAntecedent.Proposition):
+            return [node.variable]
+        result = self.variables(node.left)
+        result.extend(variable for variable in self.variables(node.right)
+                      if variable not in result)
+        return result
+
+    def evaluate(self, names):
+        '''Returns an ordered dictionary of the values of the output variables.'''
+        result = OrderedDict()
+        stale = OrderedDict()
+        for name in names:
+            if name not in self.rules:
+                raise ValueError('unknown output variable <%s>' % name)
+            key = tuple(variable.input for variable in self.inputs[name])
+            cached = self.cache.get(name)
+            if cached is not None and cached[0] == key:
+                result[name] = cached[1]
+                self.counters['hits'] += 1
+            else:
+                result[name] = None
+                stale[name] = key
+        if not stale:
+            return result
+        self.counters['misses'] += len(stale)
+        fired = set()
+        rules = []
+        touched = OrderedDict()
+        for name in stale:
+            for ruleblock, rule in self.rules[name]:
+                if id(rule) not in fired:
+                    fired.add(id(rule))
+                    rules.append((ruleblock, rule))
+                    for proposition in rule.consequent.propositions:
+                        touched[proposition.variable.name] = proposition.variable
+            touched[name] = self.engine.output[name]
+        #fire in the order of the engine, such that accumulation is identical
+        rules.sort(key=lambda pair: self.order[id(pair[1])])
+        for variable in touched.values():
+            variable.output.clear()
+        for ruleblock, rule in rules:
+            strength = rule.firing_strength(ruleblock.tnorm, ruleblock.snorm)
+            if strength > 0.0:
+                rule.fire(strength, ruleblock.activation)
+        self.counters['fired'] += len(rules)
+        for name, key in stale.items():
+            value = touched[name].defuzzify()
+            self.cache[name] = (key, value)
+            result[name] = value
+        for name, variable in touched.items():
+            if name not in stale:
+                variable.output.clear()
+        return result
+
+    def invalidate(self):
+        '''Forgets the cached values, e.g. after tuning the terms.'''
+        self.cache.clear()
+
+if __name__ == '__main__':
+    from fl.backend import create
+    from fl.generator import Generator
+    from fl.mamdani import MamdaniRule
+    fe = Generator(inputs=3, outputs=2, terms=4, rules=12, depth=2, seed=3).engine()
+    #rules concluding a single output, to exercise the selection of rules
+    ruleblock = fe.ruleblock[None]
+    ruleblock.append(MamdaniRule.parse('if in0 is t1 then out0 is t3', fe))
+    ruleblock.append(MamdaniRule.parse('if in2 is t2 then out1 is t0', fe))
+    reference = create('reference', fe)
+    rows = Generator(inputs=3).rows(200, seed=1)
+    for row in rows:
+        expected = reference.process(row)
+        for variable, x in zip(fe.input.values(), row):
+            variable.input = x
+        for names in (['out1'], ['out0', 'out1'], ['out0']):
+            values = fe.evaluate(names)
+            for name, value in values.items():
+                y = expected[list(fe.output).index(name)]
+                if not (value == y or (value != value and y != y)):
+                    raise AssertionError('DIFFERENT %s at %s: %s != %s' % (name, row, value, y))
+    print(fe.demand.counters)
+    print('Demand is just FINE :)')
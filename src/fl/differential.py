@@ -0,0 +1,448 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Differential testing of the evaluation paths of an engine against the reference,
+Engine.process() without a Plan followed by the Defuzzifier of each output, e.g.:
+
+    python -m fl.differential engine.fcl [--rows 1000] [--seed 0]
+                              [--backends plan fam compact ...] [--tolerance lookup=0.2]
+
+The inputs are random rows, plus rows at the edges of each input variable: the
+vertices and centers of its terms and the points next to them, its range, values
+out of range, and values where none of its terms hold such that no rule fires and
+the outputs take their default. The exit status is 1 if any path exceeds its
+tolerance.
+'''
+
+import argparse
+import random
+import sys
+
+from fl import backend
+from fl.backend import Backend
+from fl.compact import CompactRuleBlock
+from fl.defuzzifier import CenterOfGravity
+from fl.operator import FuzzyAccumulation
+from fl.variable import missing
+
+class Engine(Backend):
+    '''Evaluates the engine as Engine.process(), without its Plan or Stats, which
+    is the reference every other path is compared against.'''
+    name = 'engine'
+
+    def process(self, row):
+        engine = self.engine
+        for variable, x in zip(engine.input.values(), row):
+            variable.input = x
+        plan, stats = engine.plan, engine.stats
+        engine.plan = engine.stats = None
+        try:
+            engine.process()
+        finally:
+            engine.plan, engine.stats = plan, stats
+        return [variable.defuzzify() for variable in engine.output.values()]
+
+
+class OnDemand(Backend):
+    '''Evaluates every output with Engine.evaluate() (see Demand).'''
+    name = 'demand'
+
+    def __init__(self, engine):
+        Backend.__init__(self, engine)
+        engine.demand = None
+
+    def process(self, row):
+        for variable, x in zip(self.engine.input.values(), row):
+            variable.input = x
+        return list(self.engine.evaluate().values())
+
+
+class Compact(Backend):
+    '''Fires a CompactRuleBlock with the rules of each ruleblock of the engine.'''
+    name = 'compact'
+
+    def __init__(self, engine):
+        Backend.__init__(self, engine)
+        self.ruleblocks = []
+        for ruleblock in engine.ruleblock.values():
+            compact = CompactRuleBlock(engine, ruleblock.name)
+            compact.extend(ruleblock)
+            compact.tnorm = ruleblock.tnorm
+            compact.snorm = ruleblock.snorm
+            compact.activation = ruleblock.activation
+            self.ruleblocks.append(compact)
+
+    def fire_rules(self):
+        for ruleblock in self.ruleblocks:
+            ruleblock.fire_rules()
+
+
+class Discretized(Backend):
+    '''Defuzzifies the outputs whose CenterOfGravity uses the closed form by
+    discretizing them instead, which checks the closed form against the integral.
+
+    Attributes:
+        defuzzifiers: a list with the defuzzifier of each output variable.
+    '''
+    name = 'discretized'
+
+    #divisions of the discretized centers of gravity
+    divisions = 1000
+
+    def __init__(self, engine):
+        Backend.__init__(self, engine)
+        self.defuzzifiers = [CenterOfGravity(self.divisions, False)
+                             if closed_form(variable) else variable.defuzzifier
+                             for variable in engine.output.values()]
+
+    def fire_rules(self):
+        for ruleblock in self.engine.ruleblock.values():
+            ruleblock.fire_rules()
+
+    def process(self, row):
+        engine = self.engine
+        for variable, x in zip(engine.input.values(), row):
+            variable.input = x
+        for variable in engine.output.values():
+            variable.output.clear()
+        self.fire_rules()
+        return [variable.default if variable.output.is_empty()
+                else defuzzifier.defuzzify(variable.output)
+                for variable, defuzzifier in zip(engine.output.values(), self.defuzzifiers)]
+
+
+def closed_form(variable):
+    '''Returns whether the output variable is defuzzified in closed form.'''
+    return (isinstance(variable.defuzzifier, CenterOfGravity)
+            and variable.defuzzifier.closed_form
+            and variable.output.accumulation is FuzzyAccumulation.Sum)
+
+paths = dict(backend.backends)
+paths.update((path.name, path) for path in (OnDemand, Compact, Discretized))
+paths[backend.Lookup.name] = backend.Lookup
+
+#largest error of each path relative to the range of each output variable
+tolerances = {'discretized': 1e-3, 'lookup': 0.25}
+exact = 1e-9
+
+#paths that do not preserve the default of the outputs, compared where the reference
+#has a value
+approximate = ('lookup',)
+
+def available(engine):
+    '''Returns the names of the paths that apply to the engine, which are the exact
+    backends, the on demand and compact evaluations, and the discretized one if any
+    output is defuzzified in closed form.'''
+    result = list(backend.backends) + [OnDemand.name, Compact.name]
+    if any(closed_form(variable) for variable in engine.output.values()):
+        result.append(Discretized.name)
+    return result
+
+def silent(variable, x):
+    '''Returns whether none of the terms of the variable holds at x.'''
+    return all(not term.membership(x) > 0.0 for term in variable)
+
+def edges(variable, nudge=1e-6, outside=0.1):
+    '''Returns the sorted list of edge values of the variable: its range and the
+    values out of it, and the vertices and centers of its terms along with the
+    values a nudge of the range away from them.'''
+    minimum, maximum = variable.minimum(), variable.maximum()
+    span = (maximum - minimum) or 1.0
+    points = {minimum, maximum, minimum - outside * span, maximum + outside * span,
+              minimum - span, maximum + span}
+    for term in variable:
+        vertices = [getattr(term, attribute) for attribute in term.vertices]
+        if hasattr(term, 'c'):
+            vertices.append(term.c)
+        for x in vertices:
+            points.update((x, x - nudge * span, x + nudge * span))
+    return sorted(points)
+
+class Inputs(object):
+    '''Generates the rows of inputs of a differential test.
+
+    Attributes:
+        engine: the engine whose input variables are sampled.
+        seed: the seed of the random generator.
+        edges: a list with the edge values of each input variable (see edges).
+        silent: a list with the edge values of each input variable where none of its
+                terms hold.
+    '''
+
+    def __init__(self, engine, seed=0):
+        self.engine = engine
+        self.seed = seed
+        self.edges = [edges(variable) for variable in engine.input.values()]
+        self.silent = [[x for x in points if silent(variable, x)]
+                       for variable, points in zip(engine.input.values(), self.edges)]
+
+    def rows(self, count):
+        '''Returns a dictionary of kind to rows: 'edge' with each edge value of each
+        variable and random values of the others, 'silent' with values where no term
+        holds for every variable that has them, and count 'random' rows over the
+        range of the variables and slightly beyond.'''
+        generator = random.Random(self.seed)
+        variables = list(self.engine.input.values())
+        def sample():
+            row = []
+            for variable in variables:
+                minimum, maximum = variable.minimum(), variable.maximum()
+                margin = 0.05 * (maximum - minimum)
+                row.append(generator.uniform(minimum - margin, maximum + margin))
+            return row
+        result = {'edge': [], 'silent': [], 'random': []}
+        for position, points in enumerate(self.edges):
+            for x in points:
+                row = sample()
+                row[position] = x
+                result['edge'].append(row)
+        if any(self.silent):
+            for _ in range(max(len(points) for points in self.silent)):
+                row = sample()
+                for position, points in enumerate(self.silent):
+                    if points:
+                        row[position] = generator.choice(points)
+                result['silent'].append(row)
+        result['random'] = [sample() for _ in range(count)]
+        return result
+
+class Comparison(object):
+    '''The errors of a path against the reference.
+
+    Attributes:
+        name: the name of the path.
+        tolerance: the largest error allowed, relative to the range of each output.
+        maximum: a list with the largest absolute error of each output variable.
+        mean: a list with the mean absolute error of each output variable.
+        worst: a list with the row of inputs of the largest error of each output.
+        mismatches: the number of values where only one of the path and the
+                    reference is the default (None or nan).
+        compared: the number of rows compared, each once by process_batch() and
+                  once by process().
+        error: the message of the exception raised by the path, if any.
+    '''
+
+    def __init__(self, name, tolerance, spans):
+        self.name = name
+        self.tolerance = tolerance
+        self.spans = spans
+        self.maximum = [0.0] * len(spans)
+        self.mean = [0.0] * len(spans)
+        self.worst = [None] * len(spans)
+        self.mismatches = 0
+        self.compared = 0
+        self.error = None
+
+    def update(self, rows, expected, results, approximate=False):
+        sums = [mean * self.compared for mean in self.mean]
+        for row, a, b in zip(rows, expected, results):
+            if approximate and any(missing(x) for x in a):
+                continue
+            self.compared += 1
+            for i, (x, y) in enumerate(zip(a, b)):
+                absent = (missing(x), missing(y))
+                if absent[0] or absent[1]:
+                    if absent[0] != absent[1]:
+                        self.mismatches += 1
+                        if self.worst[i] is None:
+                            self.worst[i] = row
+                    continue
+                error = abs(x - y)
+                sums[i] += error
+                if error > self.maximum[i]:
+                    self.maximum[i] = error
+                    self.worst[i] = row
+        if self.compared:
+            self.mean = [total / self.compared for total in sums]
+
+    @property
+    def passed(self):
+        return (self.error is None and self.mismatches == 0
+                and all(error <= self.tolerance * span
+                        for error, span in zip(self.maximum, self.spans)))
+
+    def __str__(self):
+        if self.error is not None:
+            return '%-12s FAILED: %s' % (self.name, self.error)
+        result = ['%-12s %s tolerance=%g rows=%i mismatches=%i'
+                  % (self.name, 'ok' if self.passed else 'FAILED', self.tolerance,
+                     self.compared, self.mismatches)]
+        for i, (maximum, mean) in enumerate(zip(self.maximum, self.mean)):
+            result.append('    output %i: max=%.3g mean=%.3g%s' % (i, maximum, mean,
+                          '' if self.worst[i] is None else ' worst at %s' % self.worst[i]))
+        return '\n'.join(result)
+
+class Harness(object):
+    '''Compares the outputs of the evaluation paths of an engine with the reference.
+
+    Attributes:
+        engine: the engine under test.
+        names: the names of the paths to compare (see paths and available).
+        tolerances: a dictionary of name of path to its tolerance, relative to the
+                    range of each output variable, which defaults to tolerances or
+                    else to exact.
+        inputs: the Inputs generating the rows.
+        defaults: the number of rows where the reference returned the default of
+                  some output, i.e., no rule concluding it fired.
+        kinds: a dictionary of kind of rows to their number.
+    '''
+
+    def __init__(self, engine, names=None, tolerances=None, seed=0):
+        self.engine = engine
+        self.names = available(engine) if names is None else list(names)
+        unknown = [name for name in self.names if name not in paths]
+        if unknown:
+            raise ValueError('unknown paths %s, only %s are available'
+                             % (unknown, list(paths)))
+        self.tolerances = dict(globals()['tolerances'])
+        self.tolerances.update(tolerances or {})
+        self.inputs = Inputs(engine, seed)
+        self.defaults = 0
+        self.kinds = {}
+
+    def run(self, count=1000):
+        '''Returns the list of Comparisons of each path on the rows generated.'''
+        kinds = self.inputs.rows(count)
+        self.kinds = dict((kind, len(rows)) for kind, rows in kinds.items())
+        rows = [row for kind in ('edge', 'silent', 'random') for row in kinds[kind]]
+        expected = Engine(self.engine).process_batch(rows)
+        self.defaults = sum(1 for outputs in expected
+                            if any(missing(x) for x in outputs))
+        spans = [(variable.maximum() - variable.minimum()) or 1.0
+                 for variable in self.engine.output.values()]
+        result = []
+        for name in self.names:
+            comparison = Comparison(name, self.tolerances.get(name, exact), spans)
+            try:
+                path = paths[name](self.engine)
+                comparison.update(rows, expected, path.process_batch(rows),
+                                  name in approximate)
+                comparison.update(rows, expected, [path.process(row) for row in rows],
+                                  name in approximate)
+            except (ValueError, ArithmeticError, TypeError) as error:
+                comparison.error = '%s: %s' % (error.__class__.__name__, error)
+            result.append(comparison)
+        return result
+
+    def report(self, comparisons):
+        '''Returns the text of the report of the comparisons.'''
+        result = ['%i rows (%s), %i returning the default of some output'
+                  % (sum(self.kinds.values()),
+                     ', '.join('%i %s' % (self.kinds[kind], kind) for kind in self.kinds),
+                     self.defaults)]
+        result.extend(str(comparison) for comparison in comparisons)
+        return '\n'.join(result)
+
+def check(engine, names=None, tolerances=None, count=1000, seed=0):
+    '''Compares the paths of the engine with the reference, as in a test.
+
+    Returns:
+        the list of Comparisons.
+    Raises:
+        AssertionError: with the report, if any path exceeds its tolerance.'''
+    harness = Harness(engine, names, tolerances, seed)
+    comparisons = harness.run(count)
+    if not all(comparison.passed for comparison in comparisons):
+        raise AssertionError('UNFAITHFUL evaluation paths:\n%s' % harness.report(comparisons))
+    return comparisons
+
+def tolerance(text):
+    name, _, value = text.partition('=')
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected <path=tolerance>, but found <%s>' % text)
+
+def main(argv=None):
+    from fl.fcl import FCLImporter
+    parser = argparse.ArgumentParser(prog='python -m fl.differential')
+    parser.add_argument('fcl', help='the FCL file of the engine')
+    parser.add_argument('--rows', type=int, default=1000,
+                        help='the number of random rows, besides those at the edges')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backends', nargs='+', choices=sorted(paths),
+                        help='the paths to compare (default those available)')
+    parser.add_argument('--tolerance', nargs='+', type=tolerance, default=[],
+                        metavar='path=tolerance',
+                        help='the largest error relative to the range of each output')
+    args = parser.parse_args(argv)
+
+    with open(args.fcl) as f:
+        engine = FCLImporter().engine(f)
+    harness = Harness(engine, args.backends, dict(args.tolerance), args.seed)
+    comparisons = harness.run(args.rows)
+    print(harness.report(comparisons))
+    return 0 if all(comparison.passed for comparison in comparisons) else 1
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    import os
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    from fl.fcl import FCLImporter
+    fe = simple_ai_boat()
+    harness = Harness(fe, available(fe) + ['lookup'])
+    comparisons = harness.run(500)
+    print(harness.report(comparisons))
+    if not all(comparison.passed for comparison in comparisons):
+        raise AssertionError('UNFAITHFUL paths on the rowing engine')
+    #triangles leave gaps where no rule fires, and Sum and Prod allow the closed form
+    fe = FCLImporter().engine('''FUNCTION_BLOCK gaps
+VAR_INPUT
+x: REAL;
+y: REAL;
+END_VAR
+VAR_OUTPUT
+z: REAL;
+END_VAR
+FUZZIFY x
+TERM LOW := Triangle (0.0, 0.25, 0.5);
+TERM HIGH := Triangle (0.5, 0.75, 1.0);
+END_FUZZIFY
+FUZZIFY y
+TERM LOW := Triangle (0.0, 0.2, 0.45);
+TERM HIGH := Triangle (0.55, 0.8, 1.0);
+END_FUZZIFY
+DEFUZZIFY z
+TERM LOW := Triangle (0.0, 0.25, 0.5);
+TERM MEDIUM := Trapezoid (0.3, 0.4, 0.6, 0.7);
+TERM HIGH := Gaussian (0.0, 1.0, 0.1, 0.7);
+METHOD : COG;
+ACCU : SUM;
+DEFAULT : nan;
+END_DEFUZZIFY
+RULEBLOCK rules
+AND : MIN;
+OR : MAX;
+ACT : PROD;
+RULE 1 : if x is LOW and y is LOW then z is LOW;
+RULE 2 : if x is HIGH or y is HIGH then z is HIGH;
+RULE 3 : if x is LOW and y is HIGH then z is MEDIUM;
+END_RULEBLOCK
+END_FUNCTION_BLOCK''')
+    harness = Harness(fe)
+    comparisons = harness.run(300)
+    print(harness.report(comparisons))
+    if not harness.kinds['silent'] or not harness.defaults:
+        raise AssertionError('MISSING rows where no rule fires')
+    if 'discretized' not in harness.names:
+        raise AssertionError('MISSING the closed form of the center of gravity')
+    if not all(comparison.passed for comparison in comparisons):
+        raise AssertionError('UNFAITHFUL paths on the engine with gaps')
+    #a path off by a tiny amount must be caught
+    class Faulty(backend.Compiled):
+        name = 'faulty'
+        def process_batch(self, rows):
+            return [[y + 1e-6 for y in outputs]
+                    for outputs in backend.Compiled.process_batch(self, rows)]
+    paths[Faulty.name] = Faulty
+    try:
+        check(fe, ['faulty'], count=50)
+    except AssertionError as error:
+        print(str(error).splitlines()[-2])
+    else:
+        raise AssertionError('MISSED the faulty path')
+    print('Differential testing is just FINE :)')
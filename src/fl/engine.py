@@ -48,6 +48,9 @@ class Engine:
         self.input = OrderedDict()
         self.output = OrderedDict()
         self.ruleblock = OrderedDict()
+        self.plan = None
+        self.stats = None
+        self.demand = None
     
     def configure(self, fop):
         self.operator = fop
@@ -57,14 +60,78 @@ class Engine:
             self.output[variable].configure(fop)
         for name in self.ruleblock:
             self.ruleblock[name].configure(fop)
+        self.demand = None
+        if self.plan is not None:
+            self.compile()
+    
+    def compile(self, fam=None):
+        '''Builds a Plan that evaluates the propositions and sub-expressions
+        shared among the rules only once per process().
+        
+        The plan must be rebuilt after changing the rules or operators.
+        
+        Args:
+            fam: whether to store grid-shaped rules in a FAM table. If None,
+                 the setting of the current plan is kept.
+        Returns:
+            the Plan used by this engine.'''
+        from fl.plan import Plan
+        if fam is None:
+            fam = self.plan is not None and self.plan.fam
+        self.plan = Plan(self, fam)
+        self.demand = None
+        return self.plan
+    
+    def instrument(self, enabled=True, stats=None):
+        '''Enables or disables the collection of Stats on process() and defuzzify().
+        
+        Args:
+            enabled: whether to collect stats.
+            stats: the Stats to collect into, or None to create new ones.
+        Returns:
+            the Stats collected, or None if disabled.'''
+        if enabled:
+            from fl.stats import Stats
+            self.stats = stats if stats is not None else Stats()
+        else:
+            self.stats = None
+        for variable in self.output.values():
+            variable.stats = self.stats
+        return self.stats
         
+    def evaluate(self, outputs=None):
+        '''Returns the defuzzified values of the given outputs, firing only the 
+        rules that conclude them, and reusing the values computed while the inputs
+        they depend on have not changed (see Demand).
+        
+        The cache only tracks the inputs, so after changing the terms or the weights
+        of the rules other than through ParameterSpace.set(), call
+        self.demand.invalidate() (or configure the engine).
+        
+        Args:
+            outputs: a list of names of output variables, or None for all.
+        Returns:
+            an ordered dictionary of output variable name to value.'''
+        if len(self.ruleblock) == 0:
+            raise ValueError('engine has no ruleblocks')
+        if self.demand is None:
+            from fl.demand import Demand
+            self.demand = Demand(self)
+        return self.demand.evaluate(list(self.output) if outputs is None else outputs)
+    
     def process(self):
         if len(self.output) == 0:
             raise ValueError('engine has no outputs')
         if len(self.ruleblock) == 0:
             raise ValueError('engine has no ruleblocks')
+        if self.stats is not None:
+            self.stats.process(self)
+            return
         for key in self.output:
             self.output[key].output.clear()
+        if self.plan is not None:
+            self.plan.fire_rules()
+            return
         for key in self.ruleblock:
             self.ruleblock[key].fire_rules()
         
@@ -0,0 +1,220 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from fl.mamdani import MamdaniAntecedent
+from fl.operator import FuzzyActivation, FuzzyAccumulation
+from fl.rule import Rule
+from fl.term import Output
+
+class FAM(object):
+    '''A Fuzzy Associative Memory for the grid-shaped rules of a ruleblock.
+
+    Grid rules are of the form 'if A is Ai and B is Bj then C is Ck [with w]',
+    that is, conjunctions of propositions without hedges over different input
+    variables, and consequents without hedges. Each rule is stored as a cell in
+    an N-dimensional table indexed by the terms of the input variables, where a
+    variable missing from a rule takes the extra index len(variable.term) whose
+    membership is always 1.0 (the identity of every tnorm).
+
+    The firing strengths of all the cells are computed as the outer tnorm
+    product of the membership vectors of the input variables, and the strengths
+    are then scattered into the output terms.
+
+    Attributes:
+        ruleblock: the ruleblock whose grid rules are stored.
+        variables: a list of the input variables indexing the dimensions.
+        terms: a list with the list of terms of each input variable.
+        strides: a list with the stride of each dimension in the flattened table.
+        cells: a list of (flat index, [(output variable, term, weight, Output), ...]),
+               where each Output is reused every time the cell fires.
+        reduced: a list of (output variable, Output) reused for the activations
+                 reduced per output term.
+        positions: for each cell, the index in reduced of the term of each consequent.
+        rules: the list of rules stored in the table.
+    '''
+
+    #accumulations under which the outputs of the cells can be appended in any order,
+    #since the cells fire in their own order after the rest of the rules
+    orderless = (FuzzyAccumulation.Max,)
+
+    def __init__(self, ruleblock, rules, variables):
+        self.ruleblock = ruleblock
+        self.variables = variables
+        self.terms = [list(variable) for variable in variables]
+        self.strides = []
+        self.size = 1
+        for terms in reversed(self.terms):
+            self.strides.insert(0, self.size)
+            self.size *= len(terms) + 1
+        self.rules = []
+        cells = {}
+        for rule, propositions in rules:
+            index = 0
+            for dimension, variable in enumerate(variables):
+                term = propositions.get(id(variable))
+                position = (self.terms[dimension].index(term) if term is not None
+                            else len(self.terms[dimension]))
+                index += position * self.strides[dimension]
+            cells.setdefault(index, []).extend((p.variable, p.term, p.weight, Output(p.term))
+                                               for p in rule.consequent.propositions)
+            self.rules.append(rule)
+        self.cells = sorted(cells.items())
+        self.reduced = []
+        outputs = {}
+        for _, consequents in self.cells:
+            for variable, term, weight, output in consequents:
+                key = (id(variable), id(term))
+                if key not in outputs:
+                    outputs[key] = len(self.reduced)
+                    self.reduced.append((variable, Output(term)))
+        self.positions = [[outputs[(id(variable), id(term))]
+                           for variable, term, _, _ in consequents]
+                          for _, consequents in self.cells]
+        # the dense outer product pays off unless the table is mostly empty
+        self.dense = self.size <= 4 * len(self.cells)
+
+    @staticmethod
+    def grid_propositions(rule):
+        '''Returns a dictionary of id(variable) to term if the rule fits in a FAM,
+        or None otherwise.'''
+        result = {}
+        pending = [rule.antecedent.root]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, MamdaniAntecedent.Operator):
+                if node.operator != Rule.FR_AND:
+                    return None
+                pending.extend((node.left, node.right))
+            elif node.hedges or node.term is None or id(node.variable) in result:
+                return None
+            else:
+                result[id(node.variable)] = node.term
+        if any(p.hedges for p in rule.consequent.propositions):
+            return None
+        return result
+
+    @classmethod
+    def detect(cls, ruleblock, inputs):
+        '''Splits the rules of the ruleblock into a FAM and the remaining rules.
+
+        Rules concluding an output whose accumulation depends on the order of the
+        outputs (see orderless) remain, such that they fire in the order of the
+        ruleblock as in Engine.process().
+
+        Args:
+            ruleblock: the ruleblock to split.
+            inputs: a sequence of input variables giving the order of the dimensions.
+        Returns:
+            a tuple (FAM or None, list of rules that do not fit in the FAM).'''
+        grid = []
+        rest = []
+        used = set()
+        for rule in ruleblock:
+            propositions = cls.grid_propositions(rule)
+            if propositions is None or any(
+                    p.variable.output.accumulation not in cls.orderless
+                    for p in rule.consequent.propositions):
+                rest.append(rule)
+            else:
+                grid.append((rule, propositions))
+                used.update(propositions)
+        if len(grid) == 0:
+            return None, rest
+        variables = [variable for variable in inputs if id(variable) in used]
+        return cls(ruleblock, grid, variables), rest
+
+    def memberships(self, values=None):
+        '''Returns the membership vector of each input variable, ending in 1.0.
+
+        Args:
+            values: a list of crisp values for each dimension, or None to use
+                    the current inputs of the variables.'''
+        if values is None:
+            values = [variable.input for variable in self.variables]
+        return [[term.membership(x) for term in terms] + [1.0]
+                for x, terms in zip(values, self.terms)]
+
+    def strengths(self, memberships):
+        '''Returns the firing strength of each cell.'''
+        tnorm = self.ruleblock.tnorm
+        if self.dense:
+            table = memberships[0]
+            for vector in memberships[1:]:
+                table = [tnorm(a, b) for a in table for b in vector]
+            return [table[index] for index, _ in self.cells]
+        result = []
+        for index, _ in self.cells:
+            strength = None
+            for stride, vector in zip(self.strides, memberships):
+                mu = vector[(index // stride) % len(vector)]
+                strength = mu if strength is None else tnorm(strength, mu)
+            result.append(strength)
+        return result
+
+    def strengths_batch(self, columns):
+        '''Returns the firing strength of each cell for many inputs at once.
+
+        Args:
+            columns: a dictionary of input variable names to lists of crisp values.
+        Returns:
+            a list with the column of firing strengths of each cell.'''
+        tnorm = self.ruleblock.tnorm
+        memberships = []
+        rows = 0
+        for variable, terms in zip(self.variables, self.terms):
+            column = columns[variable.name]
+            rows = len(column)
+            memberships.append([[term.membership(x) for x in column] for term in terms])
+        result = []
+        for index, _ in self.cells:
+            strength = None
+            for stride, vector in zip(self.strides, memberships):
+                position = (index // stride) % (len(vector) + 1)
+                if position == len(vector):
+                    continue
+                mu = vector[position]
+                strength = mu if strength is None else list(map(tnorm, strength, mu))
+            result.append(strength if strength is not None else [1.0] * rows)
+        return result
+
+    def fire(self, strengths):
+        '''Scatters the strengths of the cells into the outputs of the consequents.
+
+        If the accumulation is Max and the activation is monotonic, the activations
+        of each output term are first reduced to their maximum, so each term is
+        appended once regardless of how many cells conclude it.'''
+        activation = self.ruleblock.activation
+        reduce = activation in (FuzzyActivation.Min, FuzzyActivation.Prod)
+        reduced = self.reduced
+        for _, output in reduced:
+            output.alphacut = -1.0 #not activated
+        for strength, (_, consequents), positions in zip(strengths, self.cells,
+                                                         self.positions):
+            if not strength > 0.0:
+                continue
+            for (variable, term, weight, output), position in zip(consequents, positions):
+                alphacut = strength * weight
+                if reduce and variable.output.accumulation is FuzzyAccumulation.Max:
+                    output = reduced[position][1]
+                    if output.alphacut < alphacut:
+                        output.alphacut = alphacut
+                else:
+                    output.minimum = term.minimum
+                    output.maximum = term.maximum
+                    output.alphacut = alphacut
+                    output.activation = activation
+                    variable.output.append(output)
+        for variable, output in reduced:
+            if output.alphacut >= 0.0:
+                output.minimum = output.term.minimum
+                output.maximum = output.term.maximum
+                output.activation = activation
+                variable.output.append(output)
+
+    def __str__(self):
+        return 'FAM %s: %i rules in %i cells of a %s table' % (self.ruleblock.name,
+                len(self.rules), len(self.cells),
+                ' x '.join(str(len(terms) + 1) for terms in self.terms))
@@ -70,7 +70,8 @@ class FCLExporter(object):
             
             fcl.append('')
             for i, rule in enumerate(ruleblock):
-                fcl.append('RULE %i : %s;' % (i + 1, rule))
+                fcl.append('RULE %i : %s %s %s %s;' % (i + 1, Rule.FR_IF, 
+                           rule.antecedent.str_infix(), Rule.FR_THEN, rule.consequent))
             
             fcl.append('END_RULEBLOCK')
             fcl.append('')
@@ -79,103 +80,145 @@ class FCLExporter(object):
         return '\n'.join(fcl)
 
 
-from fl.engine import Operator
+from fl.compact import CompactRuleBlock
+from fl.defuzzifier import (CenterOfGravity, SmallestOfMaximum, LargestOfMaximum,
+                            MiddleOfMaximum)
 from fl.mamdani import MamdaniRule
+from fl.operator import FuzzyAnd, FuzzyOr, FuzzyActivation, FuzzyAccumulation
 from fl.ruleblock import RuleBlock
+from fl.term import (Triangle, Trapezoid, Rectangle, LeftShoulder, RightShoulder,
+                     Gaussian, Bell, Sigmoid)
 from fl.variable import InputVariable, OutputVariable
-import fl.term
-import inspect
-import re
+
+#Registries of the components available to the importer, built once.
+TERMS = {term.__name__: term for term in (Triangle, Trapezoid, Rectangle, LeftShoulder,
+                                          RightShoulder, Gaussian, Bell, Sigmoid)}
+
+DEFUZZIFIERS = {str(defuzzifier()): defuzzifier for defuzzifier in 
+                (CenterOfGravity, SmallestOfMaximum, LargestOfMaximum, MiddleOfMaximum)}
+
+OPERATORS = {operation: {name.upper(): getattr(clazz, name) for name in vars(clazz)
+                         if isinstance(vars(clazz)[name], staticmethod)}
+             for operation, clazz in (('AND', FuzzyAnd), ('OR', FuzzyOr),
+                                      ('ACT', FuzzyActivation), ('ACCU', FuzzyAccumulation))}
+
 class FCLImporter(object):
+    '''Imports a fuzzy engine from the Fuzzy Controller Language.
     
-    def __init__(self):
+    The FCL is read in a single pass, line by line, such that it can be streamed
+    from a file object. Each line is dispatched to the handler of the block it
+    belongs to, and terms, defuzzifiers and operators are looked up in the 
+    registries TERMS, DEFUZZIFIERS and OPERATORS. If compact, the rules are
+    stored in CompactRuleBlocks, e.g. for very large rule bases.'''
+    
+    #begin tag: (end tag, handler of the lines in the block)
+    tags = {'VAR_INPUT': ('END_VAR', 'process_input_var'),
+            'VAR_OUTPUT': ('END_VAR', 'process_output_var'),
+            'FUZZIFY': ('END_FUZZIFY', 'process_fuzzify'),
+            'DEFUZZIFY': ('END_DEFUZZIFY', 'process_defuzzify'),
+            'RULEBLOCK': ('END_RULEBLOCK', 'process_ruleblock')}
+    
+    def __init__(self, compact=False):
         self.fe = Engine()
+        self.compact = compact
         #the Operator is not automatically loaded due to possibly 
         #multiple ruleblocks with different operators,
         #different defuzzifier in output variables, etc.
         self.fe.operator = None
+        self.variable = None
+        self.ruleblock = None
     
     def engine(self, fcl):
-        tags = {'VAR_INPUT': 'END_VAR',
-                'VAR_OUTPUT': 'END_VAR',
-                'FUZZIFY': 'END_FUZZIFY',
-                'DEFUZZIFY': 'END_DEFUZZIFY',
-                'RULEBLOCK': 'END_RULEBLOCK'}
-        
+        '''Returns the engine defined in fcl, which is either a string or an 
+        iterable of lines such as a file object.'''
+        if isinstance(fcl, str):
+            fcl = fcl.splitlines()
         current_tag = None
-        block = []
-        for line in fcl.splitlines():
+        handler = None
+        count = 0
+        for line in fcl:
             #remove comments and trailing spaces
-            line = re.sub(r'(^\s*)|(#.*)|(\s*$)', '', line)
-            
+            line = line.split('#', 1)[0].strip()
             if len(line) == 0: continue
+            tag = line.split(None, 1)[0]
             
             if current_tag is not None:
-                for begin_tag in tags:
-                    if line.startswith(begin_tag):
-                        raise SyntaxError('<%s> expected, but found <%s>' % 
-                                  (current_tag[1], begin_tag))
-                 
-                if line.startswith(current_tag[1]):
-                    self.process(current_tag[0], block)
+                if tag in self.tags:
+                    raise SyntaxError('<%s> expected, but found <%s>' % 
+                                      (self.tags[current_tag][0], tag))
+                if tag == self.tags[current_tag][0]:
+                    if count == 0 and current_tag.startswith('VAR_'):
+                        raise SyntaxError('expected at least one variable in %s' 
+                                          % current_tag)
+                    self.end_block(current_tag)
                     current_tag = None
-                    block = []
-                else: 
-                    block.append(line)
-                
+                else:
+                    handler(line)
+                    count += 1
                 continue
             
-            if line.startswith('FUNCTION_BLOCK'):
+            if tag == 'FUNCTION_BLOCK':
                 tokens = line.split()
                 if len(tokens) > 1:
                     self.fe.name = tokens[1]
-            elif line.startswith('END_FUNCTION_BLOCK'):
+            elif tag == 'END_FUNCTION_BLOCK':
                 break
+            elif tag in self.tags:
+                current_tag = tag
+                handler = getattr(self, self.tags[tag][1])
+                count = 0
+                self.begin_block(tag, line)
             else:
-                for begin_tag, end_tag in tags.items(): 
-                    if line.startswith(begin_tag):
-                        current_tag = (begin_tag, end_tag)
-                        block.append(line)
-                        break
-                if current_tag is None:
-                    raise SyntaxError('unknown block <%s>' % line)
+                raise SyntaxError('unknown block <%s>' % line)
         
         if current_tag is not None:
-            if len(block) > 0:
-                raise SyntaxError('%s expected for %s...' % 
-                                  (current_tag[1], ' '.join(block[0:1])))
-            else: raise SyntaxError('%s expected, but not found' % current_tag[1])
+            raise SyntaxError('%s expected, but not found' % self.tags[current_tag][0])
         return self.fe
     
-    def process(self, tag, block):
-        if tag == 'VAR_INPUT': self.process_input_vars(block)
-        elif tag == 'VAR_OUTPUT': self.process_output_vars(block)
-        elif tag == 'FUZZIFY': self.process_fuzzify(block)
-        elif tag == 'DEFUZZIFY': self.process_defuzzify(block)
-        elif tag == 'RULEBLOCK': self.process_ruleblock(block)
-    
-    def process_input_vars(self, block):
-        if len(block) <= 1:
-            raise SyntaxError('expected at least one variable in %s' % block)
-        for variable in block[1:]:
-            token = variable.split(':')
-            if len(token) != 2:
-                raise SyntaxError('malformed property <%s>' % variable)
-            name = token[0]
-            self.fe.input[name] = InputVariable(name)
-    
-    def process_output_vars(self, block):
-        if len(block) <= 1:
-            raise SyntaxError('expected at least one variable in %s' % block)
-        for variable in block[1:]:
-            token = variable.split(':')
+    def begin_block(self, tag, line):
+        token = line.split()
+        if tag == 'FUZZIFY' or tag == 'DEFUZZIFY':
             if len(token) != 2:
-                raise SyntaxError('malformed property <%s>' % variable)
-            name = token[0]
-            self.fe.output[name] = OutputVariable(name)
+                raise SyntaxError('malformed block definition in <%s> ' % line)
+            variables = self.fe.input if tag == 'FUZZIFY' else self.fe.output
+            if token[1] not in variables:
+                raise SyntaxError('undeclared variable <%s> in <%s>' % (token[1], line))
+            self.variable = variables[token[1]]
+        elif tag == 'RULEBLOCK':
+            self.ruleblock = (CompactRuleBlock(self.fe) if self.compact
+                              else RuleBlock())
+            if len(token) == 2: 
+                self.ruleblock.name = token[1]
+    
+    def end_block(self, tag):
+        if tag == 'RULEBLOCK':
+            self.fe.ruleblock[self.ruleblock.name] = self.ruleblock
+            self.ruleblock = None
+        self.variable = None
+    
+    def extract_name(self, line):
+        token = line.split(':')
+        if len(token) != 2:
+            raise SyntaxError('malformed property <%s>' % line)
+        return token[0].strip()
+    
+    def process_input_var(self, line):
+        name = self.extract_name(line)
+        self.fe.input[name] = InputVariable(name)
+    
+    def process_output_var(self, line):
+        name = self.extract_name(line)
+        self.fe.output[name] = OutputVariable(name)
+    
+    def extract_value(self, line):
+        '''Returns the string value of a property <NAME : value;>.'''
+        token = line.split(':')
+        if len(token) != 2:
+            raise SyntaxError('malformed property <%s>' % line)
+        return token[1].replace(';', '').strip()
     
     def extract_term(self, line):
-        token = line.split(':=', 2)
+        token = line.split(':=')
         if len(token) != 2:
             raise SyntaxError('malformed property <%s>' % line)
         lvalue, rvalue = token[0], token[1].strip()
@@ -185,146 +228,74 @@ class FCLImporter(object):
             raise SyntaxError('malformed lvalue in <%s>' % line)
         name = token[1]
         
-        token = re.match(r'(\w+)\s*(\(.*\))', rvalue)
-        if not token:
+        open_at = rvalue.find('(')
+        close_at = rvalue.rfind(')')
+        if open_at < 0 or close_at < open_at:
             raise SyntaxError('malformed rvalue in <%s>' % line)
-        
-        term_class = token.group(1) 
-        available_terms = [term for term in dir(fl.term) 
-                           if inspect.isclass(eval('fl.term.%s' % term))]
-        
-        if term_class not in available_terms:
+        term_class = rvalue[:open_at].strip()
+        if term_class not in TERMS:
             raise SyntaxError('unknown term <%s>, only %s are available'
-                              % (term_class, available_terms))
-        
-        term_args = token.group(2)
-        term_args = "'%s', %s" % (name, term_args[1:-1])  # removes parentheses
-        
-        term_object = None
+                              % (term_class, sorted(TERMS)))
         try:
-            term_object = eval('fl.term.%s(%s)' % (term_class, term_args))
-        except:
-            raise
-        return term_object
-        
+            args = [float(arg) for arg in rvalue[open_at + 1:close_at].split(',')]
+        except ValueError:
+            raise SyntaxError('expected numeric parameters in <%s>' % line)
+        try:
+            return TERMS[term_class](name, *args)
+        except TypeError:
+            raise SyntaxError('wrong number of parameters for <%s> in <%s>' 
+                              % (term_class, line))
     
-    def process_fuzzify(self, block):
-        token = block[0].split()
-        if len(token) != 2:
-            raise SyntaxError('malformed block definition in <%s> ' % token)
-        name = token[1]
-        
-        for line in block[1:]:
-            term = self.extract_term(line)
-            self.fe.input[name].term[term.name] = term
+    def process_fuzzify(self, line):
+        term = self.extract_term(line)
+        self.variable.term[term.name] = term
     
     def extract_defuzzifier(self, line):
-        token = line.split(':')
-        if len(token) != 2:
-            raise SyntaxError('malformed property <%s>' % line)
-        
-        name = token[1].strip().replace(';', '')
-        
-        acronyms = {}
-        for defuzz in dir(fl.defuzzifier):
-            if not inspect.isclass(eval('fl.defuzzifier.%s' % defuzz)):
-                continue
-            acronym = []
-            for letter in defuzz:
-                if letter.isupper(): acronym.append(letter)
-            acronyms[''.join(acronym)] = defuzz
-        
-        if name not in acronyms:
+        name = self.extract_value(line)
+        if name not in DEFUZZIFIERS:
             raise SyntaxError('unknown defuzzifier <%s>, only %s are available'
-                              % (name, acronyms.keys()))
-        
-        defuzzifier = eval('fl.defuzzifier.%s()' % acronyms[name])
-        
-        return defuzzifier
+                              % (name, sorted(DEFUZZIFIERS)))
+        return DEFUZZIFIERS[name]()
     
     def extract_operator(self, line):
-        token = line.split(':')
-        if len(token) != 2:
-            raise SyntaxError('malformed property <%s>' % line)
-        
-        operation = token[0].strip()
-        operator = token[1].strip().replace(';','')
-        
-        clazz = None
-        if operation == 'AND': clazz = fl.operator.FuzzyAnd
-        elif operation == 'OR': clazz = fl.operator.FuzzyOr
-        elif operation == 'ACT': clazz = fl.operator.FuzzyActivation
-        elif operation == 'ACCU': clazz = fl.operator.FuzzyAccumulation
-        else:
+        operation = line.split(':', 1)[0].strip()
+        operator = self.extract_value(line)
+        if operation not in OPERATORS:
             raise SyntaxError('unknown operation <%s> in %s' % (operation, line))
-        
-        import types
-        methods = {}
-        for method in dir(clazz):
-            if method.startswith('__'): continue
-            method_ref = getattr(clazz, method)
-            if isinstance(method_ref, types.FunctionType):
-                methods[method.upper()] = method_ref
-        
-        if operator not in methods:
+        if operator not in OPERATORS[operation]:
             raise SyntaxError('unknown operator <%s> in %s' %(operator, line))
-        
-        return methods[operator]
-            
-    
-    def process_defuzzify(self, block):
-        token = block[0].split()
-        if len(token) != 2:
-            raise SyntaxError('malformed block definition in <%s> ' % token)
-        name = token[1]
-        
-        for line in block[1:]:
-            line = line.strip()
-            if line.startswith('TERM'):
-                term = self.extract_term(line)
-                self.fe.output[name].term[term.name] = term
-            elif line.startswith('METHOD'):
-                defuzzifier = self.extract_defuzzifier(line)
-                self.fe.output[name].defuzzifier = defuzzifier
-            elif line.startswith('ACCU'):
-                self.fe.output[name].output.accumulation = self.extract_operator(line)
-            elif line.startswith('DEFAULT'):
-                token = line.split(':')
-                if len(token) != 2:
-                    raise SyntaxError('malformed property <%s>' % line)
-                value = None
-                try:
-                    value = float(token[1].strip().replace(';',''))
-                except:
-                    raise ValueError('invalid default value in <%s>' % line)
-                self.fe.output[name].default = value
-            else:
-                raise SyntaxError('unknown property <%s>' % line)
+        return OPERATORS[operation][operator]
     
+    def process_defuzzify(self, line):
+        if line.startswith('TERM'):
+            term = self.extract_term(line)
+            self.variable.term[term.name] = term
+        elif line.startswith('METHOD'):
+            self.variable.defuzzifier = self.extract_defuzzifier(line)
+        elif line.startswith('ACCU'):
+            self.variable.output.accumulation = self.extract_operator(line)
+        elif line.startswith('DEFAULT'):
+            try:
+                self.variable.default = float(self.extract_value(line))
+            except ValueError:
+                raise ValueError('invalid default value in <%s>' % line)
+        else:
+            raise SyntaxError('unknown property <%s>' % line)
     
-    def process_ruleblock(self, block):
-        ruleblock = RuleBlock()
-        token = block[0].split()
-        if len(token) == 2: 
-            ruleblock.name = token[1].strip()
-        
-        for line in block[1:]:
-            line = line.strip()
-            if line.startswith('RULE'):
-                token = line.split(':')
-                if len(token) != 2:
-                    raise SyntaxError('malformed property <%s>' % line)
-                ruleblock.append(MamdaniRule.parse(token[1].replace(';',''), self.fe))
-            elif line.startswith('AND'):
-                ruleblock.tnorm = self.extract_operator(line)
-            elif line.startswith('OR'):
-                ruleblock.snorm = self.extract_operator(line)
-            elif line.startswith('ACT'):
-                ruleblock.activation = self.extract_operator(line)
-            else:
-                raise SyntaxError('unknown property <%s>' % line)
-        
-        self.fe.ruleblock[ruleblock.name] = ruleblock
+    def process_ruleblock(self, line):
+        if line.startswith('RULE'):
+            token = line.split(':', 1)
+            if len(token) != 2:
+                raise SyntaxError('malformed property <%s>' % line)
+            self.ruleblock.append(MamdaniRule.parse(token[1].replace(';',''), self.fe))
+        elif line.startswith('AND'):
+            self.ruleblock.tnorm = self.extract_operator(line)
+        elif line.startswith('OR'):
+            self.ruleblock.snorm = self.extract_operator(line)
+        elif line.startswith('ACT'):
+            self.ruleblock.activation = self.extract_operator(line)
+        else:
+            raise SyntaxError('unknown property <%s>' % line)
 
 if __name__ == '__main__':
     from fl.example import Example
@@ -0,0 +1,112 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+import random
+
+from fl.defuzzifier import CenterOfGravity
+from fl.engine import Engine, Operator
+from fl.mamdani import MamdaniRule
+from fl.rule import Rule
+from fl.ruleblock import RuleBlock
+from fl.term import Triangle, LeftShoulder, RightShoulder
+from fl.variable import InputVariable, OutputVariable
+
+class Generator(object):
+    '''Generates random but valid engines with a controlled shape.
+
+    Every variable ranges over [0, 1] and is partitioned into evenly spaced
+    terms: a left shoulder, triangles, and a right shoulder. Rules are built
+    as text and parsed with MamdaniRule.parse, so the engines are the same
+    as if they were written by hand.
+
+    Attributes:
+        inputs: the number of input variables.
+        outputs: the number of output variables.
+        terms: the number of terms per variable.
+        rules: the number of rules.
+        depth: the number of propositions in the antecedent of each rule.
+        divisions: the divisions of the CenterOfGravity defuzzifier.
+        disjunction: the probability of joining two propositions with 'or'
+                     instead of 'and'.
+        seed: the seed of the random generator.
+    '''
+
+    def __init__(self, inputs=2, outputs=1, terms=5, rules=25, depth=2,
+                 divisions=100, disjunction=0.0, seed=0):
+        if depth > inputs:
+            raise ValueError('depth %i exceeds the number of inputs %i' % (depth, inputs))
+        if terms < 2:
+            raise ValueError('at least two terms per variable are required')
+        self.inputs = inputs
+        self.outputs = outputs
+        self.terms = terms
+        self.rules = rules
+        self.depth = depth
+        self.divisions = divisions
+        self.disjunction = disjunction
+        self.seed = seed
+
+    def partition(self, variable):
+        '''Adds the evenly spaced terms to the variable.'''
+        step = 1.0 / (self.terms - 1)
+        for i in range(self.terms):
+            name = 't%i' % i
+            if i == 0:
+                term = LeftShoulder(name, 0.0, step)
+            elif i == self.terms - 1:
+                term = RightShoulder(name, 1.0 - step, 1.0)
+            else:
+                term = Triangle(name, (i - 1) * step, i * step, (i + 1) * step)
+            variable.term[name] = term
+
+    def engine(self):
+        '''Returns a new engine with the shape of this generator.'''
+        generator = random.Random(self.seed)
+        fe = Engine('generated-%ix%ix%i' % (self.inputs, self.terms, self.rules))
+        for i in range(self.inputs):
+            variable = InputVariable('in%i' % i)
+            self.partition(variable)
+            fe.input[variable.name] = variable
+        for i in range(self.outputs):
+            variable = OutputVariable('out%i' % i, default=float('nan'))
+            self.partition(variable)
+            fe.output[variable.name] = variable
+
+        ruleblock = RuleBlock()
+        inputs = list(fe.input)
+        outputs = list(fe.output)
+        for _ in range(self.rules):
+            antecedent = []
+            for variable in generator.sample(inputs, self.depth):
+                if antecedent:
+                    antecedent.append(Rule.FR_OR if generator.random() < self.disjunction
+                                      else Rule.FR_AND)
+                antecedent.append('%s %s t%i' % (variable, Rule.FR_IS,
+                                                 generator.randrange(self.terms)))
+            consequent = ' %s ' % Rule.FR_AND
+            consequent = consequent.join('%s %s t%i' % (variable, Rule.FR_IS,
+                                                        generator.randrange(self.terms))
+                                         for variable in outputs)
+            ruleblock.append(MamdaniRule.parse('%s %s %s %s' % (Rule.FR_IF,
+                             ' '.join(antecedent), Rule.FR_THEN, consequent), fe))
+        fe.ruleblock[ruleblock.name] = ruleblock
+        fe.configure(Operator(defuzzifier=CenterOfGravity(self.divisions)))
+        return fe
+
+    def rows(self, count, seed=None):
+        '''Returns count rows of random inputs in [0, 1].'''
+        generator = random.Random(self.seed if seed is None else seed)
+        return [[generator.random() for _ in range(self.inputs)] for _ in range(count)]
+
+    def __str__(self):
+        return ('Generator(inputs=%i, outputs=%i, terms=%i, rules=%i, depth=%i, '
+                'divisions=%i)' % (self.inputs, self.outputs, self.terms, self.rules,
+                                   self.depth, self.divisions))
+
+if __name__ == '__main__':
+    from fl.fcl import FCLExporter
+    fe = Generator(inputs=3, terms=4, rules=6, depth=2, disjunction=0.3).engine()
+    print(FCLExporter().engine(fe))
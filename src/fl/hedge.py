@@ -14,15 +14,27 @@ class Hedge(object):
     def apply(self, mu): 
         return self.function(mu) 
 
+#the functions of the hedges, at module level such that engines can be pickled
+def complement(mu):
+    return 1.0 - mu
+
+def somewhat(mu):
+    return math.sqrt(mu)
+
+def very(mu):
+    return mu * mu
+
+def any_(mu):
+    return 1.0
+
 class HedgeDict(dict):
     
     def __init__(self):
         dict.__init__(self)
-        self['not'] = Hedge('not', function=lambda mu: 1.0 - mu)
-        self['somewhat'] = Hedge('somewhat', function=lambda mu: math.sqrt(mu))
-        self['very'] = Hedge('very', function=lambda mu: mu * mu)
-        self['any'] = Hedge('any', function=lambda mu: 1.0)
-
+        self['not'] = Hedge('not', function=complement)
+        self['somewhat'] = Hedge('somewhat', function=somewhat)
+        self['very'] = Hedge('very', function=very)
+        self['any'] = Hedge('any', function=any_)
 
 if __name__ == '__main__':
     hedges = HedgeDict()
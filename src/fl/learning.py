@@ -0,0 +1,213 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Learns the rules of an engine from data by the method of Wang and Mendel, e.g.:
+
+    python -m fl.learning engine.fcl data.csv --output learned.fcl [--chunk-size 10000]
+                          [--weighted] [--compact]
+
+where engine.fcl defines the variables and their terms (any rules are replaced),
+and data.csv has a header with the names of the input and output variables.
+'''
+
+import argparse
+import sys
+
+from fl.compact import CompactRuleBlock
+from fl.mamdani import MamdaniRule, MamdaniAntecedent, MamdaniConsequent
+from fl.rule import Rule
+from fl.ruleblock import RuleBlock
+
+class WangMendel(object):
+    '''Learns a rule for each combination of input terms observed in the data.
+
+    Every row is assigned, for each variable, the term of maximum membership. The
+    combination of input terms is the antecedent of a candidate rule, the terms of
+    the outputs its consequent, and the product of the memberships its degree.
+    Among the candidates with the same antecedent, the one of highest degree is
+    kept. The rows are processed in chunks, fuzzifying each column against each
+    term at once, and only the best candidate of each antecedent is kept, so the
+    memory is bounded by the number of rules rather than the number of rows.
+
+    Attributes:
+        engine: the engine whose variables partition the data.
+        candidates: a dictionary of the tuple of indices of the input terms to
+                    (degree, tuple of indices of the output terms).
+        rows: the number of rows learned from.
+        skipped: the number of rows with a variable outside of all its terms.
+    '''
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.variables = list(engine.input.values()) + list(engine.output.values())
+        self.terms = [list(variable) for variable in self.variables]
+        self.candidates = {}
+        self.rows = 0
+        self.skipped = 0
+
+    def fuzzify(self, column, terms):
+        '''Returns the index of the term of maximum membership to each value of the
+        column, and the list of those memberships.'''
+        best = [0.0] * len(column)
+        indices = [0] * len(column)
+        for index, term in enumerate(terms):
+            for i, mu in enumerate(map(term.membership, column)):
+                if mu > best[i]:
+                    best[i] = mu
+                    indices[i] = index
+        return indices, best
+
+    def update(self, rows):
+        '''Learns from a chunk of rows of values of the input variables followed by
+        those of the output variables, in the order of the engine.'''
+        if not rows:
+            return
+        indices = []
+        degrees = [1.0] * len(rows)
+        for position, terms in enumerate(self.terms):
+            column = [row[position] for row in rows]
+            chosen, memberships = self.fuzzify(column, terms)
+            indices.append(chosen)
+            degrees = [a * b for a, b in zip(degrees, memberships)]
+        inputs = len(self.engine.input)
+        candidates = self.candidates
+        for key, degree in zip(zip(*indices), degrees):
+            if degree <= 0.0:
+                self.skipped += 1
+                continue
+            antecedent = key[:inputs]
+            previous = candidates.get(antecedent)
+            if previous is None or degree > previous[0]:
+                candidates[antecedent] = (degree, key[inputs:])
+        self.rows += len(rows)
+
+    def learn(self, chunks):
+        '''Learns from every chunk of rows (see update), and returns the ruleblock.'''
+        for rows in chunks:
+            self.update(rows)
+        return self.ruleblock()
+
+    def rule(self, antecedent, consequent, weight=1.0):
+        '''Returns the rule with the terms of the given indices.'''
+        result = MamdaniRule()
+        result.antecedent = MamdaniAntecedent()
+        for position, index in enumerate(antecedent):
+            proposition = MamdaniAntecedent.Proposition()
+            proposition.variable = self.variables[position]
+            proposition.term = self.terms[position][index]
+            if result.antecedent.root is None:
+                result.antecedent.root = proposition
+            else:
+                node = MamdaniAntecedent.Operator(Rule.FR_AND)
+                node.left = result.antecedent.root
+                node.right = proposition
+                result.antecedent.root = node
+        result.consequent = MamdaniConsequent()
+        for position, index in enumerate(consequent, len(antecedent)):
+            proposition = MamdaniConsequent.Proposition()
+            proposition.variable = self.variables[position]
+            proposition.term = self.terms[position][index]
+            proposition.weight = weight
+            result.consequent.propositions.append(proposition)
+        return result
+
+    def ruleblock(self, name=None, weighted=False, compact=False):
+        '''Returns a ruleblock with the rules learned, sorted by antecedent.
+
+        Args:
+            name: the name of the ruleblock.
+            weighted: whether the weight of each rule is its degree.
+            compact: whether to return a CompactRuleBlock.'''
+        result = CompactRuleBlock(self.engine, name) if compact else RuleBlock(name)
+        for antecedent in sorted(self.candidates):
+            degree, consequent = self.candidates[antecedent]
+            result.append(self.rule(antecedent, consequent, degree if weighted else 1.0))
+        if self.engine.operator is not None:
+            result.configure(self.engine.operator)
+        return result
+
+def main(argv=None):
+    from fl.engine import Operator
+    from fl.fcl import FCLExporter, FCLImporter
+    from fl.main import Reader
+    parser = argparse.ArgumentParser(prog='python -m fl.learning')
+    parser.add_argument('fcl', help='the engine whose variables partition the data')
+    parser.add_argument('data', help='a CSV file with columns named after the variables')
+    parser.add_argument('--output', help='the FCL file of the learned engine (default stdout)')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--weighted', action='store_true',
+                        help='weigh each rule by its degree')
+    parser.add_argument('--compact', action='store_true',
+                        help='store the rules in a CompactRuleBlock while learning')
+    args = parser.parse_args(argv)
+
+    with open(args.fcl) as f:
+        engine = FCLImporter().engine(f)
+    learner = WangMendel(engine)
+    with open(args.data, newline='') as f:
+        reader = Reader(f, 'csv', list(engine.input) + list(engine.output))
+        for _, rows in reader.chunks(args.chunk_size):
+            learner.update(rows)
+    #the learned rules take the operators of the rules they replace
+    previous = next(iter(engine.ruleblock.values()), None)
+    engine.ruleblock.clear()
+    ruleblock = learner.ruleblock(weighted=args.weighted, compact=args.compact)
+    if previous is not None:
+        ruleblock.tnorm = previous.tnorm
+        ruleblock.snorm = previous.snorm
+        ruleblock.activation = previous.activation
+    else:
+        ruleblock.configure(Operator())
+    engine.ruleblock[ruleblock.name] = ruleblock
+    fcl = FCLExporter().engine(engine) + '\n'
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(fcl)
+    else:
+        sys.stdout.write(fcl)
+    sys.stderr.write('learned %i rules from %i rows (%i skipped)\n'
+                     % (len(ruleblock), learner.rows, learner.skipped))
+    return 0
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    import os, time
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    from fl.backend import create
+    teacher = simple_ai_boat()
+    rows = [[relative, location] for location in range(0, 2001, 10)
+            for relative in range(-100, 101, 2)]
+    rows = [row + outputs for row, outputs in
+            zip(rows, create('plan', teacher).process_batch(rows)) if outputs[0] == outputs[0]]
+    student = simple_ai_boat()
+    learner = WangMendel(student)
+    start = time.perf_counter()
+    ruleblock = learner.learn(rows[i:i + 5000] for i in range(0, len(rows), 5000))
+    elapsed = time.perf_counter() - start
+    #the same rules written one string at a time
+    start = time.perf_counter()
+    for antecedent in sorted(learner.candidates):
+        rule = learner.rule(antecedent, learner.candidates[antecedent][1])
+        MamdaniRule.parse('%s %s %s %s' % (Rule.FR_IF, rule.antecedent.str_infix(),
+                                           Rule.FR_THEN, rule.consequent), student)
+    parsed = time.perf_counter() - start
+    print('learned %i rules from %i rows in %.3f s (%.0f rows/s); parsing them: %.4f s'
+          % (len(ruleblock), learner.rows, elapsed, learner.rows / elapsed, parsed))
+    student.ruleblock.clear()
+    student.ruleblock[ruleblock.name] = ruleblock
+    error = 0.0
+    for row, outputs in zip(rows, create('plan', student).process_batch(
+            [row[:2] for row in rows])):
+        error += abs(outputs[0] - row[2]) if outputs[0] == outputs[0] else 100.0
+    error /= len(rows)
+    print('mean absolute error of the learned engine: %.3f' % error)
+    if error > 10.0:
+        raise AssertionError('DIFFERENT engine learned, with mean absolute error %r' % error)
+    compact = learner.ruleblock(compact=True)
+    if [str(rule) for rule in compact] != [str(rule) for rule in ruleblock]:
+        raise AssertionError('DIFFERENT rules in the compact ruleblock')
+    print('Wang-Mendel is just FINE :)')
@@ -0,0 +1,164 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+import time
+
+from fl import backend
+from fl.fcl import FCLExporter, FCLImporter
+from fl.stats import Stats
+
+class Loop(object):
+    '''Runs an engine at a fixed rate, from a sensor to an actuator.
+
+    Each tick reads a row of inputs from the sensor, evaluates the engine, and
+    passes the row of outputs to the actuator. Ticks are scheduled every period
+    from the start, and a tick misses its deadline when it finishes after the
+    start of the next one. Ticks that could not even start before their deadline
+    are skipped to catch up, instead of running late one after the other.
+
+    Python cannot interrupt an evaluation in progress, so the policies react to
+    a miss in the ticks that follow:
+        none: always evaluate the engine.
+        reuse: on the tick after a miss, pass the last outputs to the actuator
+               without reading the sensor or evaluating the engine.
+        fallback: after a miss, evaluate with the fallback backend until
+                  recover ticks in a row meet their deadline.
+
+    Attributes:
+        engine: the engine to evaluate.
+        sensor: a function returning the row of inputs, in the order of engine.input.
+        actuator: a function taking the row of outputs, in the order of engine.output.
+        rate: the number of ticks per second.
+        period: the seconds between ticks.
+        policy: one of the policies above.
+        primary: the backend evaluating the engine.
+        fallback: the cheaper backend of the fallback policy, e.g. a Lookup.
+        recover: the ticks in a row within the deadline to return to the primary.
+        stats: a Stats whose process histogram is the latency of the ticks.
+        counters: a dictionary with the number of ticks, misses, skipped, reused
+                  and fallback ticks.
+        outputs: the last row of outputs.
+    '''
+
+    policies = ('none', 'reuse', 'fallback')
+
+    clock = staticmethod(time.perf_counter)
+    sleep = staticmethod(time.sleep)
+
+    def __init__(self, engine, sensor, actuator, rate, policy='none', fallback=None,
+                 primary='plan', recover=10, buckets=None):
+        if policy not in self.policies:
+            raise ValueError('unknown policy <%s>, only %s are available'
+                             % (policy, self.policies))
+        if policy == 'fallback' and fallback is None:
+            raise ValueError('the fallback policy requires a fallback backend')
+        self.engine = engine
+        self.sensor = sensor
+        self.actuator = actuator
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.policy = policy
+        self.primary = backend.create(primary, engine) if isinstance(primary, str) else primary
+        self.fallback = fallback
+        self.recover = recover
+        self.stats = Stats(buckets)
+        self.reset()
+
+    def reset(self):
+        self.counters = {'ticks': 0, 'misses': 0, 'skipped': 0, 'reused': 0, 'fallback': 0}
+        self.stats.reset()
+        self.outputs = None
+        self.missed = False
+        self.degraded = False
+        self.streak = 0
+
+    def tick(self):
+        '''Runs one tick and returns its latency in seconds.'''
+        clock = self.clock
+        start = clock()
+        if self.policy == 'reuse' and self.missed and self.outputs is not None:
+            self.counters['reused'] += 1
+        else:
+            current = self.fallback if self.degraded else self.primary
+            if self.degraded:
+                self.counters['fallback'] += 1
+            self.outputs = current.process(self.sensor())
+        self.actuator(self.outputs)
+        latency = clock() - start
+        self.stats.observe(latency)
+        self.counters['ticks'] += 1
+        return latency
+
+    def run(self, ticks=None, duration=None):
+        '''Runs the loop for a number of ticks or seconds (or until interrupted).
+
+        Returns:
+            the counters.'''
+        clock = self.clock
+        begin = clock()
+        scheduled = 0
+        while ((ticks is None or self.counters['ticks'] < ticks)
+               and (duration is None or clock() - begin < duration)):
+            deadline = begin + (scheduled + 1) * self.period
+            now = clock()
+            if now >= deadline:
+                late = int((now - deadline) / self.period) + 1
+                self.counters['skipped'] += late
+                scheduled += late
+                continue
+            wait = begin + scheduled * self.period - now
+            if wait > 0:
+                self.sleep(wait)
+            self.tick()
+            self.missed = clock() > deadline
+            if self.missed:
+                self.counters['misses'] += 1
+                self.streak = 0
+                if self.policy == 'fallback':
+                    self.degraded = True
+            else:
+                self.streak += 1
+                if self.degraded and self.streak >= self.recover:
+                    self.degraded = False
+            scheduled += 1
+        return dict(self.counters)
+
+    def report(self):
+        '''Returns the counters and the latency histogram as a dictionary.'''
+        result = dict(self.counters)
+        result['latency'] = self.stats.as_dict()['process']
+        return result
+
+def coarse(engine, divisions, name='plan'):
+    '''Returns a backend on a copy of the engine whose defuzzifiers use fewer
+    divisions, as a cheaper fallback.'''
+    copy = FCLImporter().engine(FCLExporter().engine(engine))
+    for variable in copy.output.values():
+        variable.defuzzifier.divisions = divisions
+    return backend.create(name, copy)
+
+if __name__ == '__main__':
+    import os, random, sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    fe = simple_ai_boat()
+    generator = random.Random(0)
+    def sensor():
+        if generator.random() < 0.05: #an occasional hiccup longer than the period
+            time.sleep(0.003)
+        return [generator.uniform(-100, 100), generator.uniform(0, 2000)]
+    outputs = []
+    fallbacks = {'reuse': None, 'fallback': backend.Lookup(fe), 'none': None}
+    for policy in ('none', 'reuse', 'fallback'):
+        generator.seed(0)
+        loop = Loop(fe, sensor, outputs.append, rate=500, policy=policy,
+                    fallback=fallbacks[policy])
+        loop.run(ticks=200)
+        report = loop.report()
+        print('%-8s %s' % (policy, ', '.join('%s=%i' % (key, report[key])
+                                             for key in sorted(loop.counters))))
+    print('latency histogram: %s' % report['latency']['histogram'])
+    print('coarse fallback: %s' % coarse(fe, 20).process([30.0, 1000.0]))
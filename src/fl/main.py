@@ -2,27 +2,229 @@
 Created on 10/10/2012
 
 @author: jcrada
+
+Command line interface of the library:
+
+    python -m fl score engine.fcl [input.csv|input.ndjson|-] [--output file]
+                       [--format csv|ndjson] [--chunk-size 1000] [--workers 0]
+                       [--backend plan] [--remote host:port ...]
+    python -m fl worker [--host 127.0.0.1] [--port 7070] [--backend plan]
+
+The input rows are read as CSV with a header naming the input variables, or as
+NDJSON objects with the input variables as keys. Each row is written back in the
+same format with the values of the output variables added. With --remote, the
+chunks are evaluated by workers started with the worker command (see fl.cluster).
 '''
 
-class Something:
-    
-    def __init__(self, n):
-        self.n = n
-        self.do = 'da bi da'
-
-    def __iter__(self):
-        return self
-    
-    def __next__(self):
-        print('next called')
-        if self.n > 10: raise StopIteration
-        self.n += 1
-        return self.n
-    
-    def do(self):
-        print('do bi do')
-
-if __name__ == '__main__':
-    x = Something(0)
-    x.do()
-    
\ No newline at end of file
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+
+from fl import backend
+from fl.fcl import FCLImporter
+from fl.variable import missing
+
+class Reader(object):
+    '''Iterates the rows of inputs of a CSV or NDJSON stream, in chunks.
+
+    Attributes:
+        stream: the text stream.
+        format: 'csv' or 'ndjson'.
+        names: the names of the input variables, in the order of the rows.
+        fields: the names of the fields of the records (known after the first one
+                for NDJSON).
+    '''
+
+    def __init__(self, stream, format, names):
+        self.stream = stream
+        self.format = format
+        self.names = list(names)
+        self.count = 0
+        if format == 'csv':
+            self.records = csv.DictReader(stream)
+            self.fields = list(self.records.fieldnames or [])
+            missing = [name for name in self.names if name not in self.fields]
+            if missing:
+                raise ValueError('input variables %s not found in the header %s'
+                                 % (missing, self.fields))
+        else:
+            self.records = (json.loads(line) for line in stream if line.strip())
+            self.fields = None
+
+    def chunks(self, size):
+        '''Yields lists of at most size (records, rows of inputs).
+
+        Raises:
+            ValueError: if an input variable is missing or not a number in a record,
+                        which is numbered from 1.'''
+        while True:
+            records = list(itertools.islice(self.records, size))
+            if not records:
+                return
+            if self.fields is None:
+                self.fields = list(records[0])
+            rows = []
+            for record in records:
+                self.count += 1
+                row = []
+                for name in self.names:
+                    try:
+                        row.append(float(record[name]))
+                    except KeyError:
+                        raise ValueError('input variable %s not found in record %i'
+                                         % (name, self.count))
+                    except (ValueError, TypeError):
+                        raise ValueError('invalid value %r of input variable %s in '
+                                         'record %i' % (record[name], name, self.count))
+                rows.append(row)
+            yield records, rows
+
+class Writer(object):
+    '''Writes the records with the values of the outputs in CSV or NDJSON.'''
+
+    def __init__(self, stream, format, names):
+        self.stream = stream
+        self.format = format
+        self.names = list(names)
+        self.writer = None
+
+    def write(self, records, results, fields):
+        if self.format == 'csv':
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.stream, fields + [name for name in
+                                             self.names if name not in fields])
+                self.writer.writeheader()
+            for record, outputs in zip(records, results):
+                record.update(zip(self.names, outputs))
+                self.writer.writerow(record)
+        else:
+            for record, outputs in zip(records, results):
+                #nan is not valid JSON, so outputs without rules fired are null
+                record.update((name, None if missing(y) else y)
+                              for name, y in zip(self.names, outputs))
+                self.stream.write(json.dumps(record) + '\n')
+
+#the backend of each worker process, set by _initialize
+_worker = None
+
+def _initialize(fcl, name):
+    global _worker
+    _worker = backend.create(name, FCLImporter().engine(fcl))
+
+def _process(rows):
+    return _worker.process_batch(rows)
+
+def evaluate(chunks, fcl, name, workers, remote=None):
+    '''Yields (records, results) for each chunk of (records, rows), in order.
+
+    With workers, at most two chunks per worker are in flight, such that memory
+    does not grow with the size of the input. With the addresses of remote workers,
+    the chunks are sharded among them (see fl.cluster.Coordinator), which evaluate
+    with the named backend, or their own if name is None.'''
+    if remote:
+        from fl.cluster import Coordinator
+        pending = []
+        def rows():
+            for records, rows in chunks:
+                pending.append(records)
+                yield rows
+        for results in Coordinator(remote, fcl, backend=name).evaluate(rows()):
+            yield pending.pop(0), results
+        return
+    if name is None:
+        name = 'plan'
+    if not workers:
+        instance = backend.create(name, FCLImporter().engine(fcl))
+        for records, rows in chunks:
+            yield records, instance.process_batch(rows)
+        return
+    pool = multiprocessing.Pool(workers, _initialize, (fcl, name))
+    try:
+        pending = []
+        for records, rows in chunks:
+            pending.append((records, pool.apply_async(_process, (rows,))))
+            if len(pending) >= 2 * workers:
+                records, result = pending.pop(0)
+                yield records, result.get()
+        for records, result in pending:
+            yield records, result.get()
+    finally:
+        pool.terminate()
+
+def score(args):
+    with open(args.fcl) as stream:
+        fcl = stream.read()
+    fe = FCLImporter().engine(fcl)
+    format = args.format
+    if format is None:
+        format = 'ndjson' if args.input.endswith(('.ndjson', '.jsonl')) else 'csv'
+    source = sys.stdin if args.input == '-' else open(args.input, newline='')
+    target = sys.stdout if args.output is None else open(args.output, 'w', newline='')
+    try:
+        reader = Reader(source, format, fe.input)
+        writer = Writer(target, format, fe.output)
+        count = 0
+        start = time.perf_counter()
+        for records, results in evaluate(reader.chunks(args.chunk_size), fcl,
+                                         args.backend, args.workers, args.remote):
+            writer.write(records, results, reader.fields)
+            count += len(records)
+        target.flush()
+        elapsed = time.perf_counter() - start
+    finally:
+        if source is not sys.stdin: source.close()
+        if target is not sys.stdout: target.close()
+    sys.stderr.write('scored %i rows in %.3f s (%.0f rows/s)\n'
+                     % (count, elapsed, count / elapsed if elapsed > 0 else 0.0))
+    return 0
+
+def work(args):
+    from fl.cluster import Worker
+    worker = Worker((args.host, args.port), args.backend)
+    sys.stderr.write('worker listening on %s:%i\n' % worker.server_address[:2])
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.server_close()
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fl')
+    commands = parser.add_subparsers(dest='command')
+    command = commands.add_parser('score', help='evaluates an engine on rows of inputs')
+    command.add_argument('fcl', help='the FCL file of the engine')
+    command.add_argument('input', nargs='?', default='-',
+                         help='the CSV or NDJSON file of inputs (default stdin)')
+    command.add_argument('--output', help='the file to write (default stdout)')
+    command.add_argument('--format', choices=('csv', 'ndjson'),
+                         help='the format of the input and output (default by extension, '
+                         'or csv)')
+    command.add_argument('--chunk-size', type=int, default=1000)
+    command.add_argument('--workers', type=int, default=0)
+    command.add_argument('--backend', choices=list(backend.backends),
+                         help='the backend to evaluate with (default plan, or that of '
+                         'each remote worker)')
+    command.add_argument('--remote', nargs='+', metavar='host:port',
+                         help='the addresses of workers to evaluate the chunks')
+    command = commands.add_parser('worker', help='evaluates chunks sent by coordinators')
+    command.add_argument('--host', default='127.0.0.1')
+    command.add_argument('--port', type=int, default=7070)
+    command.add_argument('--backend', default='plan', choices=list(backend.backends))
+    args = parser.parse_args(argv)
+    if args.command == 'score':
+        if args.chunk_size < 1:
+            parser.error('the chunk size must be positive')
+        try:
+            return score(args)
+        except (SyntaxError, ValueError) as error: #e.g., an invalid FCL or input
+            parser.exit(1, '%s: error: %s\n' % (parser.prog, error))
+    if args.command == 'worker':
+        return work(args)
+    parser.print_help()
+    return 2
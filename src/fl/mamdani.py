@@ -5,6 +5,7 @@ Created on 31/10/2012
 '''
 
 from fl.rule import Rule, FuzzyAntecedent, FuzzyConsequent 
+from fl.operator import absorbing_element
 from fl.parser import Parser
 import re
 class MamdaniRule(Rule):
@@ -44,9 +45,23 @@ class MamdaniRule(Rule):
 
 
 class MamdaniAntecedent(FuzzyAntecedent):
-    '''A Fuzzy Antecedent as an expression tree.'''
+    '''A Fuzzy Antecedent as an expression tree.
+    
+    The evaluation of an operator stops after its first operand if that operand
+    is the absorbing element of the norm (e.g. 0.0 for Min, 1.0 for Max). 
+    Optionally, the operands of each operator are profiled during a warm-up
+    window, after which the operand most often absorbing is evaluated first.
+    
+    Attributes:
+        root: the root node of the expression tree.
+        warmup: the number of evaluations of each operator to profile before
+                reordering its operands, or 0 to disable profiling.
+        counters: a list with the number of propositions evaluated, the number 
+                  of propositions skipped, and the number of short-circuits.'''
     def __init__(self):
         self.root = None
+        self.warmup = 0
+        self.counters = [0, 0, 0]
     
     class Proposition:
         def __init__(self):
@@ -66,6 +81,10 @@ class MamdaniAntecedent(FuzzyAntecedent):
             self.operator = operator
             self.left = None
             self.right = None
+            self.size = None # number of propositions below this node
+            self.first = 0 # 0 to evaluate the left operand first, 1 for the right
+            self.visits = 0
+            self.absorbed = [0, 0] # times each operand was the absorbing element
 
         def __str__(self):
             return str(self.operator)
@@ -75,6 +94,7 @@ class MamdaniAntecedent(FuzzyAntecedent):
         if node is None: 
             node = self.root
         if isinstance(node, MamdaniAntecedent.Proposition):
+            self.counters[0] += 1
             result = node.term.membership(node.variable.input)
             for hedge in node.hedges:
                 result = hedge.apply(result)
@@ -83,15 +103,59 @@ class MamdaniAntecedent(FuzzyAntecedent):
             if not (node.left or node.right):
                 raise ValueError('left and right operands must exist')
             if node.operator == Rule.FR_AND:
-                return tnorm(self.firing_strength(tnorm, snorm, node=node.left),
-                             self.firing_strength(tnorm, snorm, node=node.right))
-                #return tnorm(self.firing_strength(tnorm, snorm, node=self.left),  # TODO:  Is the previous change right????
-                #            self.firing_strength(tnorm, snorm, node=self.right))
+                norm = tnorm
             elif node.operator == Rule.FR_OR:
-                return snorm(self.firing_strength(tnorm, snorm, node=self.left),
-                             self.firing_strength(tnorm, snorm, node=self.right))
+                norm = snorm
             else: raise ValueError('unknown operator %s' % node.operator)
+            absorbing = absorbing_element.get(norm)
+            operands = (node.left, node.right)
+            if node.visits < self.warmup:
+                node.visits += 1
+                a = self.firing_strength(tnorm, snorm, node=operands[0])
+                b = self.firing_strength(tnorm, snorm, node=operands[1])
+                if a == absorbing: node.absorbed[0] += 1
+                if b == absorbing: node.absorbed[1] += 1
+                if node.visits == self.warmup:
+                    node.first = 1 if node.absorbed[1] > node.absorbed[0] else 0
+                return norm(a, b)
+            first = operands[node.first]
+            second = operands[1 - node.first]
+            a = self.firing_strength(tnorm, snorm, node=first)
+            if a == absorbing:
+                self.counters[1] += self.size(second)
+                self.counters[2] += 1
+                return a
+            b = self.firing_strength(tnorm, snorm, node=second)
+            return norm(a, b) if node.first == 0 else norm(b, a)
         else: raise TypeError('unexpected node type %s' % type(node))
+    
+    def size(self, node):
+        '''Returns the number of propositions in the tree rooted at node.'''
+        if isinstance(node, MamdaniAntecedent.Proposition):
+            return 1
+        if node.size is None:
+            node.size = self.size(node.left) + self.size(node.right)
+        return node.size
+    
+    def profile(self, warmup=100, node=None):
+        '''Restarts the profiling of the operands of every operator.
+        
+        Args:
+            warmup: the number of evaluations of each operator before reordering its 
+                    operands, or 0 to keep the current order.'''
+        if node is None:
+            node = self.root
+            self.warmup = warmup
+        if isinstance(node, MamdaniAntecedent.Operator):
+            node.visits = 0
+            node.absorbed = [0, 0]
+            self.profile(warmup, node.left)
+            self.profile(warmup, node.right)
+    
+    def statistics(self):
+        '''Returns a dictionary with the evaluation counters.'''
+        return {'evaluated': self.counters[0], 'skipped': self.counters[1],
+                'shortcircuits': self.counters[2]}
         
         
     
@@ -179,10 +243,12 @@ class MamdaniAntecedent(FuzzyAntecedent):
         if isinstance(node, MamdaniAntecedent.Proposition):
             return str(node)
         result = []
-        result.append(self.str_infix(node=node.left))
-        result.append(str(node))
-        result.append(self.str_infix(node=node.right))
-        return ' '.join(result)
+        for child in (node.left, node.right):
+            if isinstance(child, MamdaniAntecedent.Proposition):
+                result.append(str(child))
+            else: #parentheses preserve the structure regardless of precedence
+                result.append('(%s)' % self.str_infix(node=child))
+        return (' %s ' % node).join(result)
      
     def str_postfix(self, node=None):
         if node is None: node = self.root
@@ -198,15 +264,19 @@ class MamdaniAntecedent(FuzzyAntecedent):
         return self.str_postfix()
 
 from fl.term import Output
+from fl.trace import tracer
 class MamdaniConsequent(FuzzyConsequent):
     '''A Mamdani consequent of the form <variable> is [hedges] <term> [with <weight>].'''
 
     class Proposition:
+        __slots__ = ('variable', 'hedges', 'term', 'weight', 'output')
+        
         def __init__(self):
             self.variable = None
             self.hedges = []
             self.term = None
             self.weight = 1.0
+            self.output = None #the Output appended every time the rule fires
         
         def __str__(self):
             result = [self.variable.name, Rule.FR_IS]
@@ -214,9 +284,11 @@ class MamdaniConsequent(FuzzyConsequent):
             if self.term is not None: #if hedge == 'any', term is None
                 result.append(self.term.name)
             if self.weight != 1.0:
-                self.append('%s %f' % (Rule.FR_WITH, self.weight))
+                result.append('%s %r' % (Rule.FR_WITH, self.weight))
             return ' '.join(result)
 
+    __slots__ = ('propositions',)
+    
     def __init__(self):
         FuzzyConsequent.__init__(self)
         self.propositions = []
@@ -225,16 +297,25 @@ class MamdaniConsequent(FuzzyConsequent):
         return (' %s ' % Rule.FR_AND).join([str(prop) for prop in self.propositions])
 
     def fire(self, strength, activation):
-        self.logger.debug('Firing at %s Rule: %s' % (strength, self))
+        if tracer.rule:
+            tracer.emit('rule', 'fired', strength=strength, consequent=self)
             
         for proposition in self.propositions:
-            term = Output(proposition.term)
+            term = proposition.output
+            if term is None or term.term is not proposition.term:
+                term = proposition.output = Output(proposition.term)
+            else: #the shape of the term may have been tuned since
+                term.minimum = proposition.term.minimum
+                term.maximum = proposition.term.maximum
             alphacut = strength * proposition.weight
             for hedge in proposition.hedges: 
                 alphacut = hedge.apply(alphacut)
             term.alphacut = alphacut
             term.activation = activation
             proposition.variable.output.append(term)
+            if tracer.rule:
+                tracer.emit('rule', 'appended', variable=proposition.variable.name,
+                            term=proposition.term.name, alphacut=alphacut)
             
 
     def parse(self, infix, engine):
@@ -320,6 +401,19 @@ if __name__ == '__main__':
     rule = MamdaniRule.parse(infix, fe)
     print(rule) 
     
+    import os, sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    fe = simple_ai_boat()
+    ruleblock = fe.ruleblock[None]
+    ruleblock.profile(warmup=50)
+    for location in range(0, 2001, 10):
+        for relative in range(-100, 101, 10):
+            fe.input['location'].input = location
+            fe.input['relative_location'].input = relative
+            fe.process()
+    print(ruleblock.statistics())
+    
     
     
     
@@ -0,0 +1,386 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Out-of-core evaluation of an engine over arrays of inputs in files mapped in
+memory, chunk by chunk, e.g.:
+
+    python -m fl.mapped engine.fcl inputs.npy outputs.npy [--chunk-size 10000]
+                        [--backend plan] [--dtype <f8] [--restart]
+
+The inputs are a .npy file of shape (rows, inputs), or a raw binary file of rows of
+the given dtype. The outputs are written to a .npy file of shape (rows, outputs) of
+little-endian doubles, or a raw one if the name does not end in .npy. The rows done
+are recorded next to the outputs, such that an interrupted evaluation resumes from
+them.
+'''
+
+import argparse
+import ast
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+from fl import backend
+from fl.variable import numeric
+
+MAGIC = b'\x93NUMPY'
+
+#dtypes of the arrays, as typecode of array and whether the bytes need swapping
+dtypes = {}
+for order in '<>=':
+    for descr, typecode in (('f8', 'd'), ('f4', 'f')):
+        swap = order != '=' and (order == '<') != (sys.byteorder == 'little')
+        dtypes[order + descr] = (typecode, swap)
+
+def read_header(f):
+    '''Returns the (shape, dtype, offset of the data) of the .npy file.'''
+    magic = f.read(8)
+    if magic[:6] != MAGIC:
+        raise ValueError('expected a .npy file, but found the magic %r' % magic[:6])
+    major = magic[6]
+    if major == 1:
+        size, = struct.unpack('<H', f.read(2))
+    elif major in (2, 3):
+        size, = struct.unpack('<I', f.read(4))
+    else:
+        raise ValueError('unsupported .npy format version %i.%i' % (major, magic[7]))
+    text = f.read(size).decode('latin1' if major < 3 else 'utf-8')
+    try:
+        header = ast.literal_eval(text)
+        shape, dtype = tuple(header['shape']), header['descr']
+        fortran = header['fortran_order']
+    except (SyntaxError, ValueError, KeyError, TypeError):
+        raise ValueError('invalid .npy header <%s>' % text.strip())
+    if fortran and len(shape) > 1:
+        raise ValueError('expected an array in C order, but found Fortran order')
+    if len(shape) == 1:
+        shape = (shape[0], 1)
+    if len(shape) != 2:
+        raise ValueError('expected an array of one or two dimensions, but found %s'
+                         % (shape,))
+    return shape, dtype, f.tell()
+
+def write_header(f, shape, dtype='<f8'):
+    '''Writes the header of a .npy file, of version 1.0, and returns its size.'''
+    text = "{'descr': '%s', 'fortran_order': False, 'shape': (%i, %i), }" % (
+        (dtype,) + tuple(shape))
+    #the data starts at a multiple of 64 bytes, after a newline
+    padding = -(len(MAGIC) + 4 + len(text) + 1) % 64
+    text += ' ' * padding + '\n'
+    f.write(MAGIC + b'\x01\x00' + struct.pack('<H', len(text)) + text.encode('latin1'))
+    return len(MAGIC) + 4 + len(text)
+
+class Array(object):
+    '''A two dimensional array of floats stored in rows in a file, mapped in memory.
+
+    Only the pages of the rows being read or written are resident, and they are
+    released after each chunk (see release), so the memory used does not depend
+    on the size of the file.
+
+    Attributes:
+        path: the path of the file.
+        shape: the (rows, columns) of the array.
+        dtype: the dtype of the values, e.g. '<f8'.
+        offset: the position of the first value in the file.
+        writable: whether the array can be written.
+    '''
+
+    def __init__(self, path, shape, dtype='<f8', offset=0, writable=False):
+        if dtype not in dtypes:
+            raise ValueError('unsupported dtype <%s>, only %s are supported'
+                             % (dtype, sorted(dtypes)))
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.offset = offset
+        self.writable = writable
+        self.typecode, self.swap = dtypes[dtype]
+        self.itemsize = array(self.typecode).itemsize
+        self.file = open(path, 'r+b' if writable else 'rb')
+        size = offset + self.shape[0] * self.shape[1] * self.itemsize
+        if os.fstat(self.file.fileno()).st_size < size:
+            self.file.close()
+            raise ValueError('file <%s> has fewer bytes than %i rows of %i values'
+                             % ((path,) + self.shape))
+        if size > 0:
+            self.map = mmap.mmap(self.file.fileno(), size,
+                                 access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        else:
+            self.map = None
+
+    @classmethod
+    def load(cls, path, columns=None, dtype='<f8'):
+        '''Returns the array of the .npy file, or of the raw file of rows of columns
+        values of dtype.'''
+        if path.endswith('.npy'):
+            with open(path, 'rb') as f:
+                shape, dtype, offset = read_header(f)
+            return cls(path, shape, dtype, offset)
+        if not columns:
+            raise ValueError('expected the number of columns of the raw file <%s>' % path)
+        itemsize = array(dtypes[dtype][0]).itemsize if dtype in dtypes else 1
+        size = os.path.getsize(path)
+        if size % (columns * itemsize):
+            raise ValueError('file <%s> of %i bytes is not made of rows of %i values of '
+                             '%s' % (path, size, columns, dtype))
+        return cls(path, (size // (columns * itemsize), columns), dtype)
+
+    @classmethod
+    def create(cls, path, shape):
+        '''Returns a writable array of little-endian doubles in a new file, a .npy
+        file if the path ends in .npy or else a raw one, of zeros.'''
+        with open(path, 'wb') as f:
+            offset = write_header(f, shape) if path.endswith('.npy') else 0
+            f.truncate(offset + shape[0] * shape[1] * 8)
+        return cls(path, shape, '<f8', offset, True)
+
+    def span(self, start, stop):
+        '''Returns the positions in the file of the bytes of the rows in [start, stop).'''
+        width = self.shape[1] * self.itemsize
+        return self.offset + start * width, self.offset + stop * width
+
+    def read(self, start, stop):
+        '''Returns the list of rows in [start, stop) as lists of floats.'''
+        first, last = self.span(start, stop)
+        values = array(self.typecode, self.map[first:last])
+        if self.swap:
+            values.byteswap()
+        columns = self.shape[1]
+        values = values.tolist()
+        return [values[i:i + columns] for i in range(0, len(values), columns)]
+
+    def write(self, start, rows):
+        '''Writes the rows of floats from the row start (see numeric).'''
+        values = array(self.typecode, [numeric(x) for row in rows for x in row])
+        if self.swap:
+            values.byteswap()
+        first, last = self.span(start, start + len(rows))
+        self.map[first:last] = values.tobytes()
+
+    def release(self, start, stop):
+        '''Writes the rows in [start, stop) to the file, if writable, and lets the
+        system reclaim their pages.'''
+        if self.map is None:
+            return
+        first, last = self.span(start, stop)
+        first -= first % mmap.ALLOCATIONGRANULARITY
+        if last <= first:
+            return
+        if self.writable:
+            self.map.flush(first, last - first)
+        if hasattr(self.map, 'madvise'):
+            self.map.madvise(mmap.MADV_DONTNEED, first, last - first)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Progress(object):
+    '''The rows done of an evaluation, stored in a file next to the outputs such
+    that an interrupted evaluation resumes from them.
+
+    Attributes:
+        path: the path of the file, i.e., the path of the outputs and '.progress'.
+        key: a dictionary identifying the evaluation: the inputs, their shape and
+             size, and the FCL digest of the engine.
+        rows: the number of rows done.
+    '''
+
+    def __init__(self, outputs, key):
+        self.path = outputs + '.progress'
+        self.key = key
+        self.rows = 0
+
+    def resume(self):
+        '''Returns the rows done by a previous evaluation with the same key, or 0.
+
+        Raises:
+            ValueError: if the previous evaluation had a different key.'''
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path) as f:
+            previous = json.load(f)
+        if previous.get('key') != self.key:
+            raise ValueError('the progress in <%s> belongs to another evaluation, '
+                             'restart it to discard the progress' % self.path)
+        self.rows = previous['rows']
+        return self.rows
+
+    def save(self, rows):
+        '''Records the rows done, replacing the file atomically.'''
+        self.rows = rows
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({'key': self.key, 'rows': rows}, f)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def evaluate(engine, inputs, outputs, chunk_size=10000, name='plan', columns=None,
+             dtype='<f8', restart=False, progress=None):
+    '''Evaluates the engine on every row of the inputs file, and writes the outputs
+    file, in chunks of chunk_size rows.
+
+    The progress is recorded after each chunk is written, and removed once every
+    row is done, so an interrupted evaluation resumes from the last chunk written
+    unless restarted.
+
+    Args:
+        engine: the engine to evaluate.
+        inputs: the path of a .npy file, or of a raw file of rows of columns values.
+        outputs: the path of the file of outputs (see Array.create).
+        chunk_size: the number of rows evaluated at once, which bounds the memory.
+        name: the name of the backend.
+        columns: the number of values per row of a raw file of inputs.
+        dtype: the dtype of the values of a raw file of inputs.
+        restart: whether to discard the progress of a previous evaluation.
+        progress: a function called with the rows done and the total after each
+                  chunk, or None.
+    Returns:
+        the number of rows evaluated by this call.'''
+    from fl.cluster import digest
+    from fl.fcl import FCLExporter
+    if chunk_size < 1:
+        raise ValueError('the chunk size must be positive, but found %i' % chunk_size)
+    with Array.load(inputs, columns, dtype) as source:
+        total, width = source.shape
+        if width != len(engine.input):
+            raise ValueError('expected %i input values per row, but found %i in <%s>'
+                             % (len(engine.input), width, inputs))
+        shape = (total, len(engine.output))
+        state = Progress(outputs, {'inputs': os.path.abspath(inputs), 'shape': list(shape),
+                                   'size': os.path.getsize(inputs),
+                                   'engine': digest(FCLExporter().engine(engine)).hex()})
+        if restart:
+            state.remove()
+        start = state.resume()
+        if start:
+            target = Array.load(outputs, shape[1])
+            target.close()
+            if target.shape != shape:
+                raise ValueError('outputs <%s> of shape %s, but expected %s'
+                                 % ((outputs, target.shape, shape)))
+            target = Array(outputs, shape, target.dtype, target.offset, True)
+        else:
+            target = Array.create(outputs, shape)
+        with target:
+            instance = backend.create(name, engine)
+            for first in range(start, total, chunk_size):
+                last = min(first + chunk_size, total)
+                target.write(first, instance.process_batch(source.read(first, last)))
+                target.release(first, last)
+                source.release(first, last)
+                state.save(last)
+                if progress is not None:
+                    progress(last, total)
+        state.remove()
+        return total - start
+
+def main(argv=None):
+    from fl.fcl import FCLImporter
+    parser = argparse.ArgumentParser(prog='python -m fl.mapped')
+    parser.add_argument('fcl', help='the FCL file of the engine')
+    parser.add_argument('inputs', help='the .npy or raw file of inputs')
+    parser.add_argument('outputs', help='the .npy or raw file of outputs to write')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--backend', default='plan', choices=list(backend.backends))
+    parser.add_argument('--dtype', default='<f8', choices=sorted(dtypes),
+                        help='the dtype of a raw file of inputs')
+    parser.add_argument('--restart', action='store_true',
+                        help='discard the progress of an interrupted evaluation')
+    args = parser.parse_args(argv)
+
+    with open(args.fcl) as f:
+        engine = FCLImporter().engine(f)
+    start = time.perf_counter()
+    def report(done, total):
+        elapsed = time.perf_counter() - start
+        sys.stderr.write('\r%i/%i rows (%.1f%%) in %.1f s' % (done, total,
+                         100.0 * done / total, elapsed))
+        sys.stderr.flush()
+    try:
+        count = evaluate(engine, args.inputs, args.outputs, args.chunk_size, args.backend,
+                         len(engine.input), args.dtype, args.restart, report)
+    except KeyboardInterrupt:
+        sys.stderr.write('\ninterrupted, run again to resume\n')
+        return 130
+    elapsed = time.perf_counter() - start
+    sys.stderr.write('\nscored %i rows in %.3f s (%.0f rows/s)\n'
+                     % (count, elapsed, count / elapsed if elapsed > 0 else 0.0))
+    return 0
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    import tempfile, tracemalloc
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    fe = simple_ai_boat()
+    directory = tempfile.mkdtemp()
+    inputs = os.path.join(directory, 'inputs.npy')
+    outputs = os.path.join(directory, 'outputs.npy')
+    rows = [[relative, location] for location in range(0, 2001, 10)
+            for relative in range(-100, 101, 10)]
+    with Array.create(inputs, (len(rows), 2)) as target:
+        target.write(0, rows)
+    expected = backend.create('plan', fe).process_batch(rows)
+    #interrupted after the third chunk, and resumed
+    def interrupt(done, total):
+        if done == 3000:
+            raise KeyboardInterrupt()
+    try:
+        evaluate(fe, inputs, outputs, 1000, progress=interrupt)
+    except KeyboardInterrupt:
+        pass
+    count = evaluate(fe, inputs, outputs, 1000)
+    if count != len(rows) - 3000 or os.path.exists(outputs + '.progress'):
+        raise AssertionError('DIFFERENT resumption: %i rows evaluated' % count)
+    with Array.load(outputs) as result:
+        values = result.read(0, len(rows))
+    for row, a, b in zip(rows, values, expected):
+        if not all(x == y or (x != x and y != y) for x, y in zip(a, b)):
+            raise AssertionError('DIFFERENT outputs at %s: %s != %s' % (row, a, b))
+    #without DEFAULT, the outputs where no rule fires are None, written as nan
+    from fl.fcl import FCLExporter, FCLImporter
+    gaps = FCLImporter().engine(FCLExporter().engine(fe).replace('DEFAULT : nan;\n', '')
+                                .replace('LeftShoulder (-85.0, -60.0)',
+                                         'Triangle (-110.0, -85.0, -60.0)'))
+    with Array.create(inputs, (2, 2)) as target:
+        target.write(0, [[-150.0, 1000.0], [0.0, 1000.0]])
+    evaluate(gaps, inputs, outputs, restart=True)
+    with Array.load(outputs) as result:
+        values = result.read(0, 2)
+    if values[0][0] == values[0][0] or values[1][0] != values[1][0]:
+        raise AssertionError('DIFFERENT outputs of the engine without default: %s' % values)
+    #the memory used depends on the chunk size, not on the number of rows
+    for copies in (1, 3):
+        with Array.create(inputs, (copies * len(rows), 2)) as target:
+            for i in range(copies):
+                target.write(i * len(rows), rows)
+        tracemalloc.start()
+        start = time.perf_counter()
+        evaluate(fe, inputs, outputs, 500, restart=True)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('%7i rows: peak %.0f kB (%.0f rows/s)' % (copies * len(rows), peak / 1e3,
+                                                       copies * len(rows) / elapsed))
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+    print('Mapped evaluation is just FINE :)')
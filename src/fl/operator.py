@@ -70,8 +70,22 @@ class FuzzyAccumulation(object):
         '''Normalized sum.'''
         return (a + b) / max(1, max(a, b))
 
+    @staticmethod
+    def Sum(a, b):
+        '''Unbounded sum, under which the centroid of the accumulation of scaled
+        terms is the average of their centroids weighted by their areas.'''
+        return a + b
 
 
+#Absorbing elements of the norms, that is, norm(absorbing, x) == absorbing for any x,
+#which allows skipping the evaluation of x. FuzzyOr.ASum is excluded because 
+#1.0 + x - (1.0 * x) is not exactly 1.0 in floating point.
+absorbing_element = {FuzzyAnd.Min: 0.0, FuzzyAnd.Prod: 0.0, FuzzyAnd.BDif: 0.0,
+                     FuzzyOr.Max: 1.0, FuzzyOr.BSum: 1.0}
 
-
-
+#Aggregations of the alphacuts of the outputs of the same term, for the pairs of
+#(accumulation, activation) under which accumulation(activation(mu, a), activation(mu, b))
+#is exactly activation(mu, aggregation(a, b)) for every membership mu in [0, 1], which 
+#allows accumulating each term once regardless of how many rules activate it.
+aggregation = {(FuzzyAccumulation.Max, FuzzyActivation.Min): max,
+               (FuzzyAccumulation.Max, FuzzyActivation.Prod): max}
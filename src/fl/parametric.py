@@ -0,0 +1,208 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from fl.plan import Plan
+
+class ParameterSpace(object):
+    '''The numeric parameters of the terms and rules of an engine that can vary.
+
+    Each parameter is addressed by a tuple:
+        ('input' or 'output', variable name, term name, attribute), where attribute
+            is one of the Term.parameters of the term, or
+        ('weight', ruleblock index, rule index, proposition index), for the weight
+            of a proposition of the consequent of a rule, where the ruleblocks are
+            indexed by their position in the engine, since their names may not
+            survive a round trip through FCL (e.g., None).
+    A point in the space is a list of floats in the order of the addresses.
+
+    Attributes:
+        engine: the engine whose terms and rules are parameterized.
+        addresses: a list of the addresses of the parameters.
+        targets: a list of (object, attribute) where each parameter is stored.
+        bounds: a list of (lower, upper) bounds of each parameter, where the vertices
+                of the terms range over their variable, weights over [0, 1], and
+                the other parameters over their value plus or minus the range of
+                their variable.
+    '''
+
+    def __init__(self, engine, addresses=None, weights=False):
+        self.engine = engine
+        if addresses is None:
+            addresses = []
+            for kind, variables in (('input', engine.input), ('output', engine.output)):
+                for name, variable in variables.items():
+                    for term in variable:
+                        addresses.extend((kind, name, term.name, attribute)
+                                         for attribute in term.parameters)
+            if weights:
+                for position, ruleblock in enumerate(engine.ruleblock.values()):
+                    for i, rule in enumerate(ruleblock):
+                        addresses.extend(('weight', position, i, j) for j in
+                                         range(len(rule.consequent.propositions)))
+        self.addresses = list(addresses)
+        self.targets = [self.target(address) for address in self.addresses]
+        self.bounds = [self.bound(address, target)
+                       for address, target in zip(self.addresses, self.targets)]
+
+    def target(self, address):
+        '''Returns the (object, attribute) where the parameter is stored.'''
+        kind, first, second, attribute = address
+        if kind == 'weight':
+            ruleblocks = list(self.engine.ruleblock.values())
+            if not 0 <= first < len(ruleblocks):
+                raise ValueError('engine has no ruleblock at position %r' % (first,))
+            rule = ruleblocks[first][second]
+            return (rule.consequent.propositions[attribute], 'weight')
+        variables = self.engine.input if kind == 'input' else self.engine.output
+        term = variables[first].term[second]
+        if attribute not in term.parameters:
+            raise ValueError('term <%s> has no parameter <%s>' % (second, attribute))
+        return (term, attribute)
+
+    def bound(self, address, target):
+        if address[0] == 'weight':
+            return (0.0, 1.0)
+        variables = self.engine.input if address[0] == 'input' else self.engine.output
+        variable = variables[address[1]]
+        minimum, maximum = variable.minimum(), variable.maximum()
+        for term in variable: #the first and last terms may not be the extremes
+            minimum = min(minimum, term.minimum)
+            maximum = max(maximum, term.maximum)
+        term, attribute = target
+        if attribute in term.vertices:
+            return (minimum, maximum)
+        value = getattr(term, attribute)
+        return (value - (maximum - minimum), value + (maximum - minimum))
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def get(self):
+        '''Returns the current values of the parameters.'''
+        return [getattr(target, attribute) for target, attribute in self.targets]
+
+    def set(self, values):
+        '''Assigns the values to the parameters of the terms and rules, and forgets
+        the outputs cached by Engine.evaluate().'''
+        if len(values) != len(self.addresses):
+            raise ValueError('expected %i values, but found %i'
+                             % (len(self.addresses), len(values)))
+        for (target, attribute), value in zip(self.targets, values):
+            setattr(target, attribute, value)
+        #the outputs cached by Engine.evaluate() depend on the parameters
+        if self.engine.demand is not None:
+            self.engine.demand.invalidate()
+
+    def repair(self, values):
+        '''Returns the values clipped to their bounds and with the vertices of each
+        term in non-decreasing order, keeping in place the vertices not in the space.'''
+        result = [min(max(value, lower), upper)
+                  for value, (lower, upper) in zip(values, self.bounds)]
+        indices = {}
+        for i, (target, attribute) in enumerate(self.targets):
+            if attribute in getattr(target, 'vertices', ()):
+                indices.setdefault(id(target), (target, {}))[1][attribute] = i
+        for term, free in indices.values():
+            order = sorted(result[free[attribute]] for attribute in term.vertices
+                           if attribute in free)
+            lower = float('-inf')
+            for position, attribute in enumerate(term.vertices):
+                if attribute in free:
+                    upper = min([getattr(term, fixed) for fixed in term.vertices[position:]
+                                 if fixed not in free] or [float('inf')])
+                    result[free[attribute]] = min(max(order.pop(0), lower), upper)
+                    lower = result[free[attribute]]
+                else:
+                    lower = max(lower, getattr(term, attribute))
+        return result
+
+
+class Parametric(object):
+    '''Evaluates one engine for many sets of term parameters at once.
+
+    The P parameter sets are stacked along an extra axis of the N rows of inputs,
+    such that the antecedents of the rules are evaluated by a single Plan over
+    columns of P x N values. Only the memberships of the propositions and the
+    defuzzification of each row depend on the parameters, which are assigned to
+    the terms once per parameter set and restored afterwards.
+
+    Attributes:
+        engine: the engine to evaluate.
+        space: the ParameterSpace of the parameter sets.
+        plan: the Plan sharing the rule structure among all the parameter sets.
+    '''
+
+    def __init__(self, engine, space=None):
+        self.engine = engine
+        self.space = space if space is not None else ParameterSpace(engine)
+        self.plan = Plan(engine)
+
+    def process_batch(self, parameter_sets, rows):
+        '''Evaluates the engine for every parameter set and row of inputs.
+
+        Args:
+            parameter_sets: a sequence of P lists of values of the parameter space.
+            rows: a sequence of N rows of inputs in the order of engine.input.
+        Returns:
+            a list of P lists of N rows of outputs in the order of engine.output.'''
+        engine = self.engine
+        plan = self.plan
+        count = len(rows)
+        columns = [[row[i] for row in rows] for i in range(len(engine.input))]
+        column_of = dict(zip(engine.input, columns))
+        outputs = list(engine.output.values())
+        original = self.space.get()
+        try:
+            values = [[] for _ in range(plan.size)]
+            for parameters in parameter_sets:
+                self.space.set(parameters)
+                for index, variable, term, hedges in plan.propositions:
+                    column = column_of[variable.name]
+                    if term is not None:
+                        mu = [term.membership(x) for x in column]
+                    else: mu = [0.0] * count
+                    for hedge in hedges:
+                        mu = [hedge.apply(y) for y in mu]
+                    values[index].extend(mu)
+            for index, norm, left, right in plan.operators:
+                values[index] = list(map(norm, values[left], values[right]))
+
+            result = []
+            for p, parameters in enumerate(parameter_sets):
+                self.space.set(parameters)
+                block = []
+                for row in range(p * count, (p + 1) * count):
+                    for variable in outputs:
+                        variable.output.clear()
+                    plan.fire_rules(values, None, row)
+                    block.append([variable.defuzzify() for variable in outputs])
+                result.append(block)
+            return result
+        finally:
+            self.space.set(original)
+
+
+if __name__ == '__main__':
+    import os, sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    from fl.backend import create
+    fe = simple_ai_boat()
+    space = ParameterSpace(fe, [('input', 'relative_location', 'BEHIND', 'middle_vertex'),
+                                ('input', 'relative_location', 'AHEAD', 'middle_vertex')])
+    parameter_sets = [[-40.0 + shift, 40.0 - shift] for shift in range(-10, 11, 5)]
+    rows = [[relative, location] for location in range(0, 2001, 100)
+            for relative in range(-100, 101, 20)]
+    results = Parametric(fe, space).process_batch(parameter_sets, rows)
+    reference = create('reference', fe)
+    for parameters, block in zip(parameter_sets, results):
+        space.set(parameters)
+        for row, a, b in zip(rows, block, reference.process_batch(rows)):
+            if not all(x == y or (x != x and y != y) for x, y in zip(a, b)):
+                raise AssertionError('DIFFERENT results for %s at %s: %s != %s'
+                                     % (parameters, row, a, b))
+    space.set([-40.0, 40.0])
+    print('%i parameter sets x %i rows are just FINE :)' % (len(parameter_sets), len(rows)))
@@ -54,6 +54,23 @@ class Parser:
     default_operators = Operator.default_operators()
     default_functions = Function.default_functions()
 
+    _separators = {}
+
+    @staticmethod
+    def separator(operators):
+        '''Returns the compiled regex that separates the operators in an expression,
+        which is cached by the masks of the operators.'''
+        masks = tuple(sorted([o.mask for o in operators.values()] + ['(', ')', ','],
+                             reverse=True))
+        cached = Parser._separators.get(masks)
+        if cached is None:
+            #masks are sorted such that ops like && be first to be separated instead of &
+            import re
+            regex = '|'.join([re.escape(sep) for sep in masks])
+            cached = re.compile('(' + regex + ')')
+            Parser._separators[masks] = cached
+        return cached
+
     @staticmethod
     def infix_to_postfix(infix, operators=default_operators,
                          functions=default_functions):
@@ -61,12 +78,7 @@ class Parser:
         Converts from infix notation to postfix using the Shunting yard algorithm
         as described in http://en.wikipedia.org/w/index.php?title=Shunting-yard_algorithm&oldid=516997362
         '''
-        separators = sorted([o.mask for o in operators.values()] + ['(', ')', ','],
-                          reverse=True)
-        #separate is sorted such that ops like && be first to be separated instead of &
-        import re
-        regex = '|'.join([re.escape(sep) for sep in separators])
-        infix = re.sub('(' + regex + ')' , r' \1 ', infix)
+        infix = Parser.separator(operators).sub(r' \1 ', infix)
         tokens = infix.split()
         from collections import deque
         queue = deque()
@@ -0,0 +1,223 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from fl.fam import FAM
+from fl.mamdani import MamdaniAntecedent
+from fl.rule import Rule
+
+class Plan(object):
+    '''An evaluation plan that shares common sub-expressions among rules.
+
+    The antecedents of every rule in every ruleblock of the engine are
+    interned into a single list of nodes. Identical propositions (same
+    variable, hedges and term) and identical sub-expressions (same operator
+    with the same norm over the same operands) are stored once, so each of
+    them is evaluated exactly once per call to evaluate(), regardless of how
+    many rules contain it.
+
+    Optionally, the grid-shaped rules of each ruleblock are stored in a FAM,
+    and only the remaining rules are interned.
+
+    The plan must be rebuilt whenever the rules or the operators of the
+    engine change (see Engine.compile).
+
+    Attributes:
+        engine: the engine evaluated by this plan.
+        fam: whether the grid-shaped rules are stored in FAM tables.
+        fams: a list of FAM of the grid-shaped rules of each ruleblock.
+        propositions: a list of (index, variable, term, hedges) of unique propositions.
+        operators: a list of (index, norm, left, right) of unique operator nodes
+                   in topological order, where left and right are node indices.
+        ruleblocks: a list of (ruleblock, [(rule, root index)]).
+        size: the number of unique nodes.
+        statistics: a dictionary counting occurrences of propositions and operators.
+    '''
+
+    def __init__(self, engine, fam=False):
+        self.engine = engine
+        self.fam = fam
+        self.fams = []
+        self.propositions = []
+        self.operators = []
+        self.ruleblocks = []
+        self.size = 0
+        self.statistics = {'rules': 0, 'propositions': 0, 'operators': 0}
+        self._index = {}
+        for ruleblock in engine.ruleblock.values():
+            rules = ruleblock
+            if fam:
+                table, rules = FAM.detect(ruleblock, engine.input.values())
+                if table is not None:
+                    self.fams.append(table)
+            roots = []
+            for rule in rules:
+                roots.append((rule, self.intern(rule.antecedent.root, ruleblock)))
+            self.statistics['rules'] += len(ruleblock)
+            self.ruleblocks.append((ruleblock, roots))
+        self.values = [0.0] * self.size
+
+    def intern(self, node, ruleblock):
+        '''Returns the index of the node, adding it (and its children) to the plan if new.'''
+        if isinstance(node, MamdaniAntecedent.Proposition):
+            self.statistics['propositions'] += 1
+            key = (id(node.variable), id(node.term), tuple(id(hedge) for hedge in node.hedges))
+            if key not in self._index:
+                self._index[key] = self.size
+                self.propositions.append((self.size, node.variable, node.term,
+                                          tuple(node.hedges)))
+                self.size += 1
+            return self._index[key]
+        elif isinstance(node, MamdaniAntecedent.Operator):
+            if not (node.left or node.right):
+                raise ValueError('left and right operands must exist')
+            if node.operator == Rule.FR_AND: norm = ruleblock.tnorm
+            elif node.operator == Rule.FR_OR: norm = ruleblock.snorm
+            else: raise ValueError('unknown operator %s' % node.operator)
+            self.statistics['operators'] += 1
+            left = self.intern(node.left, ruleblock)
+            right = self.intern(node.right, ruleblock)
+            # norms are commutative, so operands are sorted to share a and b with b and a
+            if right < left: left, right = right, left
+            key = (node.operator, norm, left, right)
+            if key not in self._index:
+                self._index[key] = self.size
+                self.operators.append((self.size, norm, left, right))
+                self.size += 1
+            return self._index[key]
+        else: raise TypeError('unexpected node type %s' % type(node))
+
+    def evaluate(self):
+        '''Computes the value of every unique node from the current inputs.'''
+        self.fuzzify()
+        return self.combine()
+
+    def fuzzify(self):
+        '''Computes the value of every unique proposition from the current inputs.'''
+        values = self.values
+        for index, variable, term, hedges in self.propositions:
+            mu = term.membership(variable.input) if term is not None else 0.0
+            for hedge in hedges:
+                mu = hedge.apply(mu)
+            values[index] = mu
+        return values
+
+    def combine(self):
+        '''Computes the value of every unique operator from the values of the propositions.'''
+        values = self.values
+        for index, norm, left, right in self.operators:
+            values[index] = norm(values[left], values[right])
+        return values
+
+    def evaluate_batch(self, columns):
+        '''Computes the column of values of every unique node for many inputs at once.
+
+        Args:
+            columns: a dictionary of input variable names to lists of crisp values.
+        Returns:
+            a list with the column of values of each node.'''
+        values = [None] * self.size
+        for index, variable, term, hedges in self.propositions:
+            column = columns[variable.name]
+            if term is not None:
+                mu = [term.membership(x) for x in column]
+            else: mu = [0.0] * len(column)
+            for hedge in hedges:
+                mu = [hedge.apply(y) for y in mu]
+            values[index] = mu
+        for index, norm, left, right in self.operators:
+            values[index] = list(map(norm, values[left], values[right]))
+        return values
+
+    def fire_rules(self, values=None, strengths=None, row=None):
+        '''Fires the rules of every ruleblock.
+
+        Args:
+            values, strengths: the node values and FAM cell strengths, or None
+                               to evaluate them from the current inputs.
+            row: the row to take from the columns of values and strengths
+                 computed by evaluate_batch() and FAM.strengths_batch().'''
+        if values is None:
+            values = self.evaluate()
+        for ruleblock, roots in self.ruleblocks:
+            if len(ruleblock) == 0:
+                raise ValueError('no rules to fire')
+            activation = ruleblock.activation
+            for rule, index in roots:
+                strength = values[index] if row is None else values[index][row]
+                if strength > 0.0:
+                    rule.fire(strength, activation)
+        for i, table in enumerate(self.fams):
+            if strengths is None:
+                table.fire(table.strengths(table.memberships()))
+            elif row is None:
+                table.fire(strengths[i])
+            else:
+                table.fire([column[row] for column in strengths[i]])
+
+    def process_batch(self, rows):
+        '''Evaluates the engine for many rows of inputs.
+
+        Memberships and firing strengths are computed column-wise for all rows,
+        and then the rules are fired and the outputs defuzzified row by row.
+
+        Args:
+            rows: a sequence of rows of crisp values in the order of engine.input.
+        Returns:
+            a list of rows of defuzzified values in the order of engine.output.'''
+        engine = self.engine
+        columns = {}
+        for i, name in enumerate(engine.input):
+            columns[name] = [row[i] for row in rows]
+        values = self.evaluate_batch(columns)
+        strengths = [table.strengths_batch(columns) for table in self.fams]
+        outputs = list(engine.output.values())
+        result = []
+        for row in range(len(rows)):
+            for variable in outputs:
+                variable.output.clear()
+            self.fire_rules(values, strengths, row)
+            result.append([variable.defuzzify() for variable in outputs])
+        return result
+
+    def report(self):
+        '''Returns a dictionary describing the redundancy removed by the plan.'''
+        result = dict(self.statistics)
+        result['unique_propositions'] = len(self.propositions)
+        result['unique_operators'] = len(self.operators)
+        evaluations = result['propositions'] + result['operators']
+        result['evaluations_saved'] = evaluations - self.size
+        result['ratio'] = self.size / evaluations if evaluations > 0 else 1.0
+        return result
+
+    def __str__(self):
+        report = self.report()
+        result = ['Plan: %i rules, %i/%i unique propositions, %i/%i unique operators, '
+                  '%i evaluations saved' % (report['rules'],
+                  report['unique_propositions'], report['propositions'],
+                  report['unique_operators'], report['operators'],
+                  report['evaluations_saved'])]
+        result.extend(str(table) for table in self.fams)
+        return '\n'.join(result)
+
+if __name__ == '__main__':
+    import os, sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    fe = simple_ai_boat()
+    reference = simple_ai_boat()
+    fe.compile()
+    print(fe.plan)
+    print(fe.plan.report())
+    for location in range(0, 2001, 50):
+        for relative in range(-100, 101, 10):
+            for engine in (fe, reference):
+                engine.input['location'].input = location
+                engine.input['relative_location'].input = relative
+                engine.process()
+            a = fe.output['action'].defuzzify()
+            b = reference.output['action'].defuzzify()
+            if not (a == b or (a != a and b != b)):
+                print('DIFFERENT results at (%s, %s): %s != %s' % (location, relative, a, b))
@@ -0,0 +1,463 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from collections import Counter, OrderedDict
+import threading
+
+from fl import backend
+from fl.compact import CompactRuleBlock
+from fl.fcl import FCLExporter, FCLImporter
+from fl.mamdani import MamdaniRule, MamdaniAntecedent, MamdaniConsequent
+from fl.rule import Rule
+from fl.variable import InputVariable, OutputVariable
+
+def sections(fcl):
+    '''Returns an ordered dictionary of the header of each block in the FCL (e.g.,
+    'FUZZIFY x') to the list of its lines, without comments nor blank lines.'''
+    if isinstance(fcl, str):
+        fcl = fcl.splitlines()
+    result = OrderedDict()
+    tag = lines = None
+    for line in fcl:
+        line = ' '.join(line.split('#', 1)[0].split())
+        if len(line) == 0: continue
+        token = line.split(None, 1)[0]
+        if lines is None:
+            if token in FCLImporter.tags:
+                tag = token
+                lines = result.setdefault(line, [])
+            elif token == 'END_FUNCTION_BLOCK':
+                break
+        elif token == FCLImporter.tags[tag][0]:
+            lines = None
+        else:
+            lines.append(line)
+    return result
+
+def rule_text(line):
+    '''Returns the rule of a line <RULE i : if ... then ...;>.'''
+    return ' '.join(line.split(':', 1)[1].replace(';', '').split())
+
+def dependencies(rule):
+    '''Returns the names of the output variables concluded by the rule, and of the
+    input variables in its antecedent.'''
+    outputs = tuple(proposition.variable.name for proposition in rule.consequent.propositions)
+    inputs = []
+    nodes = [rule.antecedent.root]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, MamdaniAntecedent.Proposition):
+            if node.variable.name not in inputs:
+                inputs.append(node.variable.name)
+        else:
+            nodes.append(node.right)
+            nodes.append(node.left)
+    return outputs, tuple(inputs)
+
+class Version(object):
+    '''A definition of an engine being served, which is never modified once built.
+
+    Attributes:
+        number: the number of the version, starting at 0.
+        engine: the engine of this version.
+        backend: the backend evaluating the engine.
+        sections: the blocks of the FCL of the engine (see sections()).
+        blocks: an ordered dictionary of ruleblock header to the list of
+                (rule text, outputs, inputs) of its rules (see dependencies()).
+        ruleblocks: a dictionary of ruleblock header to ruleblock.
+        summaries: a dictionary of ruleblock header to a dictionary of output
+                   variable name to the texts of the rules concluding it and the
+                   names of the input variables of those rules.
+        signatures: a dictionary of output variable name to everything its value
+                    depends on: the lines of its block, of the blocks of the input
+                    variables of its rules, and of its rules and their ruleblocks.
+    '''
+
+    def __init__(self, number, engine, backend, sections, blocks, ruleblocks,
+                 previous=None):
+        self.number = number
+        self.engine = engine
+        self.backend = backend
+        self.sections = sections
+        self.blocks = blocks
+        self.ruleblocks = ruleblocks
+        self.summaries = {}
+        for header, rules in blocks.items():
+            if previous is not None and previous.blocks.get(header) is rules:
+                self.summaries[header] = previous.summaries[header]
+                continue
+            summary = self.summaries[header] = {}
+            for text, outputs, inputs in rules:
+                for name in outputs:
+                    texts, variables = summary.setdefault(name, ([], []))
+                    texts.append(text)
+                    variables.extend(variable for variable in inputs
+                                     if variable not in variables)
+        self.signatures = {}
+        for name in engine.output:
+            signature = [tuple(sections.get('DEFUZZIFY %s' % name, ()))]
+            inputs = []
+            for header, summary in self.summaries.items():
+                if name in summary:
+                    texts, variables = summary[name]
+                    signature.append((header, tuple(line for line in sections[header]
+                                                    if not line.startswith('RULE ')),
+                                      tuple(texts)))
+                    inputs.extend(variable for variable in variables
+                                  if variable not in inputs)
+            signature.extend(tuple(sections.get('FUZZIFY %s' % variable, ()))
+                             for variable in inputs)
+            self.signatures[name] = tuple(signature)
+
+class IncrementalImporter(FCLImporter):
+    '''Imports an engine from FCL sharing the unchanged parts of a previous version.
+
+    A variable whose block is unchanged is shared with the previous version, and
+    so is a ruleblock whose block is unchanged and whose variables are all shared.
+    In the other ruleblocks, the rules whose text is unchanged are shared if their
+    variables are, copied onto the new variables otherwise, and only the new rules
+    are parsed. Nothing shared is modified, so the previous version can still be
+    evaluated while importing, but the versions must not be evaluated concurrently.
+
+    Attributes:
+        previous: the previous Version.
+        sections: the blocks of the FCL imported.
+        replaced: the names of the variables not shared with the previous version.
+        blocks, ruleblocks: the same as in Version, for the engine imported.
+        counters: a dictionary with the numbers of variables, ruleblocks and
+                  rules shared, copied or parsed.
+    '''
+
+    def __init__(self, previous, sections, compact=False):
+        FCLImporter.__init__(self, compact)
+        self.previous = previous
+        self.sections = sections
+        self.replaced = set()
+        self.blocks = OrderedDict()
+        self.ruleblocks = {}
+        self.header = None
+        self.shared = False
+        self.available = {}
+        self.counters = {'variables shared': 0, 'variables built': 0,
+                         'ruleblocks shared': 0, 'rules shared': 0,
+                         'rules copied': 0, 'rules parsed': 0}
+
+    def unchanged(self, header):
+        return (header in self.previous.sections
+                and self.previous.sections[header] == self.sections.get(header))
+
+    def declare(self, variables, previous, header, name, variable):
+        if self.unchanged(header) and name in previous:
+            variables[name] = previous[name]
+            self.counters['variables shared'] += 1
+        else:
+            variables[name] = variable
+            self.replaced.add(name)
+            self.counters['variables built'] += 1
+
+    def process_input_var(self, line):
+        name = self.extract_name(line)
+        self.declare(self.fe.input, self.previous.engine.input, 'FUZZIFY %s' % name,
+                     name, InputVariable(name))
+
+    def process_output_var(self, line):
+        name = self.extract_name(line)
+        self.declare(self.fe.output, self.previous.engine.output, 'DEFUZZIFY %s' % name,
+                     name, OutputVariable(name))
+
+    def begin_block(self, tag, line):
+        FCLImporter.begin_block(self, tag, line)
+        header = self.header = ' '.join(line.split())
+        if tag in ('FUZZIFY', 'DEFUZZIFY'):
+            self.shared = self.variable.name not in self.replaced
+        if tag != 'RULEBLOCK':
+            return
+        ruleblock = self.previous.ruleblocks.get(header)
+        rules = self.previous.blocks.get(header, ())
+        variables = set(name for _, outputs, inputs in rules for name in outputs + inputs)
+        self.shared = (ruleblock is not None and self.unchanged(header)
+                       and self.compact == isinstance(ruleblock, CompactRuleBlock)
+                       and all(name in self.fe.input or name in self.fe.output
+                               for name in variables)
+                       and not variables.intersection(self.replaced))
+        if self.shared:
+            #the ruleblock is untouched, since the previous version is still serving,
+            #and keeps its name, e.g., None rather than the 'None' of the header
+            self.ruleblock = ruleblock
+            self.blocks[header] = rules
+            self.counters['ruleblocks shared'] += 1
+        else:
+            self.blocks[header] = []
+            self.available = {}
+            for index, (text, _, _) in enumerate(rules):
+                self.available.setdefault(text, []).append(index)
+
+    def end_block(self, tag):
+        if tag == 'RULEBLOCK':
+            self.ruleblocks[self.header] = self.ruleblock
+        FCLImporter.end_block(self, tag)
+        self.shared = False
+
+    def process_fuzzify(self, line):
+        if not self.shared:
+            FCLImporter.process_fuzzify(self, line)
+
+    def process_defuzzify(self, line):
+        if not self.shared:
+            FCLImporter.process_defuzzify(self, line)
+
+    def process_ruleblock(self, line):
+        if self.shared:
+            return
+        if not line.startswith('RULE'):
+            return FCLImporter.process_ruleblock(self, line)
+        if ':' not in line:
+            raise SyntaxError('malformed property <%s>' % line)
+        text = rule_text(line)
+        available = self.available.get(text)
+        if available:
+            index = available.pop(0)
+            source = self.previous.blocks[self.header][index]
+            rule = self.previous.ruleblocks[self.header][index]
+            if set(source[1] + source[2]).intersection(self.replaced):
+                rule = self.copy(rule)
+                self.counters['rules copied'] += 1
+            else:
+                self.counters['rules shared'] += 1
+        else:
+            rule = MamdaniRule.parse(text, self.fe)
+            source = (text,) + dependencies(rule)
+            self.counters['rules parsed'] += 1
+        self.blocks[self.header].append(source)
+        self.ruleblock.append(rule)
+
+    def copy(self, rule):
+        '''Returns a copy of the rule of the previous version referring to the
+        variables, terms and hedges of the new engine.'''
+        result = MamdaniRule()
+        result.antecedent = MamdaniAntecedent()
+        result.antecedent.root = self.copy_node(rule.antecedent.root)
+        result.consequent = MamdaniConsequent()
+        for proposition in rule.consequent.propositions:
+            copy = MamdaniConsequent.Proposition()
+            copy.variable = self.fe.output[proposition.variable.name]
+            copy.term = copy.variable.term[proposition.term.name]
+            copy.hedges = [self.fe.hedge[hedge.name] for hedge in proposition.hedges]
+            copy.weight = proposition.weight
+            result.consequent.propositions.append(copy)
+        return result
+
+    def copy_node(self, node):
+        if isinstance(node, MamdaniAntecedent.Proposition):
+            copy = MamdaniAntecedent.Proposition()
+            copy.variable = self.fe.input[node.variable.name]
+            copy.term = copy.variable.term[node.term.name] if node.term is not None else None
+            copy.hedges = [self.fe.hedge[hedge.name] for hedge in node.hedges]
+            return copy
+        copy = MamdaniAntecedent.Operator(node.operator)
+        copy.left = self.copy_node(node.left)
+        copy.right = self.copy_node(node.right)
+        return copy
+
+class Diff(object):
+    '''The differences between two versions of an engine.
+
+    Attributes:
+        added, removed, changed: the headers of the blocks of FCL added, removed
+                                 and changed (e.g., 'FUZZIFY x').
+        rules: a dictionary of ruleblock header to the numbers of rules added and
+               removed.
+        affected: the names of the output variables whose values may differ.
+        counters: the counters of the IncrementalImporter.
+    '''
+
+    def __init__(self, old, new, counters=None):
+        self.added = [header for header in new.sections if header not in old.sections]
+        self.removed = [header for header in old.sections if header not in new.sections]
+        self.changed = [header for header in new.sections if header in old.sections
+                        and new.sections[header] != old.sections[header]]
+        self.rules = OrderedDict()
+        for header in self.changed + self.added + self.removed:
+            if header.startswith('RULEBLOCK'):
+                before = Counter(text for text, _, _ in old.blocks.get(header, ()))
+                after = Counter(text for text, _, _ in new.blocks.get(header, ()))
+                self.rules[header] = (sum((after - before).values()),
+                                      sum((before - after).values()))
+        self.affected = [name for name in new.engine.output
+                         if old.signatures.get(name) != new.signatures[name]]
+        self.counters = counters if counters is not None else {}
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        result = []
+        for label, headers in (('+', self.added), ('-', self.removed), ('~', self.changed)):
+            for header in headers:
+                rules = self.rules.get(header)
+                result.append('%s %s%s' % (label, header, ' (+%i -%i rules)' % rules
+                                           if rules else ''))
+        result.append('affected outputs: %s' % (', '.join(self.affected) or 'none'))
+        return '\n'.join(result)
+
+class Reloader(object):
+    '''Serves an engine whose definition can be replaced while serving it.
+
+    Each call to process() or evaluate() takes the current Version once, and
+    finishes on it even if reload() replaces it meanwhile. A reload imports the
+    new FCL incrementally (see IncrementalImporter) into a new Version on the side,
+    compiles its Plan if the engine had one, and swaps it in with the assignment
+    of a single reference, so callers never see a partially built engine. The
+    values cached by Engine.evaluate() are carried over for the outputs whose
+    signature is unchanged (see Version), and dropped for the rest. If the engine
+    was configured with an Operator, the variables and ruleblocks rebuilt are
+    configured with it too, as the FCL does not hold all of it (e.g., the divisions
+    of the defuzzifier).
+
+    Reloads may run in another thread than the evaluations, but consecutive
+    versions share variables and rules, so evaluations must not run concurrently
+    with each other, as for backends.
+
+    Attributes:
+        version: the current Version.
+        backend: the name of the backend to evaluate each version.
+        compact: whether to store the rules in CompactRuleBlocks.
+    '''
+
+    def __init__(self, engine, backend='reference', compact=False):
+        self.backend = backend
+        self.compact = compact
+        self.lock = threading.Lock()
+        if isinstance(engine, str):
+            engine = FCLImporter(compact).engine(engine)
+        blocks = OrderedDict()
+        ruleblocks = {}
+        for name, ruleblock in engine.ruleblock.items():
+            header = 'RULEBLOCK %s' % name #as exported
+            ruleblocks[header] = ruleblock
+            blocks[header] = [(' '.join(('%s %s %s %s' % (Rule.FR_IF,
+                               rule.antecedent.str_infix(), Rule.FR_THEN,
+                               rule.consequent)).split()),) + dependencies(rule)
+                              for rule in ruleblock]
+        self.version = Version(0, engine, self.create(engine),
+                               sections(FCLExporter().engine(engine)), blocks, ruleblocks)
+
+    def create(self, engine):
+        return backend.create(self.backend, engine)
+
+    def process(self, row):
+        '''Returns the list of outputs for a row of inputs (see Backend.process).'''
+        return self.version.backend.process(row)
+
+    def process_batch(self, rows):
+        return self.version.backend.process_batch(rows)
+
+    def evaluate(self, inputs, outputs=None):
+        '''Returns the values of the outputs for a dictionary of input variable name
+        to value (see Engine.evaluate).'''
+        engine = self.version.engine
+        for name, value in inputs.items():
+            engine.input[name].input = value
+        return engine.evaluate(outputs)
+
+    def reload(self, fcl):
+        '''Replaces the definition of the engine by the one in the FCL.
+
+        Returns:
+            the Diff between the previous and the new version.
+        Raises:
+            SyntaxError, ValueError: if the FCL is invalid, in which case the
+                                     current version is kept.'''
+        with self.lock:
+            previous = self.version
+            blocks = sections(fcl)
+            importer = IncrementalImporter(previous, blocks, self.compact)
+            engine = importer.engine(fcl)
+            old = previous.engine
+            if old.operator is not None:
+                #the FCL only holds part of the operator, e.g., not the divisions
+                engine.operator = old.operator
+                for variables in (engine.input, engine.output):
+                    for name in importer.replaced.intersection(variables):
+                        variables[name].configure(old.operator)
+                for header, ruleblock in importer.ruleblocks.items():
+                    if previous.ruleblocks.get(header) is not ruleblock:
+                        ruleblock.configure(old.operator)
+            if old.plan is not None:
+                engine.compile(old.plan.fam)
+            version = Version(previous.number + 1, engine, self.create(engine), blocks,
+                              importer.blocks, importer.ruleblocks, previous)
+            diff = Diff(previous, version, importer.counters)
+            if old.demand is not None:
+                engine.evaluate([]) #builds the Demand
+                cache = old.demand.cache.copy()
+                for name in engine.output:
+                    if name in cache and name not in diff.affected:
+                        engine.demand.cache[name] = cache[name]
+            self.version = version
+            return diff
+
+if __name__ == '__main__':
+    import os, sys, time
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'demo'))
+    from fuzzy_logic_dynrow import simple_ai_boat
+    from fl.generator import Generator
+    boat = simple_ai_boat()
+    reloader = Reloader(boat)
+    rows = [[relative, location] for location in range(0, 2001, 100)
+            for relative in range(-100, 101, 20)]
+    expected = reloader.process_batch(rows)
+    fcl = FCLExporter().engine(boat)
+    diff = reloader.reload(fcl)
+    if diff or diff.affected or diff.counters['rules parsed']\
+            or diff.counters['ruleblocks shared'] != 1:
+        raise AssertionError('DIFFERENT versions from the same FCL:\n%s' % diff)
+    if reloader.process_batch(rows) != expected:
+        raise AssertionError('DIFFERENT results after reloading the same FCL')
+    #an evaluation in flight keeps the version it started with
+    previous = reloader.version
+    changed = fcl.replace('then action is P10', 'then action is LENGTHEN', 1)
+    diff = reloader.reload(changed)
+    print(diff)
+    print(diff.counters)
+    if previous.backend.process_batch(rows) != expected:
+        raise AssertionError('DIFFERENT results from the previous version')
+    #a changed term rebuilds its variable and copies the rules referring to it
+    for changed in (changed, changed.replace('RightShoulder (1570.0, 1700.0)',
+                                             'RightShoulder (1550.0, 1650.0)')):
+        diff = reloader.reload(changed)
+        fresh = backend.create('reference', FCLImporter().engine(changed))
+        for row, a, b in zip(rows, reloader.process_batch(rows),
+                             fresh.process_batch(rows)):
+            if not all(x == y or (x != x and y != y) for x, y in zip(a, b)):
+                raise AssertionError('DIFFERENT results at %s: %s != %s' % (row, a, b))
+    print(diff)
+    print(diff.counters)
+
+    #only the cached values of the outputs affected are invalidated
+    fe = Generator(inputs=3, outputs=2, terms=5, rules=20000, depth=3).engine()
+    fe.ruleblock[None].append(MamdaniRule.parse('if in0 is t1 then out1 is t3', fe))
+    fcl = FCLExporter().engine(fe)
+    reloader = Reloader(fe, backend='plan')
+    reloader.evaluate({'in0': 0.3, 'in1': 0.6, 'in2': 0.9})
+    changed = fcl.replace('then out1 is t3;', 'then out1 is t4;')
+    start = time.perf_counter()
+    engine = FCLImporter().engine(changed)
+    engine.configure(fe.operator)
+    backend.create('plan', engine)
+    full = time.perf_counter() - start
+    start = time.perf_counter()
+    diff = reloader.reload(changed)
+    elapsed = time.perf_counter() - start
+    print(diff)
+    print('%s in %.3f s (full import and plan: %.3f s)' % (diff.counters, elapsed, full))
+    if diff.affected != ['out1'] or 'out0' not in reloader.version.engine.demand.cache:
+        raise AssertionError('DIFFERENT outputs affected: %s' % diff.affected)
+    values = reloader.evaluate({'in0': 0.3, 'in1': 0.6, 'in2': 0.9})
+    if reloader.version.engine.demand.counters['hits'] != 1:
+        raise AssertionError('EXPECTED the value of out0 from the cache')
+    print(dict(values))
+    print('Reloader is just FINE :)')
@@ -14,10 +14,13 @@ class Rule(object):
     FR_OR = 'or'
     FR_WITH = 'with'
 
+    @property
+    def logger(self):
+        return logging.getLogger(type(self).__name__)
+
     def __init__(self):
         self.antecedent = None
         self.consequent = None
-        self.logger = logging.getLogger(type(self).__name__)
     
     def configure(self, fop): 
         pass
@@ -35,15 +38,25 @@ class Rule(object):
 class FuzzyAntecedent(object):
     
     def __init__(self):
-        self.logger = logging.getLogger(type(self).__name__)
+        pass
+
+    @property
+    def logger(self):
+        return logging.getLogger(type(self).__name__)
     
     def firing_strength(self, tnorm, snorm):
         raise NotImplementedError('firing_strength')
 
 class FuzzyConsequent(object):
     
+    __slots__ = ()
+    
     def __init__(self):
-        self.logger = logging.getLogger(type(self).__name__)
+        pass
+
+    @property
+    def logger(self):
+        return logging.getLogger(type(self).__name__)
     
     def fire(self, strength, activation):
         raise NotImplementedError('fire')
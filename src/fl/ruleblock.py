@@ -28,6 +28,20 @@ class RuleBlock(list):
             if strength > 0.0:
                 rule.fire(strength, self.activation)
     
+    def profile(self, warmup=100):
+        '''Reorders the operands of the antecedents after warmup evaluations,
+        such that the operand most often absorbing is evaluated first.'''
+        for rule in self:
+            rule.antecedent.profile(warmup)
+    
+    def statistics(self):
+        '''Returns a dictionary with the sum of the evaluation counters of the antecedents.'''
+        result = {'evaluated': 0, 'skipped': 0, 'shortcircuits': 0}
+        for rule in self:
+            for key, value in rule.antecedent.statistics().items():
+                result[key] += value
+        return result
+    
 if __name__ == '__main__':
     from fl.engine import Operator
     x = RuleBlock('a')
@@ -0,0 +1,221 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+from collections import OrderedDict
+import time
+
+from fl.term import Term
+
+class Stats(object):
+    '''Per-phase timing and counters of an engine.
+
+    Stats are collected only while attached to an engine by Engine.instrument(),
+    in which case Engine.process() and OutputVariable.defuzzify() delegate to
+    process() and defuzzify() below. Otherwise, the engine does not pay for them.
+
+    The phases are:
+        fuzzification: membership of the inputs to the terms of the propositions,
+                       only measured separately when the engine has a Plan.
+        antecedent: evaluation of the antecedents (including fuzzification
+                    when the engine has no Plan).
+        consequent: firing of the rules, which appends the outputs.
+        accumulation: membership of the accumulated outputs while defuzzifying.
+        defuzzification: the defuzzification of the outputs (including accumulation).
+
+    Attributes:
+        buckets: the upper bounds in seconds of the histogram of process() latency.
+        time: an ordered dictionary of phase to cumulative seconds.
+        calls: an ordered dictionary of phase to number of calls.
+        histogram: a list with the number of calls to process() in each bucket,
+                   plus one for calls slower than the last bucket.
+        latency: the cumulative seconds spent in process().
+        rules: an ordered dictionary of ruleblock name to [rules evaluated, rules fired].
+        memberships: an ordered dictionary of output variable name to the number
+                     of evaluations of the membership of its output terms.
+    '''
+
+    phases = ('fuzzification', 'antecedent', 'consequent', 'accumulation', 'defuzzification')
+
+    buckets = tuple(float('%ge%i' % (factor, exponent)) for exponent in range(-6, 0)
+                    for factor in (1, 2.5, 5)) + (1.0,)
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, buckets=None):
+        if buckets is not None:
+            self.buckets = tuple(sorted(buckets))
+        self.reset()
+
+    def reset(self):
+        '''Sets all the timings and counters to zero.'''
+        self.time = OrderedDict((phase, 0.0) for phase in self.phases)
+        self.calls = OrderedDict((phase, 0) for phase in self.phases)
+        self.histogram = [0] * (len(self.buckets) + 1)
+        self.latency = 0.0
+        self.rules = OrderedDict()
+        self.memberships = OrderedDict()
+
+    def add(self, phase, seconds):
+        self.time[phase] += seconds
+        self.calls[phase] += 1
+
+    def observe(self, seconds):
+        '''Adds the latency of a call to process() to the histogram.'''
+        self.latency += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    def process(self, engine):
+        '''Processes the engine as Engine.process() while timing each phase.'''
+        clock = self.clock
+        begin = clock()
+        for variable in engine.output.values():
+            variable.output.clear()
+        plan = engine.plan
+        if plan is not None:
+            start = clock()
+            values = plan.fuzzify()
+            middle = clock()
+            plan.combine()
+            strengths = [table.strengths(table.memberships()) for table in plan.fams]
+            end = clock()
+            self.add('fuzzification', middle - start)
+            self.add('antecedent', end - middle)
+            start = end
+            for ruleblock, roots in plan.ruleblocks:
+                fired = 0
+                for rule, index in roots:
+                    if values[index] > 0.0:
+                        rule.fire(values[index], ruleblock.activation)
+                        fired += 1
+                self.count(ruleblock, len(roots), fired)
+            for table, cells in zip(plan.fams, strengths):
+                table.fire(cells)
+                self.count(table.ruleblock, len(cells),
+                           sum(1 for strength in cells if strength > 0.0))
+            self.add('consequent', clock() - start)
+        else:
+            for ruleblock in engine.ruleblock.values():
+                if len(ruleblock) == 0:
+                    raise ValueError('no rules to fire')
+                start = clock()
+                strengths = [rule.firing_strength(ruleblock.tnorm, ruleblock.snorm)
+                             for rule in ruleblock]
+                middle = clock()
+                fired = 0
+                for rule, strength in zip(ruleblock, strengths):
+                    if strength > 0.0:
+                        rule.fire(strength, ruleblock.activation)
+                        fired += 1
+                self.add('antecedent', middle - start)
+                self.add('consequent', clock() - middle)
+                self.count(ruleblock, len(strengths), fired)
+        self.observe(clock() - begin)
+
+    def count(self, ruleblock, evaluated, fired):
+        counters = self.rules.setdefault(str(ruleblock.name), [0, 0])
+        counters[0] += evaluated
+        counters[1] += fired
+
+    def defuzzify(self, variable):
+        '''Defuzzifies the output variable as OutputVariable.defuzzify() while timing
+        the accumulation and the defuzzification.'''
+        term = variable.output
+        if term.is_empty():
+            return variable.default
+        timed = Timed(term, self.clock)
+        start = self.clock()
+        result = variable.defuzzifier.defuzzify(timed)
+        self.add('defuzzification', self.clock() - start)
+        self.add('accumulation', timed.seconds)
+        self.memberships[variable.name] = (self.memberships.get(variable.name, 0)
+                                           + timed.calls * len(term.terms))
+        return result
+
+    def as_dict(self):
+        '''Returns the timings and counters as a dictionary.'''
+        return {'phases': {phase: {'seconds': self.time[phase], 'calls': self.calls[phase]}
+                           for phase in self.phases},
+                'process': {'seconds': self.latency, 'calls': sum(self.histogram),
+                            'histogram': [[bound, count] for bound, count in
+                                          zip(self.buckets + (float('inf'),), self.histogram)]},
+                'rules': {name: {'evaluated': evaluated, 'fired': fired}
+                          for name, (evaluated, fired) in self.rules.items()},
+                'memberships': dict(self.memberships)}
+
+    def prometheus(self, prefix='fuzzylite'):
+        '''Returns the timings and counters in the Prometheus text exposition format.'''
+        result = ['# TYPE %s_phase_seconds_total counter' % prefix]
+        for phase in self.phases:
+            result.append('%s_phase_seconds_total{phase="%s"} %r'
+                          % (prefix, phase, self.time[phase]))
+        result.append('# TYPE %s_phase_calls_total counter' % prefix)
+        for phase in self.phases:
+            result.append('%s_phase_calls_total{phase="%s"} %i'
+                          % (prefix, phase, self.calls[phase]))
+        result.append('# TYPE %s_process_seconds histogram' % prefix)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.histogram):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            result.append('%s_process_seconds_bucket{le="%s"} %i' % (prefix, le, cumulative))
+        result.append('%s_process_seconds_sum %r' % (prefix, self.latency))
+        result.append('%s_process_seconds_count %i' % (prefix, cumulative))
+        result.append('# TYPE %s_rules_evaluated_total counter' % prefix)
+        for name, (evaluated, _) in self.rules.items():
+            result.append('%s_rules_evaluated_total{ruleblock="%s"} %i'
+                          % (prefix, name, evaluated))
+        result.append('# TYPE %s_rules_fired_total counter' % prefix)
+        for name, (_, fired) in self.rules.items():
+            result.append('%s_rules_fired_total{ruleblock="%s"} %i' % (prefix, name, fired))
+        result.append('# TYPE %s_membership_evaluations_total counter' % prefix)
+        for name, count in self.memberships.items():
+            result.append('%s_membership_evaluations_total{output="%s"} %i'
+                          % (prefix, name, count))
+        return '\n'.join(result) + '\n'
+
+class Timed(Term):
+    '''Wraps a term to time the evaluations of its membership.'''
+    __slots__ = ('term', 'clock', 'seconds', 'calls')
+
+    def __init__(self, term, clock):
+        Term.__init__(self, term.name, term.minimum, term.maximum)
+        self.term = term
+        self.clock = clock
+        self.seconds = 0.0
+        self.calls = 0
+
+    @property
+    def terms(self):
+        return self.term.terms
+
+    @property
+    def accumulation(self):
+        return self.term.accumulation
+
+    def membership(self, x):
+        start = self.clock()
+        mu = self.term.membership(x)
+        self.seconds += self.clock() - start
+        self.calls += 1
+        return mu
+
+if __name__ == '__main__':
+    from fl.example import Example
+    fe = Example.simple_mamdani()
+    for compile in (False, True):
+        if compile: fe.compile()
+        stats = fe.instrument()
+        for i in range(21):
+            fe.input['Energy'].input = 0.1 * i
+            fe.process()
+            fe.output['Health'].defuzzify()
+        print(stats.as_dict())
+    print(stats.prometheus())
+    fe.instrument(False)
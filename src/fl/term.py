@@ -8,6 +8,10 @@ Created on 10/10/2012
 # TODO: Copy matlab membership functions
 import math
 import logging
+
+from fl.operator import aggregation, FuzzyActivation
+from fl.trace import tracer
+
 class Term(object):
     '''Base class to define fuzzy linguistic terms such as LOW, MEDIUM, HIGH.
     
@@ -17,11 +21,24 @@ class Term(object):
             maximum: a float to which the term ends 
     '''
     
+    #subclasses without __slots__ still get a __dict__
+    __slots__ = ('name', 'minimum', 'maximum')
+    
+    #names of the numeric attributes that define the shape of the term,
+    #in the order of the parameters of the constructor after the name
+    parameters = ('minimum', 'maximum')
+    
+    #names of the parameters that must not decrease from left to right
+    vertices = ('minimum', 'maximum')
+    
     def __init__(self, name, minimum, maximum):
         self.name = name
         self.minimum = minimum
         self.maximum = maximum
-        self.logger = logging.getLogger(type(self).__name__)
+    
+    @property
+    def logger(self):
+        return logging.getLogger(type(self).__name__)
         
     def __str__(self):
         '''Returns a string of this term.'''
@@ -68,6 +85,32 @@ class Term(object):
         Raises:
             NotImplementedError: if the term does not implement this method.''' 
         raise NotImplementedError()
+    
+    def moments(self, a, b):
+        '''Returns the area and the first moment of the membership function over
+        [a, b] in closed form, or None if the term has no closed form.'''
+        return None
+
+def linear_moments(points, a, b, left=0.0, right=0.0):
+    '''Returns the area and the first moment over [a, b] of the piecewise linear
+    function through the points (x, y), which is left before the first point and
+    right after the last one.'''
+    area = moment = 0.0
+    segments = [(float('-inf'), left, points[0][0], left)]
+    segments.extend(points[i] + points[i + 1] for i in range(len(points) - 1))
+    segments.append((points[-1][0], right, float('inf'), right))
+    for x0, y0, x1, y1 in segments:
+        lo, hi = max(x0, a), min(x1, b)
+        if hi <= lo:
+            continue
+        if y0 == y1:
+            ylo = yhi = y0
+        else:
+            ylo = y0 + (y1 - y0) * (lo - x0) / (x1 - x0)
+            yhi = y0 + (y1 - y0) * (hi - x0) / (x1 - x0)
+        area += (hi - lo) * (ylo + yhi) / 2.0
+        moment += (hi - lo) * (lo * (2.0 * ylo + yhi) + hi * (ylo + 2.0 * yhi)) / 6.0
+    return area, moment
 
 
 
@@ -83,6 +126,8 @@ class Triangle(Term):
         maximum: the right vertex
     '''
     
+    parameters = vertices = ('minimum', 'middle_vertex', 'maximum')
+    
     def __init__(self, name, minimum, middle_vertex, maximum):
         Term.__init__(self, name, minimum, maximum)
         self.middle_vertex = middle_vertex
@@ -101,6 +146,10 @@ class Triangle(Term):
         else:
             return (self.maximum - x) / (self.maximum - self.middle_vertex) 
 
+    def moments(self, a, b):
+        return linear_moments([(self.minimum, 0.0), (self.middle_vertex, 1.0),
+                               (self.maximum, 0.0)], a, b)
+
 class Trapezoid(Term):
     '''A trapezoid term.
     
@@ -114,6 +163,8 @@ class Trapezoid(Term):
         maximum: rightmost vertex
     '''
     
+    parameters = vertices = ('minimum', 'b', 'c', 'maximum')
+    
     def __init__(self, name, minimum, b, c, maximum):
         Term.__init__(self, name, minimum, maximum)
         self.b = b 
@@ -134,6 +185,10 @@ class Trapezoid(Term):
         elif x <= self.maximum:
             return (self.maximum - x) / (self.maximum - self.c)
         else: return 0.0
+
+    def moments(self, a, b):
+        return linear_moments([(self.minimum, 0.0), (self.b, 1.0), (self.c, 1.0),
+                               (self.maximum, 0.0)], a, b)
         
 class Rectangle(Term):
     '''A rectangular term.
@@ -153,6 +208,9 @@ class Rectangle(Term):
     
     def membership(self, x):
         return 1.0 if self.minimum <= x <= self.maximum else 0.0
+
+    def moments(self, a, b):
+        return linear_moments([(self.minimum, 1.0), (self.maximum, 1.0)], a, b)
     
 class LeftShoulder(Term):
     '''A left shoulder term. 
@@ -169,6 +227,9 @@ class LeftShoulder(Term):
         if x <= self.minimum: return 1.0
         if x >= self.maximum: return 0.0
         return 1.0 - ((x - self.minimum) / (self.maximum - self.minimum))
+
+    def moments(self, a, b):
+        return linear_moments([(self.minimum, 1.0), (self.maximum, 0.0)], a, b, left=1.0)
         
 
 class RightShoulder(Term):
@@ -187,6 +248,9 @@ class RightShoulder(Term):
         if x >= self.maximum: return 1.0
         return 1.0 - ((self.maximum - x) / (self.maximum - self.minimum))
 
+    def moments(self, a, b):
+        return linear_moments([(self.minimum, 0.0), (self.maximum, 1.0)], a, b, right=1.0)
+
 
 class Lambda(Term):
     '''A function term.
@@ -215,6 +279,10 @@ class Lambda(Term):
     def membership(self, x):
         return self.lambda_(x, self.minimum, self.maximum)
 
+    def __reduce__(self):
+        #built again from the expression, since the function cannot be pickled
+        return (Lambda, (self.name, self.strlambda, self.minimum, self.maximum))
+
 class Gaussian(Term):
     '''Gaussian curve membership function
 
@@ -225,8 +293,10 @@ class Gaussian(Term):
     f(x, sigma, c) = exp(-(x - c).^2/(2*sigma^2));
     
     '''
+    parameters = ('minimum', 'maximum', 'sigma', 'c')
+    
     def __init__(self, name, minimum, maximum, sigma, c):
-        Term.__init__(self, minimum, maximum)
+        Term.__init__(self, name, minimum, maximum)
         self.sigma = sigma
         self.c = c
         
@@ -237,6 +307,14 @@ class Gaussian(Term):
     def membership(self, x):
         # from matlab: gaussmf.m
         return math.exp((-(x - self.c) ** 2) / (2 * self.sigma ** 2))
+
+    def moments(self, a, b):
+        scale = self.sigma * math.sqrt(2.0)
+        area = (self.sigma * math.sqrt(math.pi / 2.0)
+                * (math.erf((b - self.c) / scale) - math.erf((a - self.c) / scale)))
+        #the integral of (x - c) * membership(x) is sigma^2 * [-membership(x)]
+        moment = self.c * area + self.sigma ** 2 * (self.membership(a) - self.membership(b))
+        return area, moment
     
 class Bell(Term):
     '''Generalized bell-shaped membership function
@@ -259,8 +337,10 @@ class Bell(Term):
     gbellmf, as the vector whose entries are a, b, and c, respectively.
     '''
     
+    parameters = ('minimum', 'maximum', 'a', 'b', 'c')
+    
     def __init__(self, name, minimum, maximum, a, b, c):
-        Term.__init__(self, minimum, maximum)
+        Term.__init__(self, name, minimum, maximum)
         self.a = a
         self.b = b
         self.c = c
@@ -275,7 +355,7 @@ class Bell(Term):
         tmp = ((x - self.c) / self.a) ** 2
         if tmp == 0.0 and self.b == 0:
             return 0.5
-        elif tmp == 0.0 & self.b < 0:
+        elif tmp == 0.0 and self.b < 0:
             return 0.0
         else:
             tmp = tmp ** self.b
@@ -297,8 +377,10 @@ class Sigmoid(Term):
     '''
 
 
+    parameters = ('minimum', 'maximum', 'a', 'c')
+    
     def __init__(self, name, minimum, maximum, a, c):
-        Term.__init__(self, minimum, maximum)
+        Term.__init__(self, name, minimum, maximum)
         self.a = a
         self.c = c
     
@@ -321,7 +403,14 @@ class Output(Term):
         term: a term  it wraps.
         alphacut: the float degree of the activation.
         activation: a method to define membership functions considering the alphacut.
-                    It takes functions from FuzzyAnd'''
+                    It takes functions from FuzzyAnd
+    
+    Outputs are created once per proposition of a consequent and reused every 
+    time the rule fires, updating only the alphacut and the activation.'''
+    __slots__ = ('term', 'alphacut', 'activation')
+    
+    parameters = vertices = ()
+    
     def __init__(self, term, alphacut=1.0, activation=None):
         Term.__init__(self, term.name, term.minimum, term.maximum)
         self.term = term
@@ -336,6 +425,16 @@ class Output(Term):
         if self.activation is None:
             raise ValueError('activation must take a FuzzyAnd function')
         return self.activation(self.term.membership(x), self.alphacut) 
+    
+    def moments(self, a, b):
+        '''Returns the moments of the term scaled by the alphacut, which is only
+        possible if the activation is FuzzyActivation.Prod.'''
+        if self.activation is not FuzzyActivation.Prod:
+            return None
+        result = self.term.moments(a, b)
+        if result is None:
+            return None
+        return self.alphacut * result[0], self.alphacut * result[1]
 
 
 class Cumulative(Term):
@@ -346,8 +445,16 @@ class Cumulative(Term):
     Attributes:
         terms: a list of terms.
         accumulation: a FuzzyOr function that chooses the membership function 
-            of overlapping terms.'''
+            of overlapping terms.
+    
+    Outputs of the same term and activation are aggregated into a single one when
+    appended, if the accumulation and the activation allow it (see aggregation 
+    in fl.operator), such that the membership is computed once per term.'''
 
+    __slots__ = ('terms', 'accumulation')
+    
+    parameters = vertices = ()
+    
     def __init__(self, name, accumulation=None):
         Term.__init__(self, name, float('-inf'), float('inf'))
         self.terms = []
@@ -361,20 +468,31 @@ class Cumulative(Term):
     
     def append(self, term):
         '''Appends a term to the list of terms.'''
-        self.logger.debug('appending term: %s' % term)
+        if tracer.term:
+            tracer.emit('term', 'appended', output=self, term=term)
         # the following updates the boundaries of this term.
         if math.isinf(self.minimum) or term.minimum < self.minimum:
             self.minimum = term.minimum
         if math.isinf(self.maximum) or term.maximum > self.maximum:
             self.maximum = term.maximum
+        if isinstance(term, Output):
+            aggregate = aggregation.get((self.accumulation, term.activation))
+            if aggregate is not None:
+                #a linear scan, since terms hold at most one output per term
+                for previous in self.terms:
+                    if (isinstance(previous, Output) and previous.term is term.term
+                            and previous.activation is term.activation):
+                        previous.alphacut = aggregate(previous.alphacut, term.alphacut)
+                        return
         self.terms.append(term)
         
     def clear(self):
         '''Clears the term by removing all the terms it is made up with.'''
-        self.logger.debug('clearing output')
+        if tracer.term:
+            tracer.emit('term', 'cleared', output=self)
         self.minimum = float('-inf')
         self.maximum = float('inf')
-        self.terms = []
+        del self.terms[:] #in place, to not allocate a new list on every process
         
     def is_empty(self):
         '''Returns a boolean that indicates whether the term contains other terms.'''
@@ -0,0 +1,82 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+'''
+
+import logging
+
+class Tracer(object):
+    '''Structured tracing of the hot paths of the library.
+
+    Each subsystem is a boolean attribute of the tracer, which call sites check
+    before building an event, such that nothing is formatted or allocated
+    while the subsystem is disabled:
+
+        if tracer.rule:
+            tracer.emit('rule', 'fired', strength=strength, consequent=self)
+
+    Events are dictionaries with the keys 'subsystem', 'event' and the given
+    fields, passed to every sink of the tracer.
+
+    Subsystems:
+        rule: rules fired and outputs appended by the consequents.
+        term: terms appended to and cleared from the accumulated outputs.
+        defuzzifier: values computed by the defuzzifiers.
+    '''
+
+    subsystems = ('rule', 'term', 'defuzzifier')
+
+    def __init__(self):
+        self.sinks = []
+        for subsystem in self.subsystems:
+            setattr(self, subsystem, False)
+
+    def enable(self, *subsystems, **kwargs):
+        '''Enables the given subsystems (or all, if none given).
+
+        Args:
+            sink: a function taking an event to add to the sinks of the tracer.
+                  If there are no sinks, events are logged with log_sink.'''
+        sink = kwargs.pop('sink', None)
+        if kwargs:
+            raise TypeError('unexpected arguments %s' % list(kwargs))
+        for subsystem in subsystems or self.subsystems:
+            if subsystem not in self.subsystems:
+                raise ValueError('unknown subsystem <%s>, only %s are available'
+                                 % (subsystem, self.subsystems))
+            setattr(self, subsystem, True)
+        if sink is not None:
+            self.sinks.append(sink)
+        elif not self.sinks:
+            self.sinks.append(log_sink)
+
+    def disable(self, *subsystems):
+        '''Disables the given subsystems (or all, and removes the sinks, if none given).'''
+        for subsystem in subsystems or self.subsystems:
+            setattr(self, subsystem, False)
+        if not subsystems:
+            self.sinks = []
+
+    def emit(self, subsystem, event, **fields):
+        fields['subsystem'] = subsystem
+        fields['event'] = event
+        for sink in self.sinks:
+            sink(fields)
+
+def log_sink(event):
+    '''Logs the event in DEBUG to the logger fl.<subsystem>, formatting it only
+    if the logger is enabled for DEBUG.'''
+    logger = logging.getLogger('fl.%s' % event['subsystem'])
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('%s %s', event['event'], ', '.join('%s=%s' % (key, value)
+                     for key, value in sorted(event.items())
+                     if key not in ('subsystem', 'event')))
+
+class Collector(list):
+    '''A sink that stores the events in a list.'''
+    def __call__(self, event):
+        self.append(event)
+
+#the tracer of the library
+tracer = Tracer()
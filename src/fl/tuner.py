@@ -0,0 +1,284 @@
+'''
+Created on 19/10/2026
+
+@author: agent
+
+Tunes the parameters of the terms and the weights of the rules of an engine by
+differential evolution, e.g.:
+
+    python -m fl.tuner engine.fcl data.csv --output tuned.fcl --generations 50
+                       --population 20 --workers 4 --checkpoint tuner.json
+
+where data.csv has a header with the names of the input and output variables.
+'''
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+
+from fl.fcl import FCLExporter, FCLImporter
+from fl.parametric import ParameterSpace, Parametric
+
+def squared_error(engine, results, targets):
+    '''Returns the mean squared error of the results to the targets. Outputs for which
+    no rule fired (nan) are penalized with the squared range of their variable.'''
+    penalties = [(variable.maximum() - variable.minimum()) ** 2
+                 for variable in engine.output.values()]
+    error = 0.0
+    count = 0
+    for result, target in zip(results, targets):
+        for y, t, penalty in zip(result, target, penalties):
+            if t is None: continue
+            error += penalty if y != y else (y - t) ** 2
+            count += 1
+    return error / count if count else 0.0
+
+class Tuner(object):
+    '''Differential evolution (rand/1/bin) of the parameters of an engine.
+
+    Candidates are points of a ParameterSpace, repaired after mutation such that
+    they stay within bounds and keep the vertices of the terms in order. The cost
+    of a candidate is either the loss of its outputs against a dataset, where the
+    whole population is evaluated at once by a Parametric batch, or the value of
+    a user-supplied objective function of the engine with the candidate assigned.
+    With workers, the population is split among a pool of processes, each of
+    which rebuilds the engine from its FCL.
+
+    Attributes:
+        engine: the engine to tune, which is left unchanged until apply().
+        space: the ParameterSpace tuned.
+        rows: the rows of inputs of the dataset, in the order of engine.input.
+        targets: the rows of expected outputs, in the order of engine.output,
+                 where None is a missing value.
+        objective: a function taking the engine and returning the cost to minimize,
+                   used instead of the dataset. Must be picklable for workers.
+        loss: a function (engine, results, targets) returning the cost of the results.
+        size: the number of candidates of the population.
+        mutation: the differential weight F in [0, 2].
+        crossover: the crossover probability CR in [0, 1].
+        workers: the number of processes to evaluate the population, or 0 to
+                 evaluate it in this process.
+        generation: the number of generations evolved.
+        population: the list of candidates.
+        costs: the list of costs of the candidates.
+    '''
+
+    def __init__(self, engine, rows=None, targets=None, objective=None, space=None,
+                 size=20, mutation=0.5, crossover=0.9, workers=0, seed=0,
+                 loss=squared_error):
+        if objective is None and (rows is None or targets is None):
+            raise ValueError('expected either a dataset of rows and targets or an objective')
+        if size < 4:
+            raise ValueError('expected a population of at least 4 candidates, '
+                             'but found %i' % size)
+        self.engine = engine
+        self.space = space if space is not None else ParameterSpace(engine, weights=True)
+        self.rows = rows
+        self.targets = targets
+        self.objective = objective
+        self.loss = loss
+        self.size = size
+        self.mutation = mutation
+        self.crossover = crossover
+        self.workers = workers
+        self.random = random.Random(seed)
+        self.generation = 0
+        self.population = []
+        self.costs = []
+        self.pool = None
+
+    def evaluate(self, candidates):
+        '''Returns the costs of the candidates.'''
+        if not self.workers:
+            return _evaluate(self.engine, self.space, self.rows, self.targets,
+                             self.objective, self.loss, candidates)
+        if self.pool is None:
+            #the engine itself rather than its FCL, which drops e.g. the divisions
+            arguments = (pickle.dumps(self.engine), self.space.addresses,
+                         self.rows, self.targets, self.objective, self.loss)
+            #a pool respawns the workers whose initializer fails, so fail here instead
+            _setup(*arguments)
+            self.pool = multiprocessing.Pool(self.workers, _initialize, arguments)
+        chunk = -(-len(candidates) // self.workers)
+        chunks = [candidates[i:i + chunk] for i in range(0, len(candidates), chunk)]
+        return [cost for costs in self.pool.map(_work, chunks) for cost in costs]
+
+    def initialize(self):
+        '''Creates the population with the current parameters of the engine and
+        random candidates within the bounds of the space.'''
+        self.population = [self.space.get()]
+        while len(self.population) < self.size:
+            self.population.append(self.space.repair(
+                [self.random.uniform(lower, upper) for lower, upper in self.space.bounds]))
+        self.costs = self.evaluate(self.population)
+        self.generation = 0
+
+    def step(self):
+        '''Evolves the population by one generation.'''
+        trials = []
+        dimension = len(self.space)
+        for i, target in enumerate(self.population):
+            a, b, c = self.random.sample([j for j in range(self.size) if j != i], 3)
+            a, b, c = self.population[a], self.population[b], self.population[c]
+            forced = self.random.randrange(dimension)
+            trials.append(self.space.repair(
+                [a[k] + self.mutation * (b[k] - c[k])
+                 if k == forced or self.random.random() < self.crossover else target[k]
+                 for k in range(dimension)]))
+        for i, (trial, cost) in enumerate(zip(trials, self.evaluate(trials))):
+            if cost <= self.costs[i]:
+                self.population[i] = trial
+                self.costs[i] = cost
+        self.generation += 1
+
+    def best(self):
+        '''Returns the (candidate, cost) of lowest cost.'''
+        i = min(range(len(self.costs)), key=self.costs.__getitem__)
+        return self.population[i], self.costs[i]
+
+    def run(self, generations, checkpoint=None, every=1, log=None):
+        '''Evolves the population up to the given number of generations.
+
+        Args:
+            generations: the total number of generations, including those of a
+                         checkpoint resumed.
+            checkpoint: the path of a JSON file to resume from, if it exists, and
+                        to save the progress to every given number of generations.
+            log: a function taking the tuner after each generation.
+        Returns:
+            the (candidate, cost) of lowest cost.'''
+        try:
+            if checkpoint is not None and os.path.exists(checkpoint):
+                self.load(checkpoint)
+            elif not self.population:
+                self.initialize()
+            while self.generation < generations:
+                self.step()
+                if log is not None:
+                    log(self)
+                if checkpoint is not None and (self.generation % every == 0
+                                               or self.generation == generations):
+                    self.save(checkpoint)
+        finally:
+            self.close()
+        return self.best()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def save(self, path):
+        '''Saves the population and the state of the random generator, replacing
+        the file atomically such that an interruption does not corrupt it.'''
+        version, state, gauss = self.random.getstate()
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'addresses': self.space.addresses, 'generation': self.generation,
+                       'population': self.population, 'costs': self.costs,
+                       'random': [version, state, gauss]}, f)
+        os.replace(path + '.tmp', path)
+
+    def load(self, path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if [tuple(address) for address in checkpoint['addresses']] != self.space.addresses:
+            raise ValueError('checkpoint <%s> tunes different parameters' % path)
+        self.generation = checkpoint['generation']
+        self.population = checkpoint['population']
+        self.costs = checkpoint['costs']
+        self.size = len(self.population)
+        version, state, gauss = checkpoint['random']
+        self.random.setstate((version, tuple(state), gauss))
+
+    def apply(self, candidate=None):
+        '''Assigns the candidate (or the best one) to the engine.'''
+        self.space.set(candidate if candidate is not None else self.best()[0])
+        if self.engine.plan is not None:
+            self.engine.compile()
+
+def _evaluate(engine, space, rows, targets, objective, loss, candidates):
+    if objective is None:
+        return [loss(engine, results, targets)
+                for results in Parametric(engine, space).process_batch(candidates, rows)]
+    original = space.get()
+    try:
+        costs = []
+        for candidate in candidates:
+            space.set(candidate)
+            costs.append(objective(engine))
+        return costs
+    finally:
+        space.set(original)
+
+#the state of each worker process, set by _initialize
+_worker = None
+
+def _setup(pickled, addresses, rows, targets, objective, loss):
+    engine = pickle.loads(pickled)
+    return (engine, ParameterSpace(engine, [tuple(address) for address in addresses]),
+            rows, targets, objective, loss)
+
+def _initialize(*arguments):
+    global _worker
+    _worker = _setup(*arguments)
+
+def _work(candidates):
+    return _evaluate(*(_worker + (candidates,)))
+
+def read_dataset(path, engine):
+    '''Returns the (rows, targets) of a CSV file with a header naming the variables.'''
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        missing = [name for name in engine.input if name not in reader.fieldnames]
+        if missing:
+            raise ValueError('input variables %s not found in <%s>' % (missing, path))
+        rows, targets = [], []
+        for record in reader:
+            rows.append([float(record[name]) for name in engine.input])
+            targets.append([float(record[name]) if record.get(name) not in (None, '')
+                            else None for name in engine.output])
+    return rows, targets
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fl.tuner')
+    parser.add_argument('fcl', help='the engine to tune')
+    parser.add_argument('data', help='a CSV file with columns named after the variables')
+    parser.add_argument('--output', help='the FCL file of the tuned engine (default stdout)')
+    parser.add_argument('--generations', type=int, default=50)
+    parser.add_argument('--population', type=int, default=20)
+    parser.add_argument('--mutation', type=float, default=0.5)
+    parser.add_argument('--crossover', type=float, default=0.9)
+    parser.add_argument('--workers', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--checkpoint', help='a JSON file to save and resume the progress')
+    parser.add_argument('--no-weights', action='store_true', help='tune only the terms')
+    args = parser.parse_args(argv)
+
+    with open(args.fcl) as f:
+        engine = FCLImporter().engine(f)
+    rows, targets = read_dataset(args.data, engine)
+    tuner = Tuner(engine, rows, targets, space=ParameterSpace(engine,
+                  weights=not args.no_weights), size=args.population,
+                  mutation=args.mutation, crossover=args.crossover,
+                  workers=args.workers, seed=args.seed)
+    log = lambda tuner: sys.stderr.write('generation %i: %r\n'
+                                         % (tuner.generation, tuner.best()[1]))
+    _, cost = tuner.run(args.generations, args.checkpoint, log=log)
+    tuner.apply()
+    fcl = FCLExporter().engine(engine) + '\n'
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(fcl)
+    else:
+        sys.stdout.write(fcl)
+    sys.stderr.write('tuned %i parameters to a cost of %r\n' % (len(tuner.space), cost))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
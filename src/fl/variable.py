@@ -20,7 +20,10 @@ class Variable(object):
     def __init__(self, name):
         self.name = name
         self.term = OrderedDict()
-        self.logger = logging.getLogger(type(self).__name__)
+    
+    @property
+    def logger(self):
+        return logging.getLogger(type(self).__name__)
     
     def __iter__(self):
         '''Returns a generator that iterates through all the terms of this variable.''' 
@@ -76,6 +79,7 @@ class OutputVariable(Variable):
         default: a float value to assume by default if there is no output.
         defuzzifier: an instance of a defuzzifier method.
         output: a Cumulative term to which Output terms will be appended.
+        stats: the Stats of the engine if instrumented, or None.
     '''
     
     def __init__(self, name, default = None):
@@ -83,6 +87,7 @@ class OutputVariable(Variable):
         self.default = default
         self.defuzzifier = None
         self.output = Cumulative('output')
+        self.stats = None
     
     def configure(self, fop):
         Variable.configure(self, fop)
@@ -91,9 +96,21 @@ class OutputVariable(Variable):
     
     def defuzzify(self):
         '''Returns a single float value representing the defuzzified output.'''
+        if self.stats is not None:
+            return self.stats.defuzzify(self)
         if self.output.is_empty():
             return self.default
         return self.defuzzifier.defuzzify(self.output)
+
+def numeric(value):
+    '''Returns the defuzzified value as a float for numeric buffers, where nan stands
+    for None, i.e., an output without default where no rule concluding it fired.'''
+    return value if value is not None else float('nan')
+
+def missing(value):
+    '''Returns whether the defuzzified value is None or nan, i.e., no rule concluding
+    the output fired and it has no default (or a default of nan).'''
+    return value is None or value != value
     
 if __name__ == '__main__':
 #    from collections import OrderedDict